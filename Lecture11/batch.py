@@ -0,0 +1,485 @@
+from openai import AsyncOpenAI
+import hashlib
+import asyncio
+import json
+import os
+
+from pipeline import judge_message, error_result, make_result
+from judgement import JudgementParser, JudgementError
+from cache import EvaluationCache
+from prejudge import PreJudge
+from store import ResultStore
+
+
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchClient:
+    """
+    Runs chat completion requests through the OpenAI Batch API: the requests
+    are written as JSONL files, uploaded and submitted as batches, which are
+    polled until they end, and their results are joined back by custom ID.
+    Batches are recorded in a state file until their results are read, so a
+    run interrupted while waiting resumes polling the same batches instead of
+    submitting them again.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        directory: str,
+        poll_interval: float = 60.0,
+        max_requests: int = 50000,
+    ) -> None:
+        """
+        Initializes the client.
+
+        :param client: The OpenAI client.
+        :type client: AsyncOpenAI
+        :param directory: Folder of the batch input files and of the state file.
+        :type directory: str
+        :param poll_interval: Seconds between two status checks of a batch.
+        :type poll_interval: float
+        :param max_requests: Maximum number of requests per batch file.
+        :type max_requests: int
+        """
+        self.client = client
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.max_requests = max_requests
+
+        os.makedirs(directory, exist_ok=True)
+        self.state_file = os.path.join(directory, "batches.json")
+        self.submitted: dict[str, str] = {}
+        if os.path.exists(self.state_file):
+            with open(self.state_file, encoding="utf-8") as f:
+                self.submitted = json.load(f)
+
+        self.batches = 0
+        self.resumed = 0
+
+    def write_requests(
+        self,
+        name: str,
+        model: str,
+        system_prompt: str,
+        messages: dict[str, str],
+        request_params: dict | None = None,
+    ) -> list[str]:
+        """
+        Writes the requests as JSONL files in the Batch API format, one
+        request per line, splitting them in files of at most `max_requests`.
+
+        :param name: The name of the files.
+        :type name: str
+        :param model: The model ID.
+        :type model: str
+        :param system_prompt: The system prompt of the requests.
+        :type system_prompt: str
+        :param messages: The user message of each custom ID.
+        :type messages: dict[str, str]
+        :param request_params: Other parameters of the requests, if any.
+        :type request_params: dict | None
+        :return: The paths of the files.
+        :rtype: list[str]
+        """
+        items = list(messages.items())
+        paths = []
+        for part, start in enumerate(range(0, len(items), self.max_requests)):
+            path = os.path.join(self.directory, f"{name}_{part}.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                for custom_id, message in items[start : start + self.max_requests]:
+                    request = {
+                        "custom_id": custom_id,
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": model,
+                            "messages": [
+                                {"role": "system", "content": system_prompt},
+                                {"role": "user", "content": message},
+                            ],
+                            **(request_params or {}),
+                        },
+                    }
+                    f.write(json.dumps(request, ensure_ascii=False) + "\n")
+            paths.append(path)
+        return paths
+
+    async def submit(self, path: str) -> str:
+        """
+        Uploads a batch file and submits it, unless the same file was already
+        submitted by a previous run and may still complete.
+
+        :param path: The path of the batch file.
+        :type path: str
+        :return: The batch ID.
+        :rtype: str
+        """
+        with open(path, "rb") as f:
+            content = f.read()
+        content_hash = hashlib.sha256(content).hexdigest()
+        if content_hash in self.submitted:
+            batch = await self.client.batches.retrieve(self.submitted[content_hash])
+            if batch.status not in {"failed", "expired", "cancelled"}:
+                self.resumed += 1
+                return batch.id
+
+        file = await self.client.files.create(
+            file=(os.path.basename(path), content), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        self.batches += 1
+        self.submitted[content_hash] = batch.id
+        self.save_state()
+        return batch.id
+
+    def save_state(self) -> None:
+        """
+        Saves the batches waited for to the state file.
+        """
+        with open(self.state_file, "w", encoding="utf-8") as f:
+            json.dump(self.submitted, f, indent=2)
+
+    async def wait(self, batch_id: str) -> dict[str, str | Exception]:
+        """
+        Polls a batch until it ends and downloads its results.
+
+        :param batch_id: The batch ID.
+        :type batch_id: str
+        :return: The response content of each custom ID, or the error of the requests that failed or returned no content.
+        :rtype: dict[str, str | Exception]
+        :raises RuntimeError: If the batch failed, expired or was cancelled without results.
+        """
+        while True:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status in FINAL_STATUSES:
+                break
+            counts = batch.request_counts
+            if counts:
+                print(
+                    f"Batch {batch_id} {batch.status}: "
+                    f"{counts.completed + counts.failed}/{counts.total} requests done"
+                )
+            await asyncio.sleep(self.poll_interval)
+
+        results: dict[str, str | Exception] = {}
+        # An expired or cancelled batch still returns the requests it completed.
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            output_file = await self.client.files.content(file_id)
+            for line in output_file.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    error = record.get("error") or response.get("body", {}).get("error")
+                    results[record["custom_id"]] = RuntimeError(
+                        f"Batch request failed: {error}"
+                    )
+                else:
+                    message = response["body"]["choices"][0]["message"]
+                    content = message.get("content")
+                    # A refusal or an empty completion comes back without content.
+                    if not isinstance(content, str):
+                        content = RuntimeError(
+                            f"Batch request without content: {message}"
+                        )
+                    results[record["custom_id"]] = content
+        # Later runs submit the same requests again rather than reusing results.
+        self.submitted = {
+            content_hash: submitted_id
+            for content_hash, submitted_id in self.submitted.items()
+            if submitted_id != batch_id
+        }
+        self.save_state()
+        if batch.status != "completed" and not results:
+            raise RuntimeError(f"Batch {batch_id} {batch.status}: {batch.errors}")
+        return results
+
+    async def run(
+        self,
+        name: str,
+        model: str,
+        system_prompt: str,
+        messages: dict[str, str],
+        request_params: dict | None = None,
+    ) -> dict[str, str | Exception]:
+        """
+        Runs requests through batches and waits for all of them.
+
+        :param name: The name of the batch files.
+        :type name: str
+        :param model: The model ID.
+        :type model: str
+        :param system_prompt: The system prompt of the requests.
+        :type system_prompt: str
+        :param messages: The user message of each custom ID.
+        :type messages: dict[str, str]
+        :param request_params: Other parameters of the requests, if any.
+        :type request_params: dict | None
+        :return: The response content of each custom ID, or the error of the requests that failed or are missing.
+        :rtype: dict[str, str | Exception]
+        """
+        if not messages:
+            return {}
+        paths = self.write_requests(
+            name, model, system_prompt, messages, request_params
+        )
+        batch_ids = await asyncio.gather(*(self.submit(path) for path in paths))
+        print(f"{name}: {len(messages)} requests in batches {', '.join(batch_ids)}")
+        parts = await asyncio.gather(
+            *(self.wait(batch_id) for batch_id in batch_ids), return_exceptions=True
+        )
+
+        results: dict[str, str | Exception] = {}
+        for part in parts:
+            if isinstance(part, Exception):
+                print(f"An error occurred: {part}")
+            else:
+                results.update(part)
+        for custom_id in messages:
+            if custom_id not in results:
+                results[custom_id] = RuntimeError("Batch request missing")
+        return results
+
+
+class BatchEvaluation:
+    """
+    Evaluation through the Batch API rather than one request per row: every
+    answer missing from the cache is requested in one batch, then every
+    judgement in another. It is cheaper but slower than the pipeline, so it
+    suits large evaluations that can run overnight. Rows are keyed by their
+    result store key, which serves as the custom ID of their requests.
+    """
+
+    def __init__(
+        self,
+        batch_client: BatchClient,
+        DEFAULT_MODEL: str,
+        DEFAULT_PROMPT: str,
+        JUDGE_MODEL: str,
+        JUDGE_PROMPT: str,
+        EVAL_RATINGS: dict,
+        store: ResultStore,
+        cache: EvaluationCache,
+        parser: JudgementParser,
+        prejudge: PreJudge | None = None,
+    ) -> None:
+        """
+        Initializes the evaluation.
+
+        :param batch_client: The client running the batches.
+        :type batch_client: BatchClient
+        :param DEFAULT_MODEL: The model ID of the default agent.
+        :type DEFAULT_MODEL: str
+        :param DEFAULT_PROMPT: The system prompt of the default agent.
+        :type DEFAULT_PROMPT: str
+        :param JUDGE_MODEL: The model ID of the judge agent.
+        :type JUDGE_MODEL: str
+        :param JUDGE_PROMPT: The system prompt of the judge agent.
+        :type JUDGE_PROMPT: str
+        :param EVAL_RATINGS: The evaluation ratings to use for the questions.
+        :type EVAL_RATINGS: dict
+        :param store: The result store of the completed rows.
+        :type store: ResultStore
+        :param cache: The cache of the answers and judgements.
+        :type cache: EvaluationCache
+        :param parser: The parser of the judge outputs.
+        :type parser: JudgementParser
+        :param prejudge: The pre-judge rating the clear-cut answers, if any.
+        :type prejudge: PreJudge | None
+        """
+        self.batch_client = batch_client
+        self.DEFAULT_MODEL = DEFAULT_MODEL
+        self.DEFAULT_PROMPT = DEFAULT_PROMPT
+        self.JUDGE_MODEL = JUDGE_MODEL
+        self.JUDGE_PROMPT = JUDGE_PROMPT
+        self.EVAL_RATINGS = EVAL_RATINGS
+        self.store = store
+        self.cache = cache
+        self.parser = parser
+        self.prejudge = prejudge
+
+        self.resumed = 0
+
+    async def answer(self, rows: list[dict]) -> dict[str, str | Exception]:
+        """
+        Answers the questions of the rows, from the cache or through a batch.
+
+        :param rows: The dataset rows.
+        :type rows: list[dict]
+        :return: The answer of each row key, or the error of the rows that failed.
+        :rtype: dict[str, str | Exception]
+        """
+        answers: dict[str, str | Exception] = {}
+        messages = {}
+        for row in rows:
+            answer = self.cache.get_answer(row["question"])
+            if answer is None:
+                messages[row["key"]] = row["question"]
+            else:
+                answers[row["key"]] = answer
+
+        results = await self.batch_client.run(
+            "answers", self.DEFAULT_MODEL, self.DEFAULT_PROMPT, messages
+        )
+        for row in rows:
+            answer = results.get(row["key"])
+            if isinstance(answer, str):
+                self.cache.put_answer(row["question"], answer)
+            if answer is not None:
+                answers[row["key"]] = answer
+        return answers
+
+    async def judge(self, rows: list[dict], answers: dict[str, str]) -> dict[str, dict]:
+        """
+        Scores the answers of the rows, with the pre-judge, the cache or
+        through a batch. A clear-cut row drawn for audit keeps its pre-judge
+        rating if the judge fails.
+
+        :param rows: The answered dataset rows.
+        :type rows: list[dict]
+        :param answers: The answer of each row key.
+        :type answers: dict[str, str]
+        :return: The evaluation result of each row key.
+        :rtype: dict[str, dict]
+        """
+        results = {}
+        # Pre-judge results of the clear-cut rows drawn for audit.
+        prejudged = {}
+        messages = {}
+        for row in rows:
+            answer = answers[row["key"]]
+            if self.prejudge is not None:
+                rating, metrics = self.prejudge.rate(answer, row["expected_output"])
+                if rating is not None:
+                    result = make_result(
+                        row,
+                        answer,
+                        rating,
+                        self.EVAL_RATINGS[rating],
+                        self.prejudge.justification(metrics),
+                    )
+                    if not self.prejudge.should_audit():
+                        results[row["key"]] = result
+                        continue
+                    prejudged[row["key"]] = result
+
+            output = self.cache.get_judgement(answer, row["expected_output"])
+            if output is None:
+                messages[row["key"]] = judge_message(answer, row["expected_output"])
+            else:
+                results[row["key"]] = make_result(
+                    row,
+                    answer,
+                    output["similarity_rating"],
+                    self.EVAL_RATINGS[output["similarity_rating"]],
+                    output["justification"],
+                )
+
+        judgements: dict[str, dict | Exception] = {}
+        for attempt in ("judgements", "judgements_retry"):
+            outputs = await self.batch_client.run(
+                attempt,
+                self.JUDGE_MODEL,
+                self.JUDGE_PROMPT,
+                messages,
+                {"response_format": self.parser.response_format},
+            )
+            malformed = {}
+            for key, output in outputs.items():
+                if isinstance(output, Exception):
+                    judgements[key] = output
+                    continue
+                try:
+                    judgements[key] = self.parser.parse(output)
+                except JudgementError as e:
+                    judgements[key] = e
+                    malformed[key] = messages[key]
+            # Ask the malformed ones once more, in a second batch.
+            messages = malformed
+            if attempt == "judgements":
+                self.parser.retried += len(malformed)
+            else:
+                self.parser.failed += len(malformed)
+
+        for row in rows:
+            answer = answers[row["key"]]
+            if row["key"] in judgements:
+                try:
+                    output = judgements[row["key"]]
+                    if isinstance(output, Exception):
+                        raise output
+                    results[row["key"]] = make_result(
+                        row,
+                        answer,
+                        output["similarity_rating"],
+                        self.EVAL_RATINGS[output["similarity_rating"]],
+                        output["justification"],
+                    )
+                    self.cache.put_judgement(
+                        answer,
+                        row["expected_output"],
+                        {
+                            "similarity_rating": output["similarity_rating"],
+                            "justification": output["justification"],
+                        },
+                    )
+                except Exception as e:
+                    print(f"An error occurred: {e}")
+                    # The audit only checks the thresholds; it must not fail the row.
+                    results[row["key"]] = prejudged.get(row["key"]) or error_result(
+                        row, answer, e
+                    )
+                    continue
+            if row["key"] in prejudged:
+                self.prejudge.record_audit(
+                    prejudged[row["key"]]["similarity_rating"],
+                    results[row["key"]]["similarity_rating"],
+                )
+        return results
+
+    async def run(self, datasets: dict[str, list[dict]]) -> dict[str, list[dict]]:
+        """
+        Evaluates the rows of every dataset.
+
+        :param datasets: The rows of each dataset, with 'key', 'question' and 'expected_output' keys.
+        :type datasets: dict[str, list[dict]]
+        :return: The evaluation result of each row of each dataset.
+        :rtype: dict[str, list[dict]]
+        """
+        pending = {}
+        for dataset, rows in datasets.items():
+            for row in rows:
+                if self.store.get(row["key"]) is None:
+                    pending[row["key"]] = {**row, "dataset": dataset}
+                else:
+                    self.resumed += 1
+        rows = list(pending.values())
+
+        answers = await self.answer(rows)
+        results = {}
+        for row in rows:
+            if isinstance(answers[row["key"]], Exception):
+                results[row["key"]] = error_result(row, "", answers[row["key"]])
+        answered = [row for row in rows if row["key"] not in results]
+        results.update(await self.judge(answered, answers))
+
+        for key, row in pending.items():
+            self.store.append(
+                key,
+                row["dataset"],
+                results[key],
+                results[key]["similarity_rating"] == "Error",
+            )
+        return {
+            dataset: [self.store.get(row["key"]) or results[row["key"]] for row in rows]
+            for dataset, rows in datasets.items()
+        }
@@ -0,0 +1,125 @@
+from typing import Callable
+import argparse
+import json
+import time
+
+from judgement import JudgementError, JudgementParser
+import fake_openai
+
+EVAL_RATINGS = {
+    "Totally Different": 0,
+    "Slightly Similar": 1,
+    "Moderately Similar": 2,
+    "Highly Similar": 3,
+    "Identical / Semantically Equivalent": 4,
+}
+
+
+def legacy_parse(output: str) -> dict:
+    """
+    Parses a judge output the way the pipeline did before the structured
+    output: code fences stripped, then json.loads, with the rating checked
+    against the evaluation ratings as scoring the row did.
+
+    :param output: The response content of the judge agent.
+    :type output: str
+    :return: The judgement.
+    :rtype: dict
+    :raises ValueError: If the output is not JSON or its rating is unknown.
+    """
+    judgement = json.loads(output.replace("```json", "").replace("```", "").strip())
+    if judgement["similarity_rating"] not in EVAL_RATINGS:
+        raise ValueError(f"Unknown rating: {judgement['similarity_rating']}")
+    return judgement
+
+
+def judge_outputs(responses: int) -> list[str]:
+    """
+    Draws judge outputs from the fake API, with its shares of repairable and
+    unparseable outputs.
+
+    :param responses: Number of outputs.
+    :type responses: int
+    :return: The judge outputs.
+    :rtype: list[str]
+    """
+    response_format = JudgementParser(EVAL_RATINGS).response_format
+    return [
+        fake_openai.fake_content(
+            {
+                "messages": [{"role": "user", "content": f"Answer {index}"}],
+                "response_format": response_format,
+            }
+        )
+        for index in range(responses)
+    ]
+
+
+def measure(
+    parse: Callable[[str], dict], outputs: list[str], retries: list[str]
+) -> tuple[int, int, float]:
+    """
+    Parses the judge outputs, parsing a retried output in place of each
+    malformed one as the pipeline does.
+
+    :param parse: The parsing function.
+    :type parse: Callable[[str], dict]
+    :param outputs: The judge outputs.
+    :type outputs: list[str]
+    :param retries: The judge output of the retry of each output.
+    :type retries: list[str]
+    :return: The malformed outputs, the outputs still malformed once retried, and the parse seconds.
+    :rtype: tuple[int, int, float]
+    """
+    malformed = failed = 0
+    started = time.perf_counter()
+    for output, retry in zip(outputs, retries):
+        try:
+            parse(output)
+        except (JudgementError, ValueError, KeyError, TypeError):
+            malformed += 1
+            try:
+                parse(retry)
+            except (JudgementError, ValueError, KeyError, TypeError):
+                failed += 1
+    return malformed, failed, time.perf_counter() - started
+
+
+def main() -> None:
+    """
+    Measures the error rate and parse time of the judge outputs, without any
+    model call, on outputs drawn from the fake API with a share repairable
+    (code fence or rating case) and a share unparseable: the code fence
+    stripping and json.loads as before, and the repairing parser as now. Each
+    malformed output is retried once with another drawn output. The outputs
+    are drawn from a fixed seed, so runs are reproducible.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--responses", type=int, default=10000)
+    parser.add_argument("--repairable-rate", type=float, default=0.2)
+    parser.add_argument("--unparseable-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake_openai.FAKE_REPAIRABLE_RATE = args.repairable_rate
+    fake_openai.FAKE_UNPARSEABLE_RATE = args.unparseable_rate
+    fake_openai.rng.seed(args.seed)
+    outputs = judge_outputs(args.responses)
+    retries = judge_outputs(args.responses)
+
+    per_10k = 10000 / args.responses
+    print(f"{'parser':<10} {'malformed':>9} {'failed':>7} {'ms':>8}  (per 10k outputs)")
+    parsers = [
+        ("legacy", legacy_parse),
+        ("repairing", JudgementParser(EVAL_RATINGS).parse),
+    ]
+    for name, parse in parsers:
+        malformed, failed, elapsed = measure(parse, outputs, retries)
+        print(
+            f"{name:<10} {malformed * per_10k:>9.0f} {failed * per_10k:>7.0f} "
+            f"{elapsed * per_10k * 1000:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import pandas as pd
+import tempfile
+import argparse
+import time
+import os
+
+from main import save_dataset
+from store import ResultStore
+
+COLUMNS = [
+    "question",
+    "obtained_answer",
+    "expected_answer",
+    "similarity_rating",
+    "similarity_score",
+    "justification",
+]
+
+
+def make_results(rows: int) -> list[dict]:
+    """
+    Makes evaluation results of a realistic size.
+
+    :param rows: Number of results.
+    :type rows: int
+    :return: The results.
+    :rtype: list[dict]
+    """
+    return [
+        {
+            "question": f"Question {index}: " + "what is it? " * 10,
+            "obtained_answer": f"Answer {index}. " + "It is this. " * 30,
+            "expected_answer": f"Expected {index}. " + "It is that. " * 20,
+            "similarity_rating": "Highly Similar",
+            "similarity_score": 3,
+            "justification": "Both answers say the same thing. " * 3,
+        }
+        for index in range(rows)
+    ]
+
+
+def legacy_handle(results: list[dict], path: str) -> None:
+    """
+    Collects the results the way main.py did before the result store: one
+    DataFrame concatenated row by row, written once at the end.
+
+    :param results: The evaluation results.
+    :type results: list[dict]
+    :param path: Path of the CSV file.
+    :type path: str
+    """
+    eval_df = pd.DataFrame(columns=COLUMNS)
+    for result in results:
+        new_row = pd.DataFrame([result])
+        eval_df = pd.concat([eval_df, new_row], ignore_index=True)
+    eval_df.to_csv(path, index=False)
+
+
+def store_handle(results: list[dict], path: str) -> None:
+    """
+    Handles the results the way the pipeline does now: each one appended to
+    the result store as it is known, then the dataset saved from whole columns.
+
+    :param results: The evaluation results.
+    :type results: list[dict]
+    :param path: Path of the result store file.
+    :type path: str
+    """
+    store = ResultStore(path)
+    for index, result in enumerate(results):
+        store.append(f"benchmark:{index}", "benchmark", result, False)
+    store.close()
+    save_dataset("benchmark", results)
+
+
+def main() -> None:
+    """
+    Measures the time spent handling evaluation results, excluding the model
+    calls, at increasing row counts: concatenating a DataFrame row by row as
+    before, and appending to the result store and building the DataFrame once
+    as now, plus the time a resumed run takes to load the store.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument(
+        "--legacy-max-rows",
+        type=int,
+        default=20000,
+        help="Largest row count for the row by row concatenation, which is quadratic",
+    )
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'handling':<14} {'seconds':>8} {'us/row':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        # save_dataset writes to the 'eval' folder of the working directory.
+        os.chdir(directory)
+        os.makedirs("eval")
+        for rows in args.rows:
+            results = make_results(rows)
+            runs = [
+                ("store", lambda: store_handle(results, f"results-{rows}.jsonl")),
+                ("store resume", lambda: ResultStore(f"results-{rows}.jsonl").close()),
+            ]
+            if rows <= args.legacy_max_rows:
+                runs.insert(
+                    0, ("row concat", lambda: legacy_handle(results, "legacy.csv"))
+                )
+            for name, run in runs:
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{rows:>7} {name:<14} {elapsed:>8.2f} {elapsed / rows * 1e6:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
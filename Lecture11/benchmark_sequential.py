@@ -0,0 +1,146 @@
+from contextlib import redirect_stdout
+import tempfile
+import argparse
+import asyncio
+import time
+import io
+import os
+
+from prompts import JUDGE_PROMPT, DEFAULT_PROMPT
+from main import evaluate_datasets, load_datasets
+from sampling import SequentialSampler
+from judgement import JudgementParser
+from cache import EvaluationCache
+from store import ResultStore
+import fake_openai
+
+EVAL_RATINGS = {
+    "Totally Different": 0,
+    "Slightly Similar": 1,
+    "Moderately Similar": 2,
+    "Highly Similar": 3,
+    "Identical / Semantically Equivalent": 4,
+}
+DEFAULT_MODEL = "gpt-4o-mini"
+JUDGE_MODEL = "o4-mini"
+
+
+def write_datasets(names: list[str], rows: int) -> None:
+    """
+    Writes synthetic datasets to the 'data' folder of the working directory.
+
+    :param names: The names of the datasets.
+    :type names: list[str]
+    :param rows: Number of rows of each dataset.
+    :type rows: int
+    """
+    os.makedirs("data", exist_ok=True)
+    for name in names:
+        with open(f"data/{name}.csv", "w", encoding="utf-8") as f:
+            f.write("input,expected_output\n")
+            for index in range(rows):
+                f.write(f"{name} question {index}?,{name} answer {index}\n")
+
+
+def run_sampling(
+    datasets: dict[str, list[dict]], args: argparse.Namespace, run: str
+) -> tuple[SequentialSampler, float]:
+    """
+    Evaluates a sequential sample of the datasets against the fake API, with a
+    new result store and cache so no row is reused from another run.
+
+    :param datasets: The rows of each dataset.
+    :type datasets: dict[str, list[dict]]
+    :param args: The command line arguments.
+    :type args: argparse.Namespace
+    :param run: The name of the run, naming its store and cache files.
+    :type run: str
+    :return: The sampler once it stopped, and the seconds the run took.
+    :rtype: tuple[SequentialSampler, float]
+    """
+    store = ResultStore(f"eval/{run}.jsonl")
+    cache = EvaluationCache(
+        f"eval/{run}.db", DEFAULT_MODEL, DEFAULT_PROMPT, JUDGE_MODEL, JUDGE_PROMPT
+    )
+    sampler = SequentialSampler(
+        datasets,
+        args.round_rows,
+        args.ci_width,
+        baseline_file="eval/baseline.json",
+        regression_margin=args.regression_margin,
+    )
+    started = time.perf_counter()
+    # evaluate_datasets reports every run; only the summary below is printed.
+    with redirect_stdout(io.StringIO()):
+        asyncio.run(
+            evaluate_datasets(
+                datasets,
+                EVAL_RATINGS,
+                DEFAULT_MODEL,
+                JUDGE_MODEL,
+                args.concurrency,
+                args.concurrency,
+                {},
+                3,
+                store,
+                cache,
+                JudgementParser(EVAL_RATINGS),
+                None,
+                sampler,
+            )
+        )
+    elapsed = time.perf_counter() - started
+    store.close()
+    cache.close()
+    return sampler, elapsed
+
+
+def main() -> None:
+    """
+    Validates the sequential sampling against a local fake OpenAI API whose
+    judge rates every answer the same way in every run: a first run saves the
+    baseline once its confidence intervals are narrow enough, a second run
+    with the same ratings stops without a regression, and a third run whose
+    ratings are shifted down stops early on a regression. The rows evaluated
+    versus the full set are printed for each run.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--datasets", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per dataset")
+    parser.add_argument("--round-rows", type=int, default=64)
+    parser.add_argument("--ci-width", type=float, default=0.5)
+    parser.add_argument("--regression-margin", type=float, default=0.1)
+    parser.add_argument("--shift", type=int, default=1, help="Ratings lost")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds")
+    args = parser.parse_args()
+
+    fake_openai.FAKE_LATENCY = args.latency
+    names = [f"dataset_{index}" for index in range(args.datasets)]
+    with fake_openai.run_fake_openai() as url, tempfile.TemporaryDirectory() as dir:
+        os.environ["OPENAI_BASE_URL"] = url
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+        # The evaluation reads 'data' and writes 'eval' in the working directory.
+        os.chdir(dir)
+        os.makedirs("eval")
+        write_datasets(names, args.rows)
+        datasets = load_datasets(names, DEFAULT_MODEL, JUDGE_MODEL, None)
+        total = sum(len(rows) for rows in datasets.values())
+
+        print(f"{'run':<10} {'evaluated':>9} {'of':>6} {'seconds':>8}  stop reason")
+        for run, shift in (("baseline", 0), ("unchanged", 0), ("shifted", args.shift)):
+            fake_openai.FAKE_RATING_SHIFT = shift
+            sampler, elapsed = run_sampling(datasets, args, run)
+            evaluated = sum(len(results) for results in sampler.results.values())
+            print(
+                f"{run:<10} {evaluated:>9} {total:>6} {elapsed:>8.1f}  "
+                f"{sampler.stop_reason()}"
+            )
+            if run == "baseline":
+                print(
+                    f"{'':<10} baseline saved: {os.path.exists('eval/baseline.json')}"
+                )
+
+
+if __name__ == "__main__":
+    main()
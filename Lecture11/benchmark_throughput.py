@@ -0,0 +1,218 @@
+from concurrent.futures import ThreadPoolExecutor
+from agno.models.openai import OpenAIChat
+from agno.agent import Agent
+import functools
+import tempfile
+import argparse
+import asyncio
+import httpx
+import time
+import json
+import os
+
+from prompts import JUDGE_PROMPT, DEFAULT_PROMPT
+from pipeline import EvaluationPipeline, judge_message
+from judgement import JudgementParser
+from engine import EvaluationEngine
+from cache import EvaluationCache
+from main import create_agent
+from store import ResultStore
+import fake_openai
+
+EVAL_RATINGS = {
+    "Totally Different": 0,
+    "Slightly Similar": 1,
+    "Moderately Similar": 2,
+    "Highly Similar": 3,
+    "Identical / Semantically Equivalent": 4,
+}
+DEFAULT_MODEL = "gpt-4o-mini"
+JUDGE_MODEL = "o4-mini"
+
+
+def make_rows(questions: int) -> list[dict]:
+    """
+    Makes distinct dataset rows, so no answer or judgement is cached.
+
+    :param questions: Number of rows.
+    :type questions: int
+    :return: The rows, with 'key', 'question' and 'expected_output' keys.
+    :rtype: list[dict]
+    """
+    return [
+        {
+            "key": f"row-{index}",
+            "question": f"Question {index}: what is the capital of country {index}?",
+            "expected_output": f"The capital of country {index}.",
+        }
+        for index in range(questions)
+    ]
+
+
+def legacy_evaluate(rows: list[dict], parser: JudgementParser) -> int:
+    """
+    Evaluates the rows the way main.py did before the async engine: three
+    workers each answer and then judge one question at a time with blocking
+    agent runs, without rate limiting or retries.
+
+    :param rows: The dataset rows.
+    :type rows: list[dict]
+    :param parser: Provides the judge response format.
+    :type parser: JudgementParser
+    :return: The number of rows that failed.
+    :rtype: int
+    """
+    default_agent = Agent(
+        name="Default Agent",
+        model=OpenAIChat(id=DEFAULT_MODEL, system_prompt=DEFAULT_PROMPT),
+    )
+    judge_agent = Agent(
+        name="Judge Agent",
+        model=OpenAIChat(
+            id=JUDGE_MODEL,
+            system_prompt=JUDGE_PROMPT,
+            request_params={"response_format": parser.response_format},
+        ),
+    )
+
+    def process_question_pair(row: dict) -> bool:
+        try:
+            answer = default_agent.run(row["question"]).content
+            output = judge_agent.run(judge_message(answer, row["expected_output"]))
+            json.loads(output.content.replace("```json", "").replace("```", ""))
+            return True
+        except Exception:
+            return False
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        return list(pool.map(process_question_pair, rows)).count(False)
+
+
+async def pipeline_evaluate(
+    rows: list[dict],
+    parser: JudgementParser,
+    concurrency: int,
+    rate_limit: float,
+    directory: str,
+) -> int:
+    """
+    Evaluates the rows through the answer/judge pipeline and the async engine,
+    as main.py does now, with an empty result store and cache.
+
+    :param rows: The dataset rows.
+    :type rows: list[dict]
+    :param parser: The parser of the judge outputs.
+    :type parser: JudgementParser
+    :param concurrency: Number of answer requests and of judge requests in flight.
+    :type concurrency: int
+    :param rate_limit: Maximum requests per minute of each model.
+    :type rate_limit: float
+    :param directory: Folder of the result store and cache files.
+    :type directory: str
+    :return: The number of rows that failed.
+    :rtype: int
+    """
+    name = f"pipeline-{concurrency}"
+    store = ResultStore(os.path.join(directory, f"{name}.jsonl"))
+    cache = EvaluationCache(
+        os.path.join(directory, f"{name}.db"),
+        DEFAULT_MODEL,
+        DEFAULT_PROMPT,
+        JUDGE_MODEL,
+        JUDGE_PROMPT,
+    )
+    engine = EvaluationEngine(
+        2 * concurrency, {DEFAULT_MODEL: rate_limit, JUDGE_MODEL: rate_limit}
+    )
+    results = []
+    async with httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=2 * concurrency),
+        timeout=httpx.Timeout(600, connect=10),
+    ) as http_client:
+        pipeline = EvaluationPipeline(
+            engine,
+            functools.partial(
+                create_agent,
+                "Default Agent",
+                DEFAULT_MODEL,
+                DEFAULT_PROMPT,
+                http_client,
+            ),
+            functools.partial(
+                create_agent,
+                "Judge Agent",
+                JUDGE_MODEL,
+                JUDGE_PROMPT,
+                http_client,
+                {"response_format": parser.response_format},
+            ),
+            EVAL_RATINGS,
+            concurrency,
+            concurrency,
+            store,
+            cache,
+            parser,
+        )
+        await pipeline.run(
+            {"benchmark": rows}, lambda dataset, rows: results.extend(rows)
+        )
+    store.close()
+    cache.close()
+    return sum(result["similarity_rating"] == "Error" for result in results)
+
+
+async def main() -> None:
+    """
+    Measures the questions per second of the evaluation against a local fake
+    OpenAI server with a fixed latency and a share of rate-limited requests,
+    with the blocking three-worker pool as before and with the async pipeline
+    at several concurrencies.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--rate-limit", type=float, default=60000, help="RPM")
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds")
+    parser.add_argument("--rate-limited", type=float, default=0.0, help="Share")
+    args = parser.parse_args()
+
+    fake_openai.FAKE_LATENCY = args.latency
+    fake_openai.FAKE_RATE_LIMITED_RATE = args.rate_limited
+    rows = make_rows(args.questions)
+    judgement_parser = JudgementParser(EVAL_RATINGS)
+
+    with fake_openai.run_fake_openai() as url, tempfile.TemporaryDirectory() as dir:
+        os.environ["OPENAI_BASE_URL"] = url
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+        print(
+            f"{'evaluation':<14} {'seconds':>8} {'questions/s':>11} "
+            f"{'requests':>8} {'429s':>5} {'failed rows':>11}"
+        )
+        runs = [("3 workers", None)] + [
+            (f"pipeline x{concurrency}", concurrency)
+            for concurrency in args.concurrency
+        ]
+        for name, concurrency in runs:
+            # Counted by the server: retries of the OpenAI client included.
+            counts = dict(fake_openai.counts)
+            started = time.perf_counter()
+            if concurrency is None:
+                failed = await asyncio.to_thread(
+                    legacy_evaluate, rows, judgement_parser
+                )
+            else:
+                failed = await pipeline_evaluate(
+                    rows, judgement_parser, concurrency, args.rate_limit, dir
+                )
+            elapsed = time.perf_counter() - started
+            rate_limited = fake_openai.counts["rate_limited"] - counts["rate_limited"]
+            requests = fake_openai.counts["chat"] - counts["chat"] + rate_limited
+            print(
+                f"{name:<14} {elapsed:>8.2f} {len(rows) / elapsed:>11.1f} "
+                f"{requests:>8} {rate_limited:>5} {failed:>11}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,186 @@
+import hashlib
+import sqlite3
+import json
+import time
+
+
+def sha256(*parts: str) -> str:
+    """
+    Hashes a sequence of strings, unambiguously.
+
+    :param parts: The strings to hash.
+    :type parts: str
+    :return: The hexadecimal SHA-256 digest.
+    :rtype: str
+    """
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+class EvaluationCache:
+    """
+    Two-level SQLite cache of the default agent answers and of the judge
+    outputs. Answers are keyed by question, default prompt and model, and
+    judgements by answer, expected output, judge prompt and judge model, so
+    changing one prompt only invalidates its own stage.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        default_model: str,
+        default_prompt: str,
+        judge_model: str,
+        judge_prompt: str,
+    ) -> None:
+        """
+        Opens the cache, creating it if needed.
+
+        :param path: Path of the SQLite file backing the cache.
+        :type path: str
+        :param default_model: The model ID of the default agent.
+        :type default_model: str
+        :param default_prompt: The system prompt of the default agent.
+        :type default_prompt: str
+        :param judge_model: The model ID of the judge agent.
+        :type judge_model: str
+        :param judge_prompt: The system prompt of the judge agent.
+        :type judge_prompt: str
+        """
+        self.default_model = default_model
+        self.default_prompt_hash = sha256(default_prompt)
+        self.judge_model = judge_model
+        self.judge_prompt_hash = sha256(judge_prompt)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS judgements (
+                key TEXT PRIMARY KEY,
+                output TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            """
+        )
+
+        self.answer_hits = 0
+        self.answer_misses = 0
+        self.judgement_hits = 0
+        self.judgement_misses = 0
+
+    def answer_key(self, question: str) -> str:
+        """
+        Builds the cache key of the answer to a question.
+
+        :param question: The question.
+        :type question: str
+        :return: The key.
+        :rtype: str
+        """
+        return sha256(question, self.default_prompt_hash, self.default_model)
+
+    def judgement_key(self, answer: str, expected_output: str) -> str:
+        """
+        Builds the cache key of the judgement of an answer.
+
+        :param answer: The answer of the default agent.
+        :type answer: str
+        :param expected_output: The expected answer.
+        :type expected_output: str
+        :return: The key.
+        :rtype: str
+        """
+        return sha256(
+            sha256(answer),
+            sha256(expected_output),
+            self.judge_prompt_hash,
+            self.judge_model,
+        )
+
+    def get_answer(self, question: str) -> str | None:
+        """
+        Gets the cached answer to a question.
+
+        :param question: The question.
+        :type question: str
+        :return: The answer, or None if it is not cached.
+        :rtype: str | None
+        """
+        row = self.connection.execute(
+            "SELECT answer FROM answers WHERE key = ?", (self.answer_key(question),)
+        ).fetchone()
+        if row is None:
+            self.answer_misses += 1
+            return None
+        self.answer_hits += 1
+        return row[0]
+
+    def put_answer(self, question: str, answer: str) -> None:
+        """
+        Caches the answer to a question.
+
+        :param question: The question.
+        :type question: str
+        :param answer: The answer of the default agent.
+        :type answer: str
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?)",
+                (self.answer_key(question), answer, time.time()),
+            )
+
+    def get_judgement(self, answer: str, expected_output: str) -> dict | None:
+        """
+        Gets the cached judgement of an answer.
+
+        :param answer: The answer of the default agent.
+        :type answer: str
+        :param expected_output: The expected answer.
+        :type expected_output: str
+        :return: The parsed judge output, or None if it is not cached.
+        :rtype: dict | None
+        """
+        row = self.connection.execute(
+            "SELECT output FROM judgements WHERE key = ?",
+            (self.judgement_key(answer, expected_output),),
+        ).fetchone()
+        if row is None:
+            self.judgement_misses += 1
+            return None
+        self.judgement_hits += 1
+        return json.loads(row[0])
+
+    def put_judgement(self, answer: str, expected_output: str, output: dict) -> None:
+        """
+        Caches the judgement of an answer. Only valid judge outputs should be
+        cached, so malformed ones are asked again.
+
+        :param answer: The answer of the default agent.
+        :type answer: str
+        :param expected_output: The expected answer.
+        :type expected_output: str
+        :param output: The parsed judge output.
+        :type output: dict
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO judgements VALUES (?, ?, ?)",
+                (
+                    self.judgement_key(answer, expected_output),
+                    json.dumps(output, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+
+    def close(self) -> None:
+        """
+        Closes the cache database.
+        """
+        self.connection.close()
@@ -0,0 +1,135 @@
+from agno.exceptions import ModelProviderError
+from agno.agent import Agent
+from typing import Callable
+import asyncio
+import random
+import time
+
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: `rate` tokens are added per second, up to
+    `capacity`, and every request takes one.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Initializes a full bucket.
+
+        :param rate: Tokens added per second.
+        :type rate: float
+        :param capacity: Maximum number of tokens, i.e. the largest burst.
+        :type capacity: float
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Waits until a token is available and takes it.
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class EvaluationEngine:
+    """
+    Runs agent requests on the event loop with at most `concurrency` in flight,
+    rate limited per model and retried with exponential backoff and full
+    jitter on rate limits, timeouts and server errors.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        rate_limits: dict[str, float],
+        retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ) -> None:
+        """
+        Initializes the engine.
+
+        :param concurrency: Maximum number of requests in flight.
+        :type concurrency: int
+        :param rate_limits: Maximum requests per minute of each model ID; other models are not limited.
+        :type rate_limits: dict[str, float]
+        :param retries: Number of retries of a failed request.
+        :type retries: int
+        :param base_delay: Backoff of the first retry, in seconds.
+        :type base_delay: float
+        :param max_delay: Maximum backoff, in seconds.
+        :type max_delay: float
+        """
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.buckets = {
+            # Allow a burst of one second worth of requests.
+            model_id: TokenBucket(rpm / 60, max(1.0, rpm / 60))
+            for model_id, rpm in rate_limits.items()
+        }
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+
+    def is_retryable(self, error: ModelProviderError) -> bool:
+        """
+        Checks whether a failed request may succeed if retried.
+
+        :param error: The error raised by the model.
+        :type error: ModelProviderError
+        :return: True for rate limits, timeouts, conflicts and server or connection errors.
+        :rtype: bool
+        """
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+
+    async def run(self, create_agent: Callable[[], Agent], message: str) -> str:
+        """
+        Runs a message through a new agent, so concurrent requests share no
+        run state.
+
+        :param create_agent: Creates the agent to run.
+        :type create_agent: Callable[[], Agent]
+        :param message: The message to send.
+        :type message: str
+        :return: The response content.
+        :rtype: str
+        :raises ModelProviderError: If the request fails after every retry.
+        """
+        agent = create_agent()
+        bucket = self.buckets.get(agent.model.id)
+        for attempt in range(self.retries + 1):
+            try:
+                # Wait for the rate limit outside the semaphore, so a throttled
+                # model does not hold the slots of the other one.
+                if bucket:
+                    await bucket.acquire()
+                async with self.semaphore:
+                    self.requests += 1
+                    response = await agent.arun(message)
+                return response.content
+            except ModelProviderError as e:
+                if attempt == self.retries or not self.is_retryable(e):
+                    self.failed += 1
+                    raise
+                self.retried += 1
+                delay = min(self.max_delay, self.base_delay * 2**attempt)
+                await asyncio.sleep(random.uniform(0, delay))
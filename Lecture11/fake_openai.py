@@ -0,0 +1,245 @@
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi import FastAPI, Form, Request, UploadFile
+from contextlib import contextmanager
+from typing import Iterator
+import threading
+import asyncio
+import uvicorn
+import socket
+import random
+import json
+import time
+import zlib
+
+# Seconds a chat completion takes, and shares of the requests answered with a
+# rate limit, a null content, a judgement the parser must repair (code fence
+# or rating case) and a judgement that cannot be parsed.
+FAKE_LATENCY = 0.2
+FAKE_RATE_LIMITED_RATE = 0.0
+FAKE_NULL_CONTENT_RATE = 0.0
+FAKE_REPAIRABLE_RATE = 0.0
+FAKE_UNPARSEABLE_RATE = 0.0
+# Ratings are drawn per answer, this many ratings lower, to fake a regression.
+FAKE_RATING_SHIFT = 0
+# Share of the batch requests that fail, and status checks before a batch completes.
+FAKE_BATCH_FAILED_RATE = 0.0
+FAKE_BATCH_POLLS = 2
+
+app = FastAPI(title="Fake OpenAI API")
+rng = random.Random(0)
+files: dict[str, str] = {}
+batches: dict[str, dict] = {}
+counts = {"chat": 0, "rate_limited": 0, "files": 0, "batches": 0}
+
+
+def fake_content(body: dict) -> str | None:
+    """
+    Makes the response content of a chat completion request: a judgement
+    following the requested JSON schema for judge requests, and the start of
+    the question otherwise.
+
+    :param body: The chat completion request.
+    :type body: dict
+    :return: The response content, None for the requests given a null content.
+    :rtype: str | None
+    """
+    if rng.random() < FAKE_NULL_CONTENT_RATE:
+        return None
+    message = body["messages"][-1]["content"]
+    if "response_format" not in body:
+        return f"Answer to: {message[:80]}"
+
+    ratings = body["response_format"]["json_schema"]["schema"]["properties"][
+        "similarity_rating"
+    ]["enum"]
+    # The same answer gets the same rating, whatever the faults drawn.
+    index = zlib.crc32(message.encode()) % len(ratings)
+    rating = ratings[max(0, index - FAKE_RATING_SHIFT)]
+    fault = rng.random()
+    if fault < FAKE_UNPARSEABLE_RATE:
+        return "I cannot rate this answer."
+    if fault < FAKE_UNPARSEABLE_RATE + FAKE_REPAIRABLE_RATE / 2:
+        rating = rating.upper()
+    content = json.dumps({"similarity_rating": rating, "justification": "Fake."})
+    if fault < FAKE_UNPARSEABLE_RATE + FAKE_REPAIRABLE_RATE:
+        content = f"```json\n{content}\n```"
+    return content
+
+
+def fake_completion(body: dict) -> dict:
+    """
+    Makes the chat completion of a request.
+
+    :param body: The chat completion request.
+    :type body: dict
+    :return: The chat completion object.
+    :rtype: dict
+    """
+    counts["chat"] += 1
+    return {
+        "id": f"chatcmpl-{counts['chat']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body["model"],
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": fake_content(body)},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> JSONResponse:
+    """
+    Answer a chat completion request after `FAKE_LATENCY` seconds, without
+    calling any model.
+
+    :param request: The chat completion request.
+    :type request: Request
+    :return: The completion, or a rate limit error.
+    :rtype: JSONResponse
+    """
+    body = await request.json()
+    await asyncio.sleep(FAKE_LATENCY)
+    if rng.random() < FAKE_RATE_LIMITED_RATE:
+        counts["rate_limited"] += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+            status_code=429,
+        )
+    return JSONResponse(fake_completion(body))
+
+
+def file_object(file_id: str) -> dict:
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(files[file_id]),
+        "created_at": 0,
+        "filename": file_id,
+        "purpose": "batch",
+        "status": "processed",
+    }
+
+
+def batch_object(batch_id: str) -> dict:
+    batch = batches[batch_id]
+    return {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": "/v1/chat/completions",
+        "input_file_id": batch["input_file_id"],
+        "completion_window": "24h",
+        "status": batch["status"],
+        "created_at": 0,
+        "output_file_id": batch.get("output_file_id"),
+        "error_file_id": batch.get("error_file_id"),
+        "request_counts": {
+            "total": batch["total"],
+            "completed": batch.get("completed", 0),
+            "failed": batch.get("failed", 0),
+        },
+    }
+
+
+@app.post("/v1/files")
+async def create_file(file: UploadFile, purpose: str = Form(...)) -> JSONResponse:
+    counts["files"] += 1
+    file_id = f"file-{counts['files']}"
+    files[file_id] = (await file.read()).decode()
+    return JSONResponse(file_object(file_id))
+
+
+@app.get("/v1/files/{file_id}/content")
+async def file_content(file_id: str) -> PlainTextResponse:
+    return PlainTextResponse(files[file_id])
+
+
+@app.post("/v1/batches")
+async def create_batch(request: Request) -> JSONResponse:
+    body = await request.json()
+    counts["batches"] += 1
+    batch_id = f"batch-{counts['batches']}"
+    batches[batch_id] = {
+        "input_file_id": body["input_file_id"],
+        "status": "in_progress",
+        "polls": 0,
+        "total": len(files[body["input_file_id"]].splitlines()),
+    }
+    return JSONResponse(batch_object(batch_id))
+
+
+@app.get("/v1/batches/{batch_id}")
+async def retrieve_batch(batch_id: str) -> JSONResponse:
+    """
+    Report the status of a batch, which completes after `FAKE_BATCH_POLLS`
+    status checks with its results in an output file, and its failed requests
+    in an error file, both in no particular order.
+
+    :param batch_id: The batch ID.
+    :type batch_id: str
+    :return: The batch object.
+    :rtype: JSONResponse
+    """
+    batch = batches[batch_id]
+    batch["polls"] += 1
+    if batch["status"] == "in_progress" and batch["polls"] >= FAKE_BATCH_POLLS:
+        outputs, errors = [], []
+        for line in files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            record = {"id": f"batch_req_{len(outputs) + len(errors)}"}
+            record["custom_id"] = request["custom_id"]
+            record["error"] = None
+            if rng.random() < FAKE_BATCH_FAILED_RATE:
+                error = {"message": "Internal error", "type": "server_error"}
+                record["response"] = {"status_code": 500, "body": {"error": error}}
+                errors.append(record)
+            else:
+                completion = fake_completion(request["body"])
+                record["response"] = {"status_code": 200, "body": completion}
+                outputs.append(record)
+        rng.shuffle(outputs)
+        for key, records in (("output_file_id", outputs), ("error_file_id", errors)):
+            if records:
+                counts["files"] += 1
+                file_id = f"file-{counts['files']}"
+                files[file_id] = "".join(
+                    json.dumps(record) + "\n" for record in records
+                )
+                batch[key] = file_id
+        batch["completed"], batch["failed"] = len(outputs), len(errors)
+        batch["status"] = "completed"
+    return JSONResponse(batch_object(batch_id))
+
+
+@contextmanager
+def run_fake_openai() -> Iterator[str]:
+    """
+    Serve the fake API on a free local port in a background thread.
+
+    :return: The base URL of the fake OpenAI API.
+    :rtype: Iterator[str]
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/v1"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=8003)
@@ -0,0 +1,142 @@
+import importlib.util
+import time
+import re
+
+if importlib.util.find_spec("orjson") is not None:
+    from orjson import loads, JSONDecodeError
+else:
+    from json import loads, JSONDecodeError
+
+
+class JudgementError(ValueError):
+    """
+    Raised when a judge output cannot be parsed or repaired into a valid
+    judgement.
+    """
+
+
+class JudgementParser:
+    """
+    Parser of the judge outputs. The judge is asked for structured output
+    following a JSON schema whose `similarity_rating` is one of the evaluation
+    ratings, and each output is parsed with orjson when it is installed. An
+    output that does not parse as is gets repaired: the JSON object is cut out
+    of any surrounding text or code fence and the rating matched regardless of
+    case and spacing. The parse time, repairs and malformed outputs are
+    counted, and the callers count the retries and the outputs still
+    malformed once retried.
+    """
+
+    def __init__(self, EVAL_RATINGS: dict) -> None:
+        """
+        Initializes the parser.
+
+        :param EVAL_RATINGS: The evaluation ratings the judge chooses from.
+        :type EVAL_RATINGS: dict
+        """
+        self.EVAL_RATINGS = EVAL_RATINGS
+        self.ratings = {self.normalize(rating): rating for rating in EVAL_RATINGS}
+
+        self.parsed = 0
+        self.repaired = 0
+        self.malformed = 0
+        self.retried = 0
+        self.failed = 0
+        self.parse_time = 0.0
+
+    @property
+    def response_format(self) -> dict:
+        """
+        The OpenAI structured output format of the judge responses.
+
+        :return: The `response_format` request parameter.
+        :rtype: dict
+        """
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "judgement",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "similarity_rating": {
+                            "type": "string",
+                            "enum": list(self.EVAL_RATINGS),
+                        },
+                        "justification": {"type": "string"},
+                    },
+                    "required": ["similarity_rating", "justification"],
+                    "additionalProperties": False,
+                },
+            },
+        }
+
+    @staticmethod
+    def normalize(rating: str) -> str:
+        """
+        Normalizes a rating for a lenient comparison.
+
+        :param rating: The rating.
+        :type rating: str
+        :return: The rating, lowercased and without spaces or punctuation.
+        :rtype: str
+        """
+        return re.sub(r"[\W_]", "", rating.casefold())
+
+    def validate(self, output: object) -> dict | None:
+        """
+        Validates a parsed judge output against the schema, matching its
+        rating leniently.
+
+        :param output: The parsed judge output.
+        :type output: object
+        :return: The judgement, with 'similarity_rating' and 'justification' keys, or None if it is invalid.
+        :rtype: dict | None
+        """
+        if not isinstance(output, dict):
+            return None
+        rating = output.get("similarity_rating")
+        justification = output.get("justification")
+        if not isinstance(rating, str) or not isinstance(justification, str):
+            return None
+        rating = self.ratings.get(self.normalize(rating))
+        if rating is None:
+            return None
+        return {"similarity_rating": rating, "justification": justification}
+
+    def parse(self, output: str) -> dict:
+        """
+        Parses a judge output, repairing it if needed.
+
+        :param output: The response content of the judge agent.
+        :type output: str
+        :return: The judgement, with 'similarity_rating' and 'justification' keys.
+        :rtype: dict
+        :raises JudgementError: If the output cannot be parsed or repaired.
+        """
+        started = time.perf_counter()
+        try:
+            repaired = False
+            try:
+                parsed = loads(output)
+            except JSONDecodeError:
+                # Cut the object out of a code fence or of surrounding text.
+                repaired = True
+                try:
+                    parsed = loads(output[output.find("{") : output.rfind("}") + 1])
+                except JSONDecodeError:
+                    parsed = None
+            judgement = self.validate(parsed)
+            if judgement is None:
+                self.malformed += 1
+                raise JudgementError(f"Malformed judge output: {output[:200]!r}")
+            if (
+                repaired
+                or judgement["similarity_rating"] != parsed["similarity_rating"]
+            ):
+                self.repaired += 1
+            return judgement
+        finally:
+            self.parsed += 1
+            self.parse_time += time.perf_counter() - started
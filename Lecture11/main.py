@@ -1,83 +1,374 @@
 from agno.models.openai import OpenAIChat
-from joblib import Parallel, delayed
 from dotenv import load_dotenv
+from openai import AsyncOpenAI
 from agno.agent import Agent
-from textwrap import dedent
 import pandas as pd
 import traceback
-import json
+import functools
+import asyncio
+import httpx
 import os
 
 from prompts import JUDGE_PROMPT, DEFAULT_PROMPT
+from batch import BatchEvaluation, BatchClient
+from pipeline import EvaluationPipeline
+from sampling import SequentialSampler
+from judgement import JudgementParser
+from engine import EvaluationEngine
+from cache import EvaluationCache
+from prejudge import PreJudge
+from store import ResultStore
 
 
-def process_question_pair(
-    question: str,
-    expected_output: str,
-    default_agent: Agent,
-    judge_agent: Agent,
-    EVAL_RATINGS: dict,
-) -> dict:
+def create_agent(
+    name: str,
+    model_id: str,
+    system_prompt: str,
+    http_client: httpx.AsyncClient,
+    request_params: dict | None = None,
+) -> Agent:
     """
-    Process a single question-expected output pair and return evaluation results.
-
-    :param question: The input question to evaluate.
-    :type question: str
-    :param expected_output: The expected answer for the question.
-    :type expected_output: str
-    :param default_agent: The default agent to use for the question.
-    :type default_agent: Agent
-    :param judge_agent: The judge agent to use for the question.
-    :type judge_agent: Agent
-    :param EVAL_RATINGS: The evaluation ratings to use for the question.
-    :type EVAL_RATINGS: dict
-    :return: Dictionary containing evaluation results.
-    :rtype: dict
-    :raises json.JSONDecodeError: If the judge output cannot be parsed as JSON.
-    :raises KeyError: If required keys are missing from the judge output.
+    Creates an agent whose model sends its requests through a shared HTTP
+    client, reusing its pooled connections.
+
+    :param name: The agent name.
+    :type name: str
+    :param model_id: The OpenAI model ID.
+    :type model_id: str
+    :param system_prompt: The system prompt of the agent.
+    :type system_prompt: str
+    :param http_client: The shared HTTP client.
+    :type http_client: httpx.AsyncClient
+    :param request_params: Other parameters of the requests, if any.
+    :type request_params: dict | None
+    :return: The agent.
+    :rtype: Agent
     """
-    try:
-        response = default_agent.run(question)
-        response = response.content
-        output = judge_agent.run(
-            dedent(
-                f"""
-                        Obtained Answer: {response}
-                        Expected Answer: {expected_output}
-                        """
+    return Agent(
+        name=name,
+        model=OpenAIChat(
+            id=model_id,
+            system_prompt=system_prompt,
+            http_client=http_client,
+            request_params=request_params,
+        ),
+    )
+
+
+def load_datasets(
+    eval_datasets: list[str],
+    DEFAULT_MODEL: str,
+    JUDGE_MODEL: str,
+    prejudge: PreJudge | None,
+) -> dict[str, list[dict]]:
+    """
+    Loads the rows of the datasets, keyed for the result store.
+
+    :param eval_datasets: The names of the datasets in the 'data' folder.
+    :type eval_datasets: list[str]
+    :param DEFAULT_MODEL: The model ID of the default agent.
+    :type DEFAULT_MODEL: str
+    :param JUDGE_MODEL: The model ID of the judge agent.
+    :type JUDGE_MODEL: str
+    :param prejudge: The pre-judge rating the clear-cut answers, if any.
+    :type prejudge: PreJudge | None
+    :return: The rows of each dataset, with 'key', 'question' and 'expected_output' keys.
+    :rtype: dict[str, list[dict]]
+    """
+    models = f"{DEFAULT_MODEL}/{JUDGE_MODEL}"
+    scoring = DEFAULT_PROMPT + JUDGE_PROMPT
+    if prejudge is not None:
+        # Rows scored with other thresholds are evaluated again.
+        scoring += repr(
+            (
+                prejudge.identical_threshold,
+                prejudge.different_threshold,
+                prejudge.embedding_model,
             )
         )
-        output = json.loads(
-            output.content.replace("```json", "").replace("```", "").strip()
+    datasets = {}
+    for eval_dataset in eval_datasets:
+        try:
+            df = pd.read_csv(f"data/{eval_dataset}.csv")
+            datasets[eval_dataset] = [
+                {
+                    "key": ResultStore.make_key(
+                        eval_dataset,
+                        question,
+                        expected_output,
+                        models,
+                        scoring,
+                    ),
+                    "question": question,
+                    "expected_output": expected_output,
+                }
+                for question, expected_output in zip(df["input"], df["expected_output"])
+            ]
+        except Exception as e:
+            traceback.print_exc()
+            print(f"An error occurred: {e}")
+    return datasets
+
+
+def save_dataset(eval_dataset: str, results: list[dict]) -> None:
+    """
+    Saves the results of a dataset.
+
+    :param eval_dataset: The name of the dataset.
+    :type eval_dataset: str
+    :param results: The evaluation result of each row of the dataset.
+    :type results: list[dict]
+    """
+    try:
+        columns = [
+            "question",
+            "obtained_answer",
+            "expected_answer",
+            "similarity_rating",
+            "similarity_score",
+            "justification",
+        ]
+        # Built once from whole columns rather than row by row.
+        eval_df = pd.DataFrame(
+            {column: [result[column] for result in results] for column in columns}
         )
-        # print(
-        #     dedent(
-        #         f"""
-        #         Question: {question}
-        #         Obtained Answer: {response}
-        #         Expected Answer: {expected_output}
-        #         Judge: {EVAL_RATINGS[output['similarity_rating']]}/4 - {output['justification']}
-        #         """
-        #     )
-        # )
-        return {
-            "question": question,
-            "obtained_answer": response,
-            "expected_answer": expected_output,
-            "similarity_rating": output["similarity_rating"],
-            "similarity_score": EVAL_RATINGS[output["similarity_rating"]],
-            "justification": output["justification"],
-        }
-    except (json.JSONDecodeError, KeyError) as e:
+        eval_df.to_csv(f"eval/{eval_dataset}.csv", index=False)
+        print(f"{eval_dataset}: {len(results)} questions evaluated")
+    except Exception as e:
         traceback.print_exc()
-        return {
-            "question": question,
-            "obtained_answer": "",
-            "expected_answer": expected_output,
-            "similarity_rating": "Error",
-            "similarity_score": 0,
-            "justification": f"Error processing question: {str(e)}",
-        }
+        print(f"An error occurred: {e}")
+
+
+def print_statistics(
+    cache: EvaluationCache, parser: JudgementParser, prejudge: PreJudge | None
+) -> None:
+    """
+    Prints the model calls saved by the cache and the pre-judge, and how the
+    judge outputs parsed.
+
+    :param cache: The cache of the answers and judgements.
+    :type cache: EvaluationCache
+    :param parser: The parser of the judge outputs.
+    :type parser: JudgementParser
+    :param prejudge: The pre-judge rating the clear-cut answers, if any.
+    :type prejudge: PreJudge | None
+    """
+    print(
+        f"Cache: {cache.answer_hits}/{cache.answer_hits + cache.answer_misses} "
+        f"answers and {cache.judgement_hits}/"
+        f"{cache.judgement_hits + cache.judgement_misses} judgements reused, "
+        f"{cache.answer_hits + cache.judgement_hits} model calls saved"
+    )
+    # Scaled to 10k responses, to compare runs of any size.
+    per_10k = 10000 / max(parser.parsed, 1)
+    print(
+        f"Judge outputs: {parser.parsed} parsed, {parser.repaired} repaired, "
+        f"{parser.retried} retried, {parser.failed} still malformed once "
+        f"retried; per 10k responses {parser.malformed * per_10k:.0f} malformed, "
+        f"{parser.parse_time * per_10k * 1000:.1f}ms parsing"
+    )
+    if prejudge is not None:
+        print(
+            f"Pre-judge: {prejudge.decided} answers rated without the judge, "
+            f"{prejudge.escalated} escalated; judge agreement on "
+            f"{prejudge.audited} audited: "
+            f"{prejudge.agreed / max(prejudge.audited, 1):.0%} exact, "
+            f"{prejudge.agreed_within_one / max(prejudge.audited, 1):.0%} "
+            f"within one rating"
+        )
+
+
+async def evaluate_datasets(
+    datasets: dict[str, list[dict]],
+    EVAL_RATINGS: dict,
+    DEFAULT_MODEL: str,
+    JUDGE_MODEL: str,
+    ANSWER_CONCURRENCY: int,
+    JUDGE_CONCURRENCY: int,
+    RATE_LIMITS: dict[str, float],
+    MAX_RETRIES: int,
+    store: ResultStore,
+    cache: EvaluationCache,
+    parser: JudgementParser,
+    prejudge: PreJudge | None,
+    sampler: SequentialSampler | None,
+) -> None:
+    """
+    Evaluates every dataset through one answer/judge pipeline shared by all
+    datasets, skipping the rows already in the result store, and saves the
+    results of each dataset to the 'eval' folder as soon as it is complete.
+    With a sampler, only the rows it draws are evaluated, round by round
+    until it stops, and the results are saved at the end.
+
+    :param datasets: The rows of each dataset.
+    :type datasets: dict[str, list[dict]]
+    :param EVAL_RATINGS: The evaluation ratings to use for the questions.
+    :type EVAL_RATINGS: dict
+    :param DEFAULT_MODEL: The model ID of the default agent.
+    :type DEFAULT_MODEL: str
+    :param JUDGE_MODEL: The model ID of the judge agent.
+    :type JUDGE_MODEL: str
+    :param ANSWER_CONCURRENCY: Number of default agent requests in flight.
+    :type ANSWER_CONCURRENCY: int
+    :param JUDGE_CONCURRENCY: Number of judge agent requests in flight.
+    :type JUDGE_CONCURRENCY: int
+    :param RATE_LIMITS: Maximum requests per minute of each model ID.
+    :type RATE_LIMITS: dict[str, float]
+    :param MAX_RETRIES: Number of retries of a failed agent request.
+    :type MAX_RETRIES: int
+    :param store: The result store, shared by the runs.
+    :type store: ResultStore
+    :param cache: The cache of the answers and judgements, shared by the runs.
+    :type cache: EvaluationCache
+    :param parser: The parser of the judge outputs.
+    :type parser: JudgementParser
+    :param prejudge: The pre-judge rating the clear-cut answers, or None to judge them all.
+    :type prejudge: PreJudge | None
+    :param sampler: The sampler drawing the rows to evaluate, or None to evaluate them all.
+    :type sampler: SequentialSampler | None
+    """
+    engine = EvaluationEngine(
+        ANSWER_CONCURRENCY + JUDGE_CONCURRENCY, RATE_LIMITS, MAX_RETRIES
+    )
+    async with httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=ANSWER_CONCURRENCY + JUDGE_CONCURRENCY),
+        timeout=httpx.Timeout(600, connect=10),
+    ) as http_client:
+        pipeline = EvaluationPipeline(
+            engine,
+            functools.partial(
+                create_agent,
+                "Default Agent",
+                DEFAULT_MODEL,
+                DEFAULT_PROMPT,
+                http_client,
+            ),
+            functools.partial(
+                create_agent,
+                "Judge Agent",
+                JUDGE_MODEL,
+                JUDGE_PROMPT,
+                http_client,
+                {"response_format": parser.response_format},
+            ),
+            EVAL_RATINGS,
+            ANSWER_CONCURRENCY,
+            JUDGE_CONCURRENCY,
+            store,
+            cache,
+            parser,
+            prejudge,
+        )
+        if sampler is None:
+            await pipeline.run(datasets, save_dataset)
+        else:
+            while (stop_reason := sampler.stop_reason()) is None:
+                await pipeline.run(sampler.next_round(), sampler.update)
+            for eval_dataset, results in sampler.results.items():
+                save_dataset(eval_dataset, results)
+
+    rows = sum(len(rows) for rows in datasets.values())
+    if sampler is not None:
+        print(f"Sampling stopped: {stop_reason}")
+        for eval_dataset, summary in sampler.summary().items():
+            if summary["interval"] is None:
+                print(f"{eval_dataset}: 0/{summary['rows']} rows evaluated")
+                continue
+            low, high = summary["interval"]
+            print(
+                f"{eval_dataset}: {summary['evaluated']}/{summary['rows']} rows "
+                f"evaluated, mean score {summary['mean']:.2f} "
+                f"[{low:.2f}, {high:.2f}]"
+            )
+        evaluated = sum(len(results) for results in sampler.results.values())
+        print(f"{evaluated}/{rows} rows evaluated ({evaluated / max(rows, 1):.0%})")
+        if sampler.baseline_file and not sampler.baseline:
+            if sampler.intervals_narrow():
+                sampler.save_baseline()
+                print(f"Mean scores saved as the baseline to {sampler.baseline_file}")
+            else:
+                print(
+                    f"No baseline saved: some confidence intervals are wider "
+                    f"than {sampler.ci_width}"
+                )
+        rows = evaluated
+    print(f"{pipeline.resumed}/{rows} questions already evaluated by previous runs")
+    print(
+        f"{rows - pipeline.resumed} questions in {pipeline.elapsed:.1f}s "
+        f"({(rows - pipeline.resumed) / max(pipeline.elapsed, 1e-9):.1f} "
+        f"questions/s): answers done at "
+        f"{pipeline.answered_at:.1f}s, request time {pipeline.answer_time:.1f}s "
+        f"answering and {pipeline.judge_time:.1f}s judging"
+    )
+    print(
+        f"{engine.requests} requests, {engine.retried} retried, "
+        f"{engine.failed} failed"
+    )
+    print_statistics(cache, parser, prejudge)
+
+
+async def evaluate_batches(
+    datasets: dict[str, list[dict]],
+    EVAL_RATINGS: dict,
+    DEFAULT_MODEL: str,
+    JUDGE_MODEL: str,
+    BATCH_DIRECTORY: str,
+    BATCH_POLL_INTERVAL: float,
+    store: ResultStore,
+    cache: EvaluationCache,
+    parser: JudgementParser,
+    prejudge: PreJudge | None,
+) -> None:
+    """
+    Evaluates every dataset through the OpenAI Batch API, skipping the rows
+    already in the result store, and saves the results of each dataset to the
+    'eval' folder once the batches are complete.
+
+    :param datasets: The rows of each dataset.
+    :type datasets: dict[str, list[dict]]
+    :param EVAL_RATINGS: The evaluation ratings to use for the questions.
+    :type EVAL_RATINGS: dict
+    :param DEFAULT_MODEL: The model ID of the default agent.
+    :type DEFAULT_MODEL: str
+    :param JUDGE_MODEL: The model ID of the judge agent.
+    :type JUDGE_MODEL: str
+    :param BATCH_DIRECTORY: Folder of the batch files.
+    :type BATCH_DIRECTORY: str
+    :param BATCH_POLL_INTERVAL: Seconds between two status checks of a batch.
+    :type BATCH_POLL_INTERVAL: float
+    :param store: The result store, shared by the runs.
+    :type store: ResultStore
+    :param cache: The cache of the answers and judgements, shared by the runs.
+    :type cache: EvaluationCache
+    :param parser: The parser of the judge outputs.
+    :type parser: JudgementParser
+    :param prejudge: The pre-judge rating the clear-cut answers, or None to judge them all.
+    :type prejudge: PreJudge | None
+    """
+    async with AsyncOpenAI() as client:
+        batch_client = BatchClient(client, BATCH_DIRECTORY, BATCH_POLL_INTERVAL)
+        evaluation = BatchEvaluation(
+            batch_client,
+            DEFAULT_MODEL,
+            DEFAULT_PROMPT,
+            JUDGE_MODEL,
+            JUDGE_PROMPT,
+            EVAL_RATINGS,
+            store,
+            cache,
+            parser,
+            prejudge,
+        )
+        for eval_dataset, results in (await evaluation.run(datasets)).items():
+            save_dataset(eval_dataset, results)
+
+    rows = sum(len(rows) for rows in datasets.values())
+    print(f"{evaluation.resumed}/{rows} questions already evaluated by previous runs")
+    print(
+        f"{batch_client.batches} batches submitted, "
+        f"{batch_client.resumed} resumed from previous runs"
+    )
+    print_statistics(cache, parser, prejudge)
 
 
 def main() -> None:
@@ -90,58 +381,115 @@ def main() -> None:
         "Highly Similar": 3,
         "Identical / Semantically Equivalent": 4,
     }
+    DEFAULT_MODEL = "gpt-4o-mini"
+    JUDGE_MODEL = "o4-mini"
+    # Requests in flight and requests per minute of each model: raise them up
+    # to the API quota of the account.
+    ANSWER_CONCURRENCY = 16
+    JUDGE_CONCURRENCY = 16
+    RATE_LIMITS = {DEFAULT_MODEL: 500, JUDGE_MODEL: 500}
+    MAX_RETRIES = 3
+    # Completed rows are skipped by later runs; failed ones are retried.
+    STORE_FILE = "eval/results.jsonl"
+    # Answers and judgements are reused until their own prompt or model changes.
+    CACHE_FILE = "eval/cache.db"
+    # Submit the requests to the OpenAI Batch API instead: cheaper, but the
+    # batches may take up to 24 hours. An interrupted run resumes waiting for
+    # the batches it submitted.
+    BATCH_MODE = False
+    BATCH_DIRECTORY = "eval/batches"
+    BATCH_POLL_INTERVAL = 60
+    # Evaluate only a stratified random sample of the rows instead, drawn round
+    # by round until the confidence interval of the mean score of every dataset
+    # is narrower than SAMPLE_CI_WIDTH, or one is below its baseline mean by
+    # more than REGRESSION_MARGIN. The first sampled run whose intervals are
+    # that narrow saves the baseline; delete BASELINE_FILE to save a new one.
+    SEQUENTIAL = False
+    SAMPLE_ROUND_ROWS = 64
+    SAMPLE_CI_WIDTH = 0.3
+    BASELINE_FILE = "eval/baseline.json"
+    REGRESSION_MARGIN = 0.1
+    # Set PREJUDGE to True to rate the answers at least this similar to the
+    # expected output identical, and at most this similar totally different,
+    # without the judge. It changes the scores, so it is off by default. A share
+    # of them is still judged to check the thresholds against the judge.
+    PREJUDGE = False
+    PREJUDGE_IDENTICAL_THRESHOLD = 0.9
+    PREJUDGE_DIFFERENT_THRESHOLD = 0.05
+    PREJUDGE_AUDIT_RATE = 0.1
+    # Local sentence-transformers model, e.g. "all-MiniLM-L6-v2", if installed.
+    EMBEDDING_MODEL = None
 
     os.makedirs("eval", exist_ok=True)
+    store = ResultStore(STORE_FILE)
+    cache = EvaluationCache(
+        CACHE_FILE, DEFAULT_MODEL, DEFAULT_PROMPT, JUDGE_MODEL, JUDGE_PROMPT
+    )
+    parser = JudgementParser(EVAL_RATINGS)
+    prejudge = (
+        PreJudge(
+            EVAL_RATINGS,
+            PREJUDGE_IDENTICAL_THRESHOLD,
+            PREJUDGE_DIFFERENT_THRESHOLD,
+            PREJUDGE_AUDIT_RATE,
+            EMBEDDING_MODEL,
+        )
+        if PREJUDGE
+        else None
+    )
 
     eval_datasets = [
         "basic_questions",
         "domain_specific_questions",
         "adversarial_questions",
     ]
-    for eval_dataset in eval_datasets:
-        try:
-            csv_file_path = f"data/{eval_dataset}.csv"
-            eval_file_path = f"eval/{eval_dataset}.csv"
-            df = pd.read_csv(csv_file_path)
-
-            questions, expected_outputs = df["input"], df["expected_output"]
-
-            default_agent = Agent(
-                name="Default Agent",
-                model=OpenAIChat(id="gpt-4o-mini", system_prompt=DEFAULT_PROMPT),
-            )
-
-            judge_agent = Agent(
-                name="Judge Agent",
-                model=OpenAIChat(id="o4-mini", system_prompt=JUDGE_PROMPT),
+    datasets = load_datasets(eval_datasets, DEFAULT_MODEL, JUDGE_MODEL, prejudge)
+    if BATCH_MODE:
+        asyncio.run(
+            evaluate_batches(
+                datasets,
+                EVAL_RATINGS,
+                DEFAULT_MODEL,
+                JUDGE_MODEL,
+                BATCH_DIRECTORY,
+                BATCH_POLL_INTERVAL,
+                store,
+                cache,
+                parser,
+                prejudge,
             )
-
-            eval_df = pd.DataFrame(
-                columns=[
-                    "question",
-                    "obtained_answer",
-                    "expected_answer",
-                    "similarity_rating",
-                    "similarity_score",
-                    "justification",
-                ]
+        )
+    else:
+        sampler = (
+            SequentialSampler(
+                datasets,
+                SAMPLE_ROUND_ROWS,
+                SAMPLE_CI_WIDTH,
+                baseline_file=BASELINE_FILE,
+                regression_margin=REGRESSION_MARGIN,
             )
-
-            results = Parallel(n_jobs=3)(
-                delayed(process_question_pair)(
-                    question, expected_output, default_agent, judge_agent, EVAL_RATINGS
-                )
-                for question, expected_output in zip(questions, expected_outputs)
+            if SEQUENTIAL
+            else None
+        )
+        asyncio.run(
+            evaluate_datasets(
+                datasets,
+                EVAL_RATINGS,
+                DEFAULT_MODEL,
+                JUDGE_MODEL,
+                ANSWER_CONCURRENCY,
+                JUDGE_CONCURRENCY,
+                RATE_LIMITS,
+                MAX_RETRIES,
+                store,
+                cache,
+                parser,
+                prejudge,
+                sampler,
             )
-
-            for result in results:
-                new_row = pd.DataFrame([result])
-                eval_df = pd.concat([eval_df, new_row], ignore_index=True)
-            eval_df.to_csv(eval_file_path, index=False)
-
-        except Exception as e:
-            traceback.print_exc()
-            print(f"An error occurred: {e}")
+        )
+    store.close()
+    cache.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,341 @@
+from agno.agent import Agent
+from typing import Callable
+from textwrap import dedent
+import traceback
+import asyncio
+import time
+
+from judgement import JudgementParser, JudgementError
+from engine import EvaluationEngine
+from cache import EvaluationCache
+from prejudge import PreJudge
+from store import ResultStore
+
+
+def judge_message(answer: str, expected_output: str) -> str:
+    """
+    Builds the message asking the judge agent to score an answer.
+
+    :param answer: The answer of the default agent.
+    :type answer: str
+    :param expected_output: The expected answer.
+    :type expected_output: str
+    :return: The message.
+    :rtype: str
+    """
+    return dedent(
+        f"""
+            Obtained Answer: {answer}
+            Expected Answer: {expected_output}
+            """
+    )
+
+
+def make_result(
+    row: dict, answer: str, rating: str, score: int, justification: str
+) -> dict:
+    """
+    Builds the evaluation result of a row.
+
+    :param row: The dataset row.
+    :type row: dict
+    :param answer: The answer of the default agent.
+    :type answer: str
+    :param rating: The similarity rating.
+    :type rating: str
+    :param score: The similarity score of the rating.
+    :type score: int
+    :param justification: The justification of the rating.
+    :type justification: str
+    :return: Dictionary containing evaluation results.
+    :rtype: dict
+    """
+    return {
+        "question": row["question"],
+        "obtained_answer": answer,
+        "expected_answer": row["expected_output"],
+        "similarity_rating": rating,
+        "similarity_score": score,
+        "justification": justification,
+    }
+
+
+def error_result(row: dict, answer: str, error: Exception) -> dict:
+    """
+    Builds the result of a row that could not be evaluated.
+
+    :param row: The dataset row.
+    :type row: dict
+    :param answer: The answer obtained, if any.
+    :type answer: str
+    :param error: The error that stopped the evaluation.
+    :type error: Exception
+    :return: Dictionary containing evaluation results.
+    :rtype: dict
+    """
+    return make_result(
+        row, answer, "Error", 0, f"Error processing question: {str(error)}"
+    )
+
+
+class EvaluationPipeline:
+    """
+    Two-stage producer/consumer evaluation: answer workers run the default
+    agent and put each answer in the judge queue as soon as it completes, where
+    judge workers score it. The rows of every dataset share the same workers,
+    so judging overlaps answering instead of following it batch by batch.
+    Every result is appended to the result store as soon as it is known, and
+    the rows it already holds are not evaluated again. Answers and judgements
+    found in the cache skip their model call, and so do the clear-cut answers
+    the pre-judge rates.
+    """
+
+    def __init__(
+        self,
+        engine: EvaluationEngine,
+        create_default_agent: Callable[[], Agent],
+        create_judge_agent: Callable[[], Agent],
+        EVAL_RATINGS: dict,
+        answer_concurrency: int,
+        judge_concurrency: int,
+        store: ResultStore,
+        cache: EvaluationCache,
+        parser: JudgementParser,
+        prejudge: PreJudge | None = None,
+    ) -> None:
+        """
+        Initializes the pipeline.
+
+        :param engine: The engine running the agent requests.
+        :type engine: EvaluationEngine
+        :param create_default_agent: Creates the default agent answering the questions.
+        :type create_default_agent: Callable[[], Agent]
+        :param create_judge_agent: Creates the judge agent scoring the answers.
+        :type create_judge_agent: Callable[[], Agent]
+        :param EVAL_RATINGS: The evaluation ratings to use for the questions.
+        :type EVAL_RATINGS: dict
+        :param answer_concurrency: Number of answer workers.
+        :type answer_concurrency: int
+        :param judge_concurrency: Number of judge workers.
+        :type judge_concurrency: int
+        :param store: The result store of the completed rows.
+        :type store: ResultStore
+        :param cache: The cache of the answers and judgements.
+        :type cache: EvaluationCache
+        :param parser: The parser of the judge outputs.
+        :type parser: JudgementParser
+        :param prejudge: The pre-judge rating the clear-cut answers, if any.
+        :type prejudge: PreJudge | None
+        """
+        self.engine = engine
+        self.create_default_agent = create_default_agent
+        self.create_judge_agent = create_judge_agent
+        self.EVAL_RATINGS = EVAL_RATINGS
+        self.answer_concurrency = answer_concurrency
+        self.judge_concurrency = judge_concurrency
+        self.store = store
+        self.cache = cache
+        self.parser = parser
+        self.prejudge = prejudge
+
+        self.answer_queue: asyncio.Queue = asyncio.Queue()
+        self.judge_queue: asyncio.Queue = asyncio.Queue()
+        self.results: dict[str, list[dict | None]] = {}
+        self.remaining: dict[str, int] = {}
+        self.on_dataset_done: Callable[[str, list[dict]], None] | None = None
+
+        self.resumed = 0
+        self.answer_time = 0.0
+        self.judge_time = 0.0
+        self.answered_at = 0.0
+        self.elapsed = 0.0
+
+    async def ask_judge(self, row: dict, answer: str) -> dict:
+        """
+        Scores an answer against the expected output with the judge agent,
+        unless the cache holds its judgement.
+
+        :param row: The dataset row.
+        :type row: dict
+        :param answer: The answer of the default agent.
+        :type answer: str
+        :return: Dictionary containing evaluation results.
+        :rtype: dict
+        :raises JudgementError: If the judge output is malformed twice in a row.
+        :raises ModelProviderError: If the judge request fails after every retry.
+        """
+        output = self.cache.get_judgement(answer, row["expected_output"])
+        cached = output is not None
+        if not cached:
+            message = judge_message(answer, row["expected_output"])
+            try:
+                output = self.parser.parse(
+                    await self.engine.run(self.create_judge_agent, message)
+                )
+            except JudgementError:
+                # Ask once more rather than scoring the row as an error.
+                self.parser.retried += 1
+                try:
+                    output = self.parser.parse(
+                        await self.engine.run(self.create_judge_agent, message)
+                    )
+                except JudgementError:
+                    self.parser.failed += 1
+                    raise
+        result = make_result(
+            row,
+            answer,
+            output["similarity_rating"],
+            self.EVAL_RATINGS[output["similarity_rating"]],
+            output["justification"],
+        )
+        if not cached:
+            self.cache.put_judgement(
+                answer,
+                row["expected_output"],
+                {
+                    "similarity_rating": result["similarity_rating"],
+                    "justification": result["justification"],
+                },
+            )
+        return result
+
+    async def judge(self, row: dict, answer: str) -> dict:
+        """
+        Scores an answer against the expected output, with the pre-judge when
+        it is a clear-cut case and with the judge agent otherwise. A clear-cut
+        case drawn for audit keeps its pre-judge rating if the judge fails.
+
+        :param row: The dataset row.
+        :type row: dict
+        :param answer: The answer of the default agent.
+        :type answer: str
+        :return: Dictionary containing evaluation results.
+        :rtype: dict
+        :raises JudgementError: If the judge output is malformed twice in a row.
+        :raises ModelProviderError: If the judge request fails after every retry.
+        """
+        rating = None
+        if self.prejudge is not None:
+            rating, metrics = self.prejudge.rate(answer, row["expected_output"])
+            if rating is not None:
+                prejudged = make_result(
+                    row,
+                    answer,
+                    rating,
+                    self.EVAL_RATINGS[rating],
+                    self.prejudge.justification(metrics),
+                )
+                if not self.prejudge.should_audit():
+                    return prejudged
+
+        try:
+            result = await self.ask_judge(row, answer)
+        except Exception:
+            if rating is None:
+                raise
+            # The audit only checks the thresholds; it must not fail the row.
+            traceback.print_exc()
+            return prejudged
+        if rating is not None:
+            self.prejudge.record_audit(rating, result["similarity_rating"])
+        return result
+
+    def record(self, row: dict, result: dict) -> None:
+        """
+        Stores the result of a row and reports its dataset once complete.
+
+        :param row: The dataset row.
+        :type row: dict
+        :param result: The evaluation result of the row.
+        :type result: dict
+        """
+        dataset = row["dataset"]
+        self.store.append(
+            row["key"], dataset, result, result["similarity_rating"] == "Error"
+        )
+        self.results[dataset][row["index"]] = result
+        self.remaining[dataset] -= 1
+        if self.remaining[dataset] == 0 and self.on_dataset_done:
+            self.on_dataset_done(dataset, self.results.pop(dataset))
+
+    async def answer_worker(self) -> None:
+        """
+        Answers the questions of the answer queue until it is empty.
+        """
+        while not self.answer_queue.empty():
+            row = self.answer_queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                answer = self.cache.get_answer(row["question"])
+                if answer is None:
+                    answer = await self.engine.run(
+                        self.create_default_agent, row["question"]
+                    )
+                    self.cache.put_answer(row["question"], answer)
+                self.judge_queue.put_nowait((row, answer))
+            except Exception as e:
+                traceback.print_exc()
+                self.record(row, error_result(row, "", e))
+            finally:
+                self.answer_time += time.perf_counter() - started
+
+    async def judge_worker(self) -> None:
+        """
+        Scores the answers of the judge queue until it receives None.
+        """
+        while (item := await self.judge_queue.get()) is not None:
+            row, answer = item
+            started = time.perf_counter()
+            try:
+                result = await self.judge(row, answer)
+            except Exception as e:
+                traceback.print_exc()
+                result = error_result(row, answer, e)
+            finally:
+                self.judge_time += time.perf_counter() - started
+            self.record(row, result)
+
+    async def run(
+        self,
+        datasets: dict[str, list[dict]],
+        on_dataset_done: Callable[[str, list[dict]], None],
+    ) -> None:
+        """
+        Evaluates the rows of every dataset.
+
+        :param datasets: The rows of each dataset, with 'key', 'question' and 'expected_output' keys.
+        :type datasets: dict[str, list[dict]]
+        :param on_dataset_done: Called with the name and the results of each dataset once all its rows are evaluated.
+        :type on_dataset_done: Callable[[str, list[dict]], None]
+        """
+        started = time.perf_counter()
+        self.on_dataset_done = on_dataset_done
+        for dataset, rows in datasets.items():
+            self.results[dataset] = [None] * len(rows)
+            self.remaining[dataset] = len(rows)
+            for index, row in enumerate(rows):
+                result = self.store.get(row["key"])
+                if result is None:
+                    self.answer_queue.put_nowait(
+                        {**row, "dataset": dataset, "index": index}
+                    )
+                else:
+                    self.results[dataset][index] = result
+                    self.remaining[dataset] -= 1
+                    self.resumed += 1
+            if self.remaining[dataset] == 0:
+                on_dataset_done(dataset, self.results.pop(dataset))
+
+        judge_workers = [
+            asyncio.create_task(self.judge_worker())
+            for _ in range(self.judge_concurrency)
+        ]
+        await asyncio.gather(
+            *(self.answer_worker() for _ in range(self.answer_concurrency))
+        )
+        self.answered_at += time.perf_counter() - started
+        for _ in judge_workers:
+            self.judge_queue.put_nowait(None)
+        await asyncio.gather(*judge_workers)
+        self.elapsed += time.perf_counter() - started
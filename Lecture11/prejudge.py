@@ -0,0 +1,222 @@
+from collections import Counter
+import importlib.util
+import unicodedata
+import random
+import math
+import re
+
+
+def normalize(text: str) -> str:
+    """
+    Normalizes a text for comparison: lowercased, without accents, punctuation
+    or repeated whitespace.
+
+    :param text: The text.
+    :type text: str
+    :return: The normalized text.
+    :rtype: str
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def token_f1(answer: str, expected: str) -> float:
+    """
+    Computes the F1 score of the tokens shared by two normalized texts.
+
+    :param answer: The normalized answer.
+    :type answer: str
+    :param expected: The normalized expected answer.
+    :type expected: str
+    :return: The F1 score, from 0 to 1.
+    :rtype: float
+    """
+    answer_tokens, expected_tokens = Counter(answer.split()), Counter(expected.split())
+    overlap = sum((answer_tokens & expected_tokens).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(answer_tokens.values())
+    recall = overlap / sum(expected_tokens.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def chrf(answer: str, expected: str, max_n: int = 6, beta: float = 2.0) -> float:
+    """
+    Computes the chrF score of two normalized texts: the F-score of their
+    character n-grams, averaged over n = 1..max_n, weighting recall `beta`
+    times as much as precision.
+
+    :param answer: The normalized answer.
+    :type answer: str
+    :param expected: The normalized expected answer.
+    :type expected: str
+    :param max_n: Longest character n-gram.
+    :type max_n: int
+    :param beta: Weight of the recall against the precision.
+    :type beta: float
+    :return: The chrF score, from 0 to 1.
+    :rtype: float
+    """
+    answer, expected = answer.replace(" ", ""), expected.replace(" ", "")
+    precisions, recalls = [], []
+    for n in range(1, max_n + 1):
+        answer_ngrams = Counter(answer[i : i + n] for i in range(len(answer) - n + 1))
+        expected_ngrams = Counter(
+            expected[i : i + n] for i in range(len(expected) - n + 1)
+        )
+        if not answer_ngrams or not expected_ngrams:
+            continue
+        overlap = sum((answer_ngrams & expected_ngrams).values())
+        precisions.append(overlap / sum(answer_ngrams.values()))
+        recalls.append(overlap / sum(expected_ngrams.values()))
+    if not precisions:
+        return 0.0
+    precision = sum(precisions) / len(precisions)
+    recall = sum(recalls) / len(recalls)
+    if not precision + recall:
+        return 0.0
+    return (1 + beta**2) * precision * recall / (beta**2 * precision + recall)
+
+
+class PreJudge:
+    """
+    Cheap first scoring tier: local similarity metrics between the answer and
+    the expected output rate the clear-cut cases without the judge agent, and
+    only the ambiguous ones are escalated. A random share of the decided cases
+    is still sent to the judge to measure how often both agree.
+    """
+
+    def __init__(
+        self,
+        EVAL_RATINGS: dict,
+        identical_threshold: float,
+        different_threshold: float,
+        audit_rate: float,
+        embedding_model: str | None = None,
+    ) -> None:
+        """
+        Initializes the pre-judge.
+
+        :param EVAL_RATINGS: The evaluation ratings, from which the lowest and highest are used.
+        :type EVAL_RATINGS: dict
+        :param identical_threshold: Similarity from which an answer gets the highest rating.
+        :type identical_threshold: float
+        :param different_threshold: Similarity up to which an answer gets the lowest rating.
+        :type different_threshold: float
+        :param audit_rate: Share of the decided cases also sent to the judge, from 0 to 1.
+        :type audit_rate: float
+        :param embedding_model: Name of a local sentence-transformers model adding an embedding cosine to the metrics, if installed.
+        :type embedding_model: str | None
+        """
+        self.EVAL_RATINGS = EVAL_RATINGS
+        self.highest_rating = max(EVAL_RATINGS, key=EVAL_RATINGS.get)
+        self.lowest_rating = min(EVAL_RATINGS, key=EVAL_RATINGS.get)
+        self.identical_threshold = identical_threshold
+        self.different_threshold = different_threshold
+        self.audit_rate = audit_rate
+        self.embedding_model = embedding_model
+
+        self.embedder = None
+        if embedding_model:
+            if importlib.util.find_spec("sentence_transformers") is None:
+                print("sentence-transformers is not installed, embeddings disabled")
+            else:
+                from sentence_transformers import SentenceTransformer
+
+                self.embedder = SentenceTransformer(embedding_model)
+
+        self.decided = 0
+        self.escalated = 0
+        self.audited = 0
+        self.agreed = 0
+        self.agreed_within_one = 0
+
+    def score(self, answer: str, expected: str) -> dict:
+        """
+        Computes the similarity metrics of an answer.
+
+        :param answer: The answer of the default agent.
+        :type answer: str
+        :param expected: The expected answer.
+        :type expected: str
+        :return: The metrics and their mean, 'similarity'.
+        :rtype: dict
+        """
+        answer, expected = normalize(answer), normalize(expected)
+        metrics = {
+            "exact_match": float(answer == expected),
+            "token_f1": token_f1(answer, expected),
+            "chrf": chrf(answer, expected),
+        }
+        if self.embedder is not None:
+            a, b = self.embedder.encode([answer, expected])
+            norm = math.sqrt(float(a @ a) * float(b @ b))
+            metrics["cosine"] = float(a @ b) / norm if norm else 0.0
+        metrics["similarity"] = (
+            1.0
+            if metrics["exact_match"]
+            else sum(value for name, value in metrics.items() if name != "exact_match")
+            / (len(metrics) - 1)
+        )
+        return metrics
+
+    def rate(self, answer: str, expected: str) -> tuple[str | None, dict]:
+        """
+        Rates an answer if it is a clear-cut case.
+
+        :param answer: The answer of the default agent.
+        :type answer: str
+        :param expected: The expected answer.
+        :type expected: str
+        :return: The rating, or None if the judge must decide, and the metrics.
+        :rtype: tuple[str | None, dict]
+        """
+        metrics = self.score(answer, expected)
+        if metrics["similarity"] >= self.identical_threshold:
+            rating = self.highest_rating
+        elif metrics["similarity"] <= self.different_threshold:
+            rating = self.lowest_rating
+        else:
+            rating = None
+        if rating is None:
+            self.escalated += 1
+        else:
+            self.decided += 1
+        return rating, metrics
+
+    def justification(self, metrics: dict) -> str:
+        """
+        Builds the justification of a rating given without the judge.
+
+        :param metrics: The similarity metrics of the answer.
+        :type metrics: dict
+        :return: The justification.
+        :rtype: str
+        """
+        return "Rated without the judge: " + ", ".join(
+            f"{name} {value:.2f}" for name, value in metrics.items()
+        )
+
+    def should_audit(self) -> bool:
+        """
+        Draws whether a decided case is also sent to the judge.
+
+        :return: True if the case should be audited.
+        :rtype: bool
+        """
+        return random.random() < self.audit_rate
+
+    def record_audit(self, rating: str, judge_rating: str) -> None:
+        """
+        Records how the rating of an audited case compares to the judge's.
+
+        :param rating: The pre-judge rating.
+        :type rating: str
+        :param judge_rating: The judge rating.
+        :type judge_rating: str
+        """
+        self.audited += 1
+        distance = abs(self.EVAL_RATINGS[rating] - self.EVAL_RATINGS[judge_rating])
+        self.agreed += distance == 0
+        self.agreed_within_one += distance <= 1
@@ -0,0 +1,213 @@
+import statistics
+import random
+import json
+import os
+
+
+def bootstrap_ci(
+    scores: list[float], confidence: float, resamples: int, rng: random.Random
+) -> tuple[float, float]:
+    """
+    Computes the percentile bootstrap confidence interval of a mean.
+
+    :param scores: The scores.
+    :type scores: list[float]
+    :param confidence: The confidence level, from 0 to 1.
+    :type confidence: float
+    :param resamples: Number of bootstrap resamples.
+    :type resamples: int
+    :param rng: The random number generator.
+    :type rng: random.Random
+    :return: The lower and upper bounds of the interval.
+    :rtype: tuple[float, float]
+    """
+    means = sorted(
+        statistics.fmean(rng.choices(scores, k=len(scores))) for _ in range(resamples)
+    )
+    tail = (1 - confidence) / 2
+    return (
+        means[int(tail * (resamples - 1))],
+        means[int((1 - tail) * (resamples - 1))],
+    )
+
+
+class SequentialSampler:
+    """
+    Sequential evaluation of a random sample of the datasets: rows are drawn in
+    rounds, stratified by dataset in proportion to its size, and the bootstrap
+    confidence interval of the mean score of each dataset is updated after
+    every round. Sampling stops once every interval is narrow enough, once a
+    dataset is significantly below its baseline mean, or once every row is
+    evaluated.
+    """
+
+    def __init__(
+        self,
+        datasets: dict[str, list[dict]],
+        round_rows: int,
+        ci_width: float,
+        confidence: float = 0.95,
+        min_rows: int = 30,
+        baseline_file: str | None = None,
+        regression_margin: float = 0.0,
+        resamples: int = 1000,
+        seed: int = 0,
+    ) -> None:
+        """
+        Initializes the sampler, shuffling the rows of every dataset.
+
+        :param datasets: The rows of each dataset.
+        :type datasets: dict[str, list[dict]]
+        :param round_rows: Number of rows drawn per round, over all datasets.
+        :type round_rows: int
+        :param ci_width: Width of the confidence intervals under which sampling stops.
+        :type ci_width: float
+        :param confidence: The confidence level of the intervals, from 0 to 1.
+        :type confidence: float
+        :param min_rows: Number of scores of a dataset before its interval is trusted.
+        :type min_rows: int
+        :param baseline_file: Path of the JSON file of the baseline mean score of each dataset, if any.
+        :type baseline_file: str | None
+        :param regression_margin: Drop of the mean score below the baseline tolerated before it is a regression.
+        :type regression_margin: float
+        :param resamples: Number of bootstrap resamples.
+        :type resamples: int
+        :param seed: Seed of the sample, so successive runs draw the same rows.
+        :type seed: int
+        """
+        self.rng = random.Random(seed)
+        self.datasets = datasets
+        self.round_rows = round_rows
+        self.ci_width = ci_width
+        self.confidence = confidence
+        self.min_rows = min_rows
+        self.regression_margin = regression_margin
+        self.resamples = resamples
+
+        self.remaining = {
+            dataset: self.rng.sample(rows, len(rows))
+            for dataset, rows in datasets.items()
+        }
+        self.results: dict[str, list[dict]] = {dataset: [] for dataset in datasets}
+        self.scores: dict[str, list[float]] = {dataset: [] for dataset in datasets}
+        self.intervals: dict[str, tuple[float, float]] = {}
+
+        self.baseline_file = baseline_file
+        self.baseline: dict[str, float] = {}
+        if baseline_file and os.path.exists(baseline_file):
+            with open(baseline_file, encoding="utf-8") as f:
+                self.baseline = json.load(f)
+
+    def next_round(self) -> dict[str, list[dict]]:
+        """
+        Draws the rows of the next round, allocated to the datasets in
+        proportion to their size, with at least one row each.
+
+        :return: The rows drawn from each dataset; empty once every row is drawn.
+        :rtype: dict[str, list[dict]]
+        """
+        total = sum(len(rows) for rows in self.datasets.values())
+        drawn = {}
+        for dataset, rows in self.remaining.items():
+            if not rows:
+                continue
+            share = max(1, round(self.round_rows * len(self.datasets[dataset]) / total))
+            drawn[dataset], self.remaining[dataset] = rows[:share], rows[share:]
+        return drawn
+
+    def update(self, dataset: str, results: list[dict]) -> None:
+        """
+        Adds the results of a round to a dataset and updates its interval.
+
+        :param dataset: The name of the dataset.
+        :type dataset: str
+        :param results: The evaluation results of the rows drawn from the dataset.
+        :type results: list[dict]
+        """
+        self.results[dataset].extend(results)
+        self.scores[dataset].extend(
+            result["similarity_score"]
+            for result in results
+            if result["similarity_rating"] != "Error"
+        )
+        if self.scores[dataset]:
+            self.intervals[dataset] = bootstrap_ci(
+                self.scores[dataset], self.confidence, self.resamples, self.rng
+            )
+
+    def intervals_narrow(self) -> bool:
+        """
+        Checks whether the interval of every dataset is narrow enough, from
+        enough scores, for its mean score to be trusted.
+
+        :return: True if every interval is narrower than `ci_width`.
+        :rtype: bool
+        """
+        return all(
+            len(self.scores[dataset]) >= self.min_rows
+            and dataset in self.intervals
+            and self.intervals[dataset][1] - self.intervals[dataset][0] <= self.ci_width
+            for dataset in self.datasets
+        )
+
+    def stop_reason(self) -> str | None:
+        """
+        Checks whether sampling can stop.
+
+        :return: Why sampling stops, or None if it goes on.
+        :rtype: str | None
+        """
+        for dataset, (low, high) in self.intervals.items():
+            if (
+                dataset in self.baseline
+                and len(self.scores[dataset]) >= self.min_rows
+                and high < self.baseline[dataset] - self.regression_margin
+            ):
+                return (
+                    f"regression on {dataset}: mean score interval "
+                    f"[{low:.2f}, {high:.2f}] below the baseline "
+                    f"{self.baseline[dataset]:.2f}"
+                )
+        if self.intervals_narrow():
+            return f"every confidence interval narrower than {self.ci_width}"
+        if not any(self.remaining.values()):
+            return "every row evaluated"
+        return None
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Summarizes the sample of each dataset.
+
+        :return: The number of rows evaluated and in total, the mean score and its interval, per dataset.
+        :rtype: dict[str, dict]
+        """
+        return {
+            dataset: {
+                "evaluated": len(self.results[dataset]),
+                "rows": len(rows),
+                "mean": (
+                    statistics.fmean(self.scores[dataset])
+                    if self.scores[dataset]
+                    else None
+                ),
+                "interval": self.intervals.get(dataset),
+            }
+            for dataset, rows in self.datasets.items()
+        }
+
+    def save_baseline(self) -> None:
+        """
+        Saves the mean score of each dataset to the baseline file, as the
+        baseline of later runs. Only call it when `intervals_narrow` holds, so
+        the baseline is as precise as the runs compared with it.
+        """
+        with open(self.baseline_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    dataset: statistics.fmean(scores)
+                    for dataset, scores in self.scores.items()
+                    if scores
+                },
+                f,
+                indent=2,
+            )
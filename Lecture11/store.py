@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+
+
+class ResultStore:
+    """
+    Append-only JSONL store of evaluation results, written row by row so an
+    interrupted run resumes where it stopped. Each line records the key, the
+    dataset, whether the row failed and its result; failed rows are not
+    considered complete, so the next run retries them.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens the store, loading the rows completed by previous runs.
+
+        :param path: Path of the JSONL file backing the store.
+        :type path: str
+        """
+        self.completed: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line of a run that was killed mid-write.
+                        continue
+                    if record["failed"]:
+                        self.completed.pop(record["key"], None)
+                    else:
+                        self.completed[record["key"]] = record["result"]
+
+        self.file = open(path, "a", encoding="utf-8")
+        if self.file.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self.file.write("\n")
+
+    @staticmethod
+    def make_key(
+        dataset: str, question: str, expected_output: str, model: str, prompt: str
+    ) -> str:
+        """
+        Builds the key of a row: its result only stays valid for the same
+        question, expected output, models and prompts.
+
+        :param dataset: The name of the dataset.
+        :type dataset: str
+        :param question: The question.
+        :type question: str
+        :param expected_output: The expected answer.
+        :type expected_output: str
+        :param model: The IDs of the models evaluated.
+        :type model: str
+        :param prompt: The system prompts of the agents.
+        :type prompt: str
+        :return: The key.
+        :rtype: str
+        """
+        question_hash = hashlib.sha256(
+            json.dumps([question, expected_output]).encode()
+        ).hexdigest()
+        prompt_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        return f"{dataset}:{question_hash[:16]}:{model}:{prompt_hash[:16]}"
+
+    def get(self, key: str) -> dict | None:
+        """
+        Gets the result of a completed row.
+
+        :param key: The row key.
+        :type key: str
+        :return: The result, or None if the row was never completed.
+        :rtype: dict | None
+        """
+        return self.completed.get(key)
+
+    def append(self, key: str, dataset: str, result: dict, failed: bool) -> None:
+        """
+        Appends the result of a row to the store and flushes it to disk.
+
+        :param key: The row key.
+        :type key: str
+        :param dataset: The name of the dataset.
+        :type dataset: str
+        :param result: The evaluation result of the row.
+        :type result: dict
+        :param failed: Whether the evaluation failed and should be retried.
+        :type failed: bool
+        """
+        record = {"key": key, "dataset": dataset, "failed": failed, "result": result}
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        if not failed:
+            self.completed[key] = result
+
+    def close(self) -> None:
+        """
+        Closes the store file.
+        """
+        self.file.close()
@@ -0,0 +1,43 @@
+from typing import Iterator
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_openai
+
+EVAL_RATINGS = {
+    "Totally Different": 0,
+    "Slightly Similar": 1,
+    "Moderately Similar": 2,
+    "Highly Similar": 3,
+    "Identical / Semantically Equivalent": 4,
+}
+
+
+@pytest.fixture(scope="session")
+def fake_api() -> Iterator[str]:
+    """
+    Local fake of the OpenAI API, used by every OpenAI client of the tests.
+
+    :return: The base URL of the fake API.
+    :rtype: Iterator[str]
+    """
+    with fake_openai.run_fake_openai() as url:
+        os.environ["OPENAI_BASE_URL"] = url
+        os.environ["OPENAI_API_KEY"] = "test"
+        yield url
+
+
+@pytest.fixture(autouse=True)
+def fake_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Fake API without latency or faults, with reproducible draws, for each test.
+
+    :param monkeypatch: Restores the settings after the test.
+    :type monkeypatch: pytest.MonkeyPatch
+    """
+    monkeypatch.setattr(fake_openai, "FAKE_LATENCY", 0.0)
+    monkeypatch.setattr(fake_openai, "FAKE_BATCH_POLLS", 2)
+    fake_openai.rng.seed(0)
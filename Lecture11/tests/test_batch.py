@@ -0,0 +1,123 @@
+from openai import AsyncOpenAI
+import asyncio
+import pytest
+import os
+
+from batch import BatchClient, BatchEvaluation
+from judgement import JudgementParser
+from cache import EvaluationCache
+from conftest import EVAL_RATINGS
+from store import ResultStore
+import fake_openai
+
+ROWS = {
+    "basic": [
+        {
+            "key": f"basic:{index}",
+            "question": f"What is {index} + {index}?",
+            "expected_output": f"{2 * index}",
+        }
+        for index in range(5)
+    ]
+}
+
+
+def evaluate(directory: str) -> tuple[dict[str, list[dict]], BatchEvaluation]:
+    """
+    Evaluates ROWS through the fake Batch API, with the store, cache and batch
+    files in a directory.
+
+    :param directory: Folder of the evaluation files.
+    :type directory: str
+    :return: The results of each dataset, and the evaluation.
+    :rtype: tuple[dict[str, list[dict]], BatchEvaluation]
+    """
+
+    async def run() -> tuple[dict[str, list[dict]], BatchEvaluation]:
+        store = ResultStore(os.path.join(directory, "results.jsonl"))
+        cache = EvaluationCache(
+            os.path.join(directory, "cache.db"), "model", "answer", "judge", "judge"
+        )
+        async with AsyncOpenAI(max_retries=0) as client:
+            evaluation = BatchEvaluation(
+                BatchClient(client, os.path.join(directory, "batches"), 0),
+                "model",
+                "answer",
+                "judge",
+                "judge",
+                EVAL_RATINGS,
+                store,
+                cache,
+                JudgementParser(EVAL_RATINGS),
+            )
+            try:
+                return await evaluation.run(ROWS), evaluation
+            finally:
+                store.close()
+                cache.close()
+
+    return asyncio.run(run())
+
+
+def test_every_row_is_scored(fake_api: str, tmp_path) -> None:
+    results, evaluation = evaluate(str(tmp_path))
+
+    assert len(results["basic"]) == 5
+    assert all(
+        result["similarity_rating"] in EVAL_RATINGS for result in results["basic"]
+    )
+    assert evaluation.batch_client.batches == 2
+
+    results, evaluation = evaluate(str(tmp_path))
+    assert evaluation.resumed == 5
+    assert evaluation.batch_client.batches == 0
+
+
+@pytest.mark.parametrize("fault", ["FAKE_NULL_CONTENT_RATE", "FAKE_BATCH_FAILED_RATE"])
+def test_failed_answers_become_error_rows(
+    fake_api: str, tmp_path, monkeypatch: pytest.MonkeyPatch, fault: str
+) -> None:
+    monkeypatch.setattr(fake_openai, fault, 1.0)
+
+    results, evaluation = evaluate(str(tmp_path))
+
+    assert [result["similarity_rating"] for result in results["basic"]] == ["Error"] * 5
+    assert evaluation.batch_client.batches == 1
+    # Failed rows are retried by the next run.
+    store = ResultStore(str(tmp_path / "results.jsonl"))
+    assert store.completed == {}
+    store.close()
+
+
+def test_malformed_judgements_are_asked_again(
+    fake_api: str, tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(fake_openai, "FAKE_UNPARSEABLE_RATE", 1.0)
+
+    results, evaluation = evaluate(str(tmp_path))
+
+    assert [result["similarity_rating"] for result in results["basic"]] == ["Error"] * 5
+    assert evaluation.parser.malformed == 10
+    assert evaluation.parser.retried == 5
+    assert evaluation.parser.failed == 5
+    # Answers, then judgements, then the judgements asked again.
+    assert evaluation.batch_client.batches == 3
+
+
+def test_interrupted_run_resumes_polling(fake_api: str, tmp_path) -> None:
+    async def submit_then_resume() -> tuple[str, str, int, dict]:
+        async with AsyncOpenAI(max_retries=0) as client:
+            first = BatchClient(client, str(tmp_path), 0)
+            path = first.write_requests("answers", "model", "answer", {"a": "Hi"})[0]
+            submitted = await first.submit(path)
+            # A new run finds the batch in the state file.
+            second = BatchClient(client, str(tmp_path), 0)
+            resumed = await second.submit(path)
+            results = await second.wait(resumed)
+            return submitted, resumed, second.resumed, results
+
+    submitted, resumed, count, results = asyncio.run(submit_then_resume())
+
+    assert resumed == submitted
+    assert count == 1
+    assert results == {"a": "Answer to: Hi"}
@@ -1,17 +1,62 @@
-from fastapi import Depends, FastAPI, HTTPException, Query
-from sqlalchemy import Column, Integer, String, Text
-from typing import Any, Dict, List, Optional
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Integer,
+    String,
+    Text,
+    delete,
+    func,
+    inspect,
+    select,
+    update,
+)
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timedelta, timezone
 from agno.models.openai import OpenAIChat
-from sqlalchemy.orm import Session
+from contextlib import asynccontextmanager
+from agno.memory.v2.memory import Memory
+from agno.run.response import RunEvent
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from collections import deque
 from agno.agent import Agent
 import traceback
+import hashlib
+import asyncio
 import uvicorn
 import json
-
-
-from variables import BACKEND_BASE_URL, BACKEND_PORT, Base, SessionLocal, engine
+import uuid
+import time
+import csv
+import sys
+import io
+
+
+from variables import (
+    AGENT_HISTORY_RUNS,
+    AGENT_MODEL_ID,
+    AGENT_POOL_SIZE,
+    BACKEND_BASE_URL,
+    BACKEND_PORT,
+    BACKEND_SHUTDOWN_TIMEOUT,
+    BULK_EXECUTE_MAX_ITEMS,
+    JOB_QUEUE_SIZE,
+    JOB_WORKERS,
+    RESULT_CACHE_MAX_ENTRIES,
+    TASK_CHANGES_BACKLOG,
+    TASK_CHANGES_HEARTBEAT,
+    TASK_LIST_DEFAULT_LIMIT,
+    TASK_LIST_MAX_LIMIT,
+    Base,
+    SessionLocal,
+    engine,
+)
 
 load_dotenv()
 
@@ -26,26 +71,301 @@ class TaskModel(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
     system_prompt = Column(Text, nullable=False)
-    parameters = Column(Text, nullable=False)
+    parameters = Column(JSON, nullable=False)
+    # Seconds an execution result is reused for identical parameters, 0 disables it.
+    cache_ttl = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class TableVersionModel(Base):
+    """
+    Database model for the change counter of each table, bumped on every write.
+    """
+
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
 
 
-Base.metadata.create_all(bind=engine)
+async def bump_table_version(db: AsyncSession, table_name: str) -> int:
+    """
+    Increment the version of a table as part of the current transaction.
+
+    :param db: Database session.
+    :type db: AsyncSession
+    :param table_name: Name of the changed table.
+    :type table_name: str
+    :return: The new table version.
+    :rtype: int
+    """
+    await db.execute(
+        update(TableVersionModel)
+        .where(TableVersionModel.table_name == table_name)
+        .values(version=TableVersionModel.version + 1)
+    )
+    return await get_table_version(db, table_name)
+
+
+async def get_table_version(db: AsyncSession, table_name: str) -> int:
+    """
+    Get the current version of a table.
+
+    :param db: Database session.
+    :type db: AsyncSession
+    :param table_name: Name of the table.
+    :type table_name: str
+    :return: The table version.
+    :rtype: int
+    """
+    return (
+        await db.execute(
+            select(TableVersionModel.version).where(
+                TableVersionModel.table_name == table_name
+            )
+        )
+    ).scalar_one()
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINAL_STATES = {JOB_DONE, JOB_FAILED, JOB_CANCELLED}
+
+
+class JobModel(Base):
+    """
+    Database model for storing task execution jobs and their results.
+    """
+
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    task_name = Column(String, index=True, nullable=False)
+    session_id = Column(String, nullable=True)
+    prompt = Column(Text, nullable=False)
+    status = Column(String, index=True, nullable=False, default=JOB_QUEUED)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    cache_key = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class TaskResultModel(Base):
+    """
+    Database model for cached task execution results, evicted least recently used first.
+    """
+
+    __tablename__ = "task_results"
+
+    key = Column(String, primary_key=True)
+    task_id = Column(Integer, index=True, nullable=False)
+    result = Column(Text, nullable=False)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+    accessed_at = Column(DateTime(timezone=True), index=True, nullable=False)
+
+
+def add_missing_columns(conn) -> None:
+    """
+    Add model columns missing from existing tables, which create_all leaves as they are.
+
+    :param conn: Synchronous database connection.
+    :type conn: Connection
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {
+            column["name"] for column in inspector.get_columns(table.name)
+        }
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"
+                )
+
+
+job_queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+running_jobs: Dict[str, asyncio.Task] = {}
+cancel_requested: Set[str] = set()
+job_buffers: Dict[str, List[str]] = {}
+job_subscribers: Dict[str, List["asyncio.Queue[Tuple[str, Any]]"]] = {}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Create the database schema, re-enqueue unfinished jobs and start the job
+    workers on startup; stop the workers and release pooled connections on shutdown.
+
+    :param app: The FastAPI application.
+    :type app: FastAPI
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+
+    async with SessionLocal() as db:
+        if not await db.get(TableVersionModel, TaskModel.__tablename__):
+            db.add(TableVersionModel(table_name=TaskModel.__tablename__, version=0))
+
+        pending_jobs = (
+            (
+                await db.execute(
+                    select(JobModel.id)
+                    .where(JobModel.status.in_([JOB_QUEUED, JOB_RUNNING]))
+                    .order_by(JobModel.created_at)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        await db.execute(
+            update(JobModel)
+            .where(JobModel.status == JOB_RUNNING)
+            .values(status=JOB_QUEUED, updated_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+    for job_id in pending_jobs:
+        job_queue.put_nowait(job_id)
+
+    workers = [asyncio.create_task(job_worker()) for _ in range(JOB_WORKERS)]
+    yield
+    for worker in workers:
+        worker.cancel()
+    for job in list(running_jobs.values()):
+        job.cancel()
+    await asyncio.gather(*workers, *running_jobs.values(), return_exceptions=True)
+    await engine.dispose()
 
 
 app = FastAPI(
     title="Task Management API",
     description="API for managing and executing AI tasks using Agno agents",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
-agent = Agent(
-    name="Task Executor",
-    model=OpenAIChat(id="gpt-4o-mini"),
-    add_history_to_messages=True,
-    num_history_responses=3,
-    add_datetime_to_instructions=True,
-    markdown=True,
-)
+
+def create_agent(memory: Memory) -> Agent:
+    """
+    Create a task executor agent.
+
+    :param memory: The memory holding the conversation history of every session.
+    :type memory: Memory
+    :return: A new agent.
+    :rtype: Agent
+    """
+    return Agent(
+        name="Task Executor",
+        model=OpenAIChat(id=AGENT_MODEL_ID),
+        memory=memory,
+        add_history_to_messages=True,
+        num_history_responses=AGENT_HISTORY_RUNS,
+        add_datetime_to_instructions=True,
+        markdown=True,
+    )
+
+
+class AgentPool:
+    """
+    Fixed-size pool of task executor agents.
+
+    Each checked-out agent serves one run at a time, so concurrent executions never
+    share agent state. History is kept per session in a memory shared by the whole
+    pool, so a session sees its own previous runs whichever agent it gets.
+    Waiters are served first-come, first-served.
+    """
+
+    def __init__(self, size: int) -> None:
+        """
+        Initialize the pool.
+
+        :param size: Number of agents in the pool.
+        :type size: int
+        """
+        self.memory = Memory()
+        self.idle_agents: "asyncio.Queue[Agent]" = asyncio.Queue()
+        for _ in range(size):
+            self.idle_agents.put_nowait(create_agent(self.memory))
+
+    @asynccontextmanager
+    async def checkout(
+        self, session_id: str, keep_history: bool = True
+    ) -> AsyncIterator[Agent]:
+        """
+        Borrow an agent for a run in the given session.
+
+        :param session_id: The history scope of the run.
+        :type session_id: str
+        :param keep_history: Whether later runs of the session see this one.
+        :type keep_history: bool
+        :return: An idle agent, returned to the pool on exit.
+        :rtype: AsyncIterator[Agent]
+        """
+        agent = await self.idle_agents.get()
+        try:
+            yield agent
+        finally:
+            if not keep_history:
+                self.memory.runs.pop(session_id, None)
+            # Only the last runs are ever replayed, so older ones can be dropped.
+            session_runs = self.memory.runs.get(session_id)
+            if session_runs:
+                del session_runs[:-AGENT_HISTORY_RUNS]
+            self.idle_agents.put_nowait(agent)
+
+
+agent_pool = AgentPool(AGENT_POOL_SIZE)
+
+
+def get_session_id(task_id: int, session_id: Optional[str]) -> str:
+    """
+    Resolve the history scope of an execution, defaulting to one session per task.
+
+    :param task_id: ID of the task being executed.
+    :type task_id: int
+    :param session_id: The session requested by the client, if any.
+    :type session_id: Optional[str]
+    :return: The session ID to run the agent with.
+    :rtype: str
+    """
+    return session_id or f"task-{task_id}"
+
+
+def get_prefix_upper_bound(prefix: str) -> Optional[str]:
+    """
+    Get the smallest string above every string starting with a prefix.
+
+    :param prefix: The prefix.
+    :type prefix: str
+    :return: The upper bound, or None if the prefix is made of the last code point only.
+    :rtype: Optional[str]
+    """
+    # The last code point cannot be incremented; drop it and bound the shorter prefix.
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag, with the weak comparison.
+
+    :param if_none_match: The If-None-Match header, a list of ETags or '*'.
+    :type if_none_match: Optional[str]
+    :param etag: The current ETag.
+    :type etag: str
+    :return: True if the header lists the ETag or is '*'.
+    :rtype: bool
+    """
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
 
 
 class TaskParameter(BaseModel):
@@ -64,6 +384,7 @@ class TaskCreate(BaseModel):
     name: str
     system_prompt: str
     parameters: List[TaskParameter]
+    cache_ttl: int = 0
 
 
 class TaskEdit(BaseModel):
@@ -74,6 +395,7 @@ class TaskEdit(BaseModel):
     name: Optional[str] = None
     system_prompt: Optional[str] = None
     parameters: Optional[List[TaskParameter]] = None
+    cache_ttl: Optional[int] = None
 
 
 class TaskResponse(BaseModel):
@@ -85,6 +407,40 @@ class TaskResponse(BaseModel):
     name: str
     system_prompt: str
     parameters: List[TaskParameter]
+    cache_ttl: int = 0
+
+
+class TaskListItem(BaseModel):
+    """
+    Model for a task in a list page; only the requested fields are set.
+    """
+
+    id: int
+    name: Optional[str] = None
+    system_prompt: Optional[str] = None
+    parameters: Optional[List[TaskParameter]] = None
+    cache_ttl: Optional[int] = None
+
+
+class TaskPage(BaseModel):
+    """
+    Model for a page of tasks.
+    """
+
+    items: List[TaskListItem]
+    total: int
+    next_after_id: Optional[int] = None
+    version: int
+
+
+class TaskChange(BaseModel):
+    """
+    Model for a change feed event: one task write and the tasks version it produced.
+    """
+
+    version: int
+    op: str
+    task: TaskResponse
 
 
 class TaskExecutionResponse(BaseModel):
@@ -94,62 +450,473 @@ class TaskExecutionResponse(BaseModel):
 
     result: str
     task_name: str
+    cached: bool = False
+    elapsed: float
 
 
-def get_db() -> Session:
+class JobResponse(BaseModel):
+    """
+    Model for task execution job response.
+    """
+
+    id: str
+    task_name: str
+    status: str
+    result: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+def build_job_response(db_job: JobModel) -> JobResponse:
+    """
+    Build the API response for a job row.
+
+    :param db_job: The job database row.
+    :type db_job: JobModel
+    :return: Job information.
+    :rtype: JobResponse
+    """
+    return JobResponse(
+        id=db_job.id,
+        task_name=db_job.task_name,
+        status=db_job.status,
+        result=db_job.result,
+        error=db_job.error,
+        created_at=db_job.created_at,
+        updated_at=db_job.updated_at,
+    )
+
+
+class CompiledTask:
+    """
+    Task definition prepared for execution: the parameter names and the prompt
+    split into a fixed prefix and one label per parameter.
+    """
+
+    def __init__(self, db_task: TaskModel) -> None:
+        """
+        Compile a task definition.
+
+        :param db_task: The task definition.
+        :type db_task: TaskModel
+        """
+        self.id = db_task.id
+        self.name = db_task.name
+        self.parameter_names = [param["name"] for param in db_task.parameters]
+        self.prompt_prefix = f"{db_task.system_prompt}\n\nParameters:"
+        self.parameter_labels = [f"\n{name}: " for name in self.parameter_names]
+        self.cache_ttl = db_task.cache_ttl
+        # Stands in for the task version in result cache keys.
+        self.definition_hash = hashlib.sha256(
+            json.dumps([db_task.system_prompt, self.parameter_names]).encode()
+        ).hexdigest()
+
+
+compiled_tasks: Dict[str, CompiledTask] = {}
+compiled_tasks_generation = 0
+
+
+async def get_compiled_task(db: AsyncSession, task_name: str) -> Optional[CompiledTask]:
+    """
+    Get a compiled task by name, loading and compiling it on a cache miss.
+
+    :param db: Database session.
+    :type db: AsyncSession
+    :param task_name: Name of the task.
+    :type task_name: str
+    :return: The compiled task, or None if no task has this name.
+    :rtype: Optional[CompiledTask]
+    """
+    compiled_task = compiled_tasks.get(task_name)
+    if compiled_task:
+        return compiled_task
+
+    generation = compiled_tasks_generation
+    db_task = (
+        await db.execute(select(TaskModel).where(TaskModel.name == task_name))
+    ).scalar_one_or_none()
+    if not db_task:
+        return None
+
+    compiled_task = CompiledTask(db_task)
+    # Skip caching if a task was invalidated while this one was being loaded.
+    if generation == compiled_tasks_generation:
+        compiled_tasks[task_name] = compiled_task
+    return compiled_task
+
+
+def invalidate_compiled_task(*task_names: str) -> None:
+    """
+    Drop tasks from the compiled task cache.
+
+    :param task_names: Names of the changed tasks.
+    :type task_names: str
+    """
+    global compiled_tasks_generation
+    compiled_tasks_generation += 1
+    for task_name in task_names:
+        compiled_tasks.pop(task_name, None)
+
+
+def build_task_prompt(task: CompiledTask, task_params: Dict[str, Any]) -> str:
+    """
+    Validate the given parameters against the task definition and build the prompt.
+
+    :param task: The compiled task definition.
+    :type task: CompiledTask
+    :param task_params: Parameters for task execution.
+    :type task_params: Dict[str, Any]
+    :raises HTTPException: If required parameters are missing.
+    :return: The full prompt to send to the agent.
+    :rtype: str
+    """
+    task_params = task_params or {}
+    missing_params = [
+        name for name in task.parameter_names if task_params.get(name) is None
+    ]
+    if missing_params:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing required parameters: {', '.join(missing_params)}",
+        )
+
+    return task.prompt_prefix + "".join(
+        f"{label}{task_params[name]}"
+        for name, label in zip(task.parameter_names, task.parameter_labels)
+    )
+
+
+def parse_bulk_parameters(content_type: str, body: bytes) -> List[Any]:
+    """
+    Parse the parameter sets of a bulk execution.
+
+    A JSON body is an array of parameter objects, a JSON Lines body holds one
+    object per line and a CSV body has a header row of parameter names.
+
+    :param content_type: Content type of the request body.
+    :type content_type: str
+    :param body: The request body.
+    :type body: bytes
+    :raises HTTPException: If the content type is not supported.
+    :raises ValueError: If the body is malformed.
+    :return: The parameter sets, in order.
+    :rtype: List[Any]
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    text = body.decode("utf-8-sig")
+
+    if media_type == "application/json":
+        parameter_sets = json.loads(text)
+        if not isinstance(parameter_sets, list):
+            raise ValueError("Expected a JSON array of parameter sets")
+        return parameter_sets
+    if media_type in ("application/x-ndjson", "application/jsonl"):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if media_type == "text/csv":
+        # Empty cells count as missing parameters.
+        return [
+            {name: value for name, value in row.items() if value != ""}
+            for row in csv.DictReader(io.StringIO(text))
+        ]
+
+    raise HTTPException(
+        status_code=415,
+        detail="Send parameter sets as application/json, application/x-ndjson or text/csv",
+    )
+
+
+def get_result_cache_key(
+    task: CompiledTask, task_params: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Get the result cache key of an execution, if the task caches its results.
+
+    Parameters are canonicalised to the text they put in the prompt, so e.g.
+    1 and "1" or a different key order share a cache entry.
+
+    :param task: The compiled task definition.
+    :type task: CompiledTask
+    :param task_params: Validated parameters for task execution.
+    :type task_params: Dict[str, Any]
+    :return: The cache key, or None if caching is disabled for the task.
+    :rtype: Optional[str]
+    """
+    if task.cache_ttl <= 0:
+        return None
+    canonical_params = {name: str(task_params[name]) for name in task.parameter_names}
+    key_data = [task.id, task.definition_hash, canonical_params, AGENT_MODEL_ID]
+    return hashlib.sha256(
+        json.dumps(key_data, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+async def read_cached_result(db: AsyncSession, cache_key: str) -> Optional[str]:
+    """
+    Get an unexpired cached result and mark it as recently used.
+
+    :param db: Database session.
+    :type db: AsyncSession
+    :param cache_key: The result cache key.
+    :type cache_key: str
+    :return: The cached result, or None on a miss.
+    :rtype: Optional[str]
+    """
+    now = datetime.now(timezone.utc)
+    cached = (
+        await db.execute(
+            select(TaskResultModel).where(
+                TaskResultModel.key == cache_key, TaskResultModel.expires_at > now
+            )
+        )
+    ).scalar_one_or_none()
+    if not cached:
+        return None
+    cached.accessed_at = now
+    await db.commit()
+    return cached.result
+
+
+async def store_cached_result(
+    db: AsyncSession, cache_key: str, task: CompiledTask, result: str
+) -> None:
+    """
+    Cache an execution result, evicting expired and least recently used entries.
+
+    :param db: Database session.
+    :type db: AsyncSession
+    :param cache_key: The result cache key.
+    :type cache_key: str
+    :param task: The compiled task definition.
+    :type task: CompiledTask
+    :param result: The execution result.
+    :type result: str
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        await db.merge(
+            TaskResultModel(
+                key=cache_key,
+                task_id=task.id,
+                result=result,
+                expires_at=now + timedelta(seconds=task.cache_ttl),
+                accessed_at=now,
+            )
+        )
+        # Flush first, so the evictions below see the new entry as most recent.
+        await db.flush()
+        await db.execute(
+            delete(TaskResultModel).where(TaskResultModel.expires_at <= now)
+        )
+        oldest_kept = (
+            select(TaskResultModel.accessed_at)
+            .order_by(TaskResultModel.accessed_at.desc())
+            .offset(RESULT_CACHE_MAX_ENTRIES - 1)
+            .limit(1)
+            .scalar_subquery()
+        )
+        await db.execute(
+            delete(TaskResultModel).where(TaskResultModel.accessed_at < oldest_kept)
+        )
+        await db.commit()
+    except IntegrityError:
+        # A concurrent execution cached the same result first.
+        await db.rollback()
+    except Exception:
+        # The result is already computed, so a failed cache write must not fail it.
+        traceback.print_exc()
+        await db.rollback()
+
+
+async def invalidate_cached_results(db: AsyncSession, task_id: int) -> None:
+    """
+    Drop the cached results of a task as part of the current transaction.
+
+    :param db: Database session.
+    :type db: AsyncSession
+    :param task_id: ID of the changed task.
+    :type task_id: int
+    """
+    await db.execute(delete(TaskResultModel).where(TaskResultModel.task_id == task_id))
+
+
+task_changes: "deque[TaskChange]" = deque(maxlen=TASK_CHANGES_BACKLOG)
+task_change_subscribers: List["asyncio.Queue[TaskChange]"] = []
+
+
+def publish_task_change(version: int, op: str, task: TaskResponse) -> None:
+    """
+    Record a committed task write and push it to every change feed subscriber.
+
+    :param version: Tasks version produced by the write.
+    :type version: int
+    :param op: Kind of write ('created', 'edited' or 'deleted').
+    :type op: str
+    :param task: The task after the write, or before it for a deletion.
+    :type task: TaskResponse
+    """
+    change = TaskChange(version=version, op=op, task=task)
+    task_changes.append(change)
+    for subscriber in task_change_subscribers:
+        subscriber.put_nowait(change)
+
+
+def publish_job_event(job_id: str, event: str, data: Any) -> None:
+    """
+    Push an event to every stream subscribed to a job.
+
+    :param job_id: ID of the job.
+    :type job_id: str
+    :param event: Event name ('token' or 'status').
+    :type event: str
+    :param data: Event payload.
+    :type data: Any
+    """
+    for subscriber in job_subscribers.get(job_id, []):
+        subscriber.put_nowait((event, data))
+
+
+async def run_job(job_id: str) -> None:
+    """
+    Run a queued job, streaming tokens to subscribers and persisting the result.
+
+    :param job_id: ID of the job to run.
+    :type job_id: str
+    """
+    async with SessionLocal() as db:
+        # Claim the job atomically so a concurrent cancellation is not overwritten.
+        claimed = await db.execute(
+            update(JobModel)
+            .where(JobModel.id == job_id, JobModel.status == JOB_QUEUED)
+            .values(status=JOB_RUNNING, updated_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+        if not claimed.rowcount:
+            return
+        db_job = await db.get(JobModel, job_id)
+        prompt, cache_key, task_name = db_job.prompt, db_job.cache_key, db_job.task_name
+        session_id = db_job.session_id or f"job-{job_id}"
+    # The agent run can take a long time; it must not hold a connection.
+    publish_job_event(job_id, "status", JOB_RUNNING)
+
+    chunks = job_buffers.setdefault(job_id, [])
+    status, result, error = JOB_FAILED, None, None
+    try:
+        async with agent_pool.checkout(session_id) as agent:
+            async for event in await agent.arun(
+                prompt, stream=True, session_id=session_id
+            ):
+                if event.event == RunEvent.run_response_content and event.content:
+                    chunks.append(event.content)
+                    publish_job_event(job_id, "token", event.content)
+        status, result = JOB_DONE, "".join(chunks)
+        if cache_key and result:
+            # Own session: a failed cache write rolls back only itself.
+            async with SessionLocal() as cache_db:
+                task = await get_compiled_task(cache_db, task_name)
+                if task and task.cache_ttl > 0:
+                    await store_cached_result(cache_db, cache_key, task, result)
+    except asyncio.CancelledError:
+        # A user cancellation is final; a shutdown puts the job back in the queue.
+        status = JOB_CANCELLED if job_id in cancel_requested else JOB_QUEUED
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        status, result, error = JOB_FAILED, None, str(e)
+    finally:
+        async with SessionLocal() as db:
+            await db.execute(
+                update(JobModel)
+                .where(JobModel.id == job_id, JobModel.status == JOB_RUNNING)
+                .values(
+                    status=status,
+                    result=result,
+                    error=error,
+                    updated_at=datetime.now(timezone.utc),
+                )
+            )
+            await db.commit()
+        publish_job_event(job_id, "status", status)
+        job_buffers.pop(job_id, None)
+        cancel_requested.discard(job_id)
+
+
+async def job_worker() -> None:
+    """
+    Take job IDs from the queue and run them one at a time.
+    """
+    while True:
+        job_id = await job_queue.get()
+        job = asyncio.create_task(run_job(job_id))
+        running_jobs[job_id] = job
+        try:
+            # wait() does not propagate the job's own cancellation to the worker.
+            await asyncio.wait([job])
+        finally:
+            running_jobs.pop(job_id, None)
+            job_queue.task_done()
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
     """
     Get database session.
 
     :return: Database session.
-    :rtype: Session
+    :rtype: AsyncSession
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 @app.post("/api/v1/tasks/create", response_model=TaskResponse)
-def create_task(task: TaskCreate, db: Session = Depends(get_db)) -> TaskResponse:
+async def create_task(
+    task: TaskCreate, response: Response, db: AsyncSession = Depends(get_db)
+) -> TaskResponse:
     """
     Create a new task definition.
 
     :param task: Task creation data.
     :type task: TaskCreate
+    :param response: The outgoing response, which carries the new tasks version.
+    :type response: Response
     :param db: Database session.
-    :type db: Session
+    :type db: AsyncSession
     :raises HTTPException: If task name already exists or database error occurs.
     :return: Created task information.
     :rtype: TaskResponse
     """
     try:
-        existing_task = db.query(TaskModel).filter(TaskModel.name == task.name).first()
+        existing_task = (
+            await db.execute(select(TaskModel).where(TaskModel.name == task.name))
+        ).scalar_one_or_none()
         if existing_task:
             raise HTTPException(
                 status_code=400, detail=f"Task with name '{task.name}' already exists"
             )
 
-        parameters_json = json.dumps([param.dict() for param in task.parameters])
-
         db_task = TaskModel(
-            name=task.name, system_prompt=task.system_prompt, parameters=parameters_json
+            name=task.name,
+            system_prompt=task.system_prompt,
+            parameters=[param.dict() for param in task.parameters],
+            cache_ttl=max(task.cache_ttl, 0),
         )
 
         db.add(db_task)
-        db.commit()
-        db.refresh(db_task)
+        version = await bump_table_version(db, TaskModel.__tablename__)
+        await db.commit()
+        # Publish before any other await, so subscribers get changes in commit order.
+        parameters = [TaskParameter(**param) for param in db_task.parameters]
 
-        parameters = [
-            TaskParameter(**param) for param in json.loads(db_task.parameters)
-        ]
-
-        return TaskResponse(
+        task_response = TaskResponse(
             id=db_task.id,
             name=db_task.name,
             system_prompt=db_task.system_prompt,
             parameters=parameters,
+            cache_ttl=db_task.cache_ttl,
         )
+        publish_task_change(version, "created", task_response)
+        response.headers["X-Tasks-Version"] = str(version)
+        return task_response
 
     except (ValueError, TypeError) as e:
         traceback.print_exc()
@@ -162,8 +929,11 @@ def create_task(task: TaskCreate, db: Session = Depends(get_db)) -> TaskResponse
 
 
 @app.patch("/api/v1/tasks/edit/{task_id}", response_model=TaskResponse)
-def edit_task(
-    task_id: int, task_update: TaskEdit, db: Session = Depends(get_db)
+async def edit_task(
+    task_id: int,
+    task_update: TaskEdit,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
 ) -> TaskResponse:
     """
     Edit an existing task definition.
@@ -172,25 +942,30 @@ def edit_task(
     :type task_id: int
     :param task_update: Task update data.
     :type task_update: TaskEdit
+    :param response: The outgoing response, which carries the new tasks version.
+    :type response: Response
     :param db: Database session.
-    :type db: Session
+    :type db: AsyncSession
     :raises HTTPException: If task not found or database error occurs.
     :return: Updated task information.
     :rtype: TaskResponse
     """
     try:
-        db_task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
+        db_task = await db.get(TaskModel, task_id)
         if not db_task:
             raise HTTPException(
                 status_code=404, detail=f"Task with ID {task_id} not found"
             )
 
+        previous_name = db_task.name
         if task_update.name is not None:
             existing_task = (
-                db.query(TaskModel)
-                .filter(TaskModel.name == task_update.name, TaskModel.id != task_id)
-                .first()
-            )
+                await db.execute(
+                    select(TaskModel).where(
+                        TaskModel.name == task_update.name, TaskModel.id != task_id
+                    )
+                )
+            ).scalar_one_or_none()
             if existing_task:
                 raise HTTPException(
                     status_code=400,
@@ -202,24 +977,29 @@ def edit_task(
             db_task.system_prompt = task_update.system_prompt
 
         if task_update.parameters is not None:
-            parameters_json = json.dumps(
-                [param.dict() for param in task_update.parameters]
-            )
-            db_task.parameters = parameters_json
+            db_task.parameters = [param.dict() for param in task_update.parameters]
 
-        db.commit()
-        db.refresh(db_task)
+        if task_update.cache_ttl is not None:
+            db_task.cache_ttl = max(task_update.cache_ttl, 0)
 
-        parameters = [
-            TaskParameter(**param) for param in json.loads(db_task.parameters)
-        ]
+        await invalidate_cached_results(db, task_id)
+        version = await bump_table_version(db, TaskModel.__tablename__)
+        await db.commit()
+        # Publish before any other await, so subscribers get changes in commit order.
+        invalidate_compiled_task(previous_name, db_task.name)
 
-        return TaskResponse(
+        parameters = [TaskParameter(**param) for param in db_task.parameters]
+
+        task_response = TaskResponse(
             id=db_task.id,
             name=db_task.name,
             system_prompt=db_task.system_prompt,
             parameters=parameters,
+            cache_ttl=db_task.cache_ttl,
         )
+        publish_task_change(version, "edited", task_response)
+        response.headers["X-Tasks-Version"] = str(version)
+        return task_response
 
     except (ValueError, TypeError) as e:
         traceback.print_exc()
@@ -232,10 +1012,13 @@ def edit_task(
 
 
 @app.post("/api/v1/tasks/execute", response_model=TaskExecutionResponse)
-def execute_task(
+async def execute_task(
     task_name: str = Query(..., description="Name of the task to execute"),
     task_params: Dict[str, Any] = None,
-    db: Session = Depends(get_db),
+    session_id: Optional[str] = Query(
+        None, description="History scope of the execution, defaults to the task"
+    ),
+    db: AsyncSession = Depends(get_db),
 ) -> TaskExecutionResponse:
     """
     Execute a task with given parameters.
@@ -244,53 +1027,133 @@ def execute_task(
     :type task_name: str
     :param task_params: Parameters for task execution.
     :type task_params: Dict[str, Any]
+    :param session_id: History scope of the execution, defaults to the task.
+    :type session_id: Optional[str]
     :param db: Database session.
-    :type db: Session
+    :type db: AsyncSession
     :raises HTTPException: If task not found or execution fails.
     :return: Task execution result.
     :rtype: TaskExecutionResponse
     """
     try:
-        db_task = db.query(TaskModel).filter(TaskModel.name == task_name).first()
-        if not db_task:
+        task = await get_compiled_task(db, task_name)
+        if not task:
             raise HTTPException(status_code=404, detail=f"Task '{task_name}' not found")
 
-        expected_params = json.loads(db_task.parameters)
+        started = time.perf_counter()
+        full_prompt = build_task_prompt(task, task_params)
+
+        cache_key = get_result_cache_key(task, task_params)
+        if cache_key:
+            cached_result = await read_cached_result(db, cache_key)
+            if cached_result is not None:
+                return TaskExecutionResponse(
+                    result=cached_result,
+                    task_name=task_name,
+                    cached=True,
+                    elapsed=time.perf_counter() - started,
+                )
+        # The agent run can take a long time; it must not hold a connection.
+        await db.close()
 
-        missing_params = []
-        filtered_params = {}
-        for param_def in expected_params:
-            param_name = param_def["name"]
+        session_id = get_session_id(task.id, session_id)
+        async with agent_pool.checkout(session_id) as agent:
+            response = await agent.arun(full_prompt, session_id=session_id)
 
-            if param_name in task_params:
-                filtered_params[param_name] = task_params[param_name]
+        if cache_key and response.content:
+            async with SessionLocal() as cache_db:
+                await store_cached_result(cache_db, cache_key, task, response.content)
 
-            if param_name not in task_params or task_params[param_name] is None:
-                missing_params.append(param_name)
+        return TaskExecutionResponse(
+            result=response.content,
+            task_name=task_name,
+            elapsed=time.perf_counter() - started,
+        )
 
-        task_params = filtered_params
+    except (ValueError, TypeError) as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=f"Invalid parameters: {str(e)}")
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to execute task: {str(e)}")
 
-        if missing_params:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Missing required parameters: {', '.join(missing_params)}",
-            )
 
-        param_text = ""
-        for param_def in expected_params:
-            param_name = param_def["name"]
+@app.post("/api/v1/tasks/execute/bulk")
+async def execute_task_bulk(
+    request: Request,
+    task_name: str = Query(..., description="Name of the task to execute"),
+    concurrency: int = Query(
+        AGENT_POOL_SIZE,
+        ge=1,
+        le=AGENT_POOL_SIZE,
+        description="Maximum number of parameter sets executed at once",
+    ),
+    session_id: Optional[str] = Query(
+        None,
+        description="History scope shared by every execution, none by default",
+    ),
+    db: AsyncSession = Depends(get_db),
+) -> StreamingResponse:
+    """
+    Execute a task once per parameter set, streaming the results as NDJSON.
 
-            if param_name in task_params:
-                param_text += f"\n{param_name}: {task_params[param_name]}"
-            else:
-                param_text += f"\n{param_name}: Not provided"
+    Every parameter set is validated before any is executed. Results are
+    streamed in completion order, one line per set with its index, result,
+    error and duration, followed by a summary line with the throughput.
 
-        full_prompt = f"{db_task.system_prompt}\n\nParameters:{param_text}"
+    :param request: The incoming request, whose body holds the parameter sets.
+    :type request: Request
+    :param task_name: Name of the task to execute.
+    :type task_name: str
+    :param concurrency: Maximum number of parameter sets executed at once.
+    :type concurrency: int
+    :param session_id: History scope shared by every execution, none by default.
+    :type session_id: Optional[str]
+    :param db: Database session.
+    :type db: AsyncSession
+    :raises HTTPException: If task not found or any parameter set is invalid.
+    :return: The result stream.
+    :rtype: StreamingResponse
+    """
+    try:
+        task = await get_compiled_task(db, task_name)
+        if not task:
+            raise HTTPException(status_code=404, detail=f"Task '{task_name}' not found")
+        # The stream can run for a long time; it must not hold a connection.
+        await db.close()
 
-        response = agent.run(full_prompt)
+        parameter_sets = parse_bulk_parameters(
+            request.headers.get("content-type", "application/json"),
+            await request.body(),
+        )
+        if len(parameter_sets) > BULK_EXECUTE_MAX_ITEMS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {BULK_EXECUTE_MAX_ITEMS} parameter sets per request",
+            )
 
-        return TaskExecutionResponse(result=response.content, task_name=task_name)
+        executions = []
+        errors = []
+        for index, task_params in enumerate(parameter_sets):
+            if not isinstance(task_params, dict):
+                errors.append({"index": index, "error": "Expected a parameter object"})
+                continue
+            try:
+                prompt = build_task_prompt(task, task_params)
+                executions.append((prompt, get_result_cache_key(task, task_params)))
+            except HTTPException as e:
+                errors.append({"index": index, "error": e.detail})
+        if errors:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "message": f"{len(errors)} of {len(parameter_sets)} parameter sets are invalid",
+                    "errors": errors,
+                },
+            )
 
+    except HTTPException:
+        raise
     except (ValueError, TypeError) as e:
         traceback.print_exc()
         raise HTTPException(status_code=400, detail=f"Invalid parameters: {str(e)}")
@@ -298,71 +1161,221 @@ def execute_task(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to execute task: {str(e)}")
 
-
-@app.get("/api/v1/tasks/list", response_model=List[TaskResponse])
-def list_tasks(db: Session = Depends(get_db)) -> List[TaskResponse]:
+    async def execute_one(
+        index: int, prompt: str, cache_key: Optional[str]
+    ) -> Dict[str, Any]:
+        # Without a shared session every execution is independent of the others.
+        item_session_id = session_id or f"bulk-{uuid.uuid4().hex}"
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            if cache_key:
+                async with SessionLocal() as db:
+                    result = await read_cached_result(db, cache_key)
+            if result is None:
+                async with agent_pool.checkout(
+                    item_session_id, keep_history=session_id is not None
+                ) as agent:
+                    response = await agent.arun(prompt, session_id=item_session_id)
+                if cache_key and response.content:
+                    async with SessionLocal() as db:
+                        await store_cached_result(db, cache_key, task, response.content)
+                cached, result = False, response.content
+            else:
+                cached = True
+        except Exception as e:
+            traceback.print_exc()
+            result, error, cached = None, str(e), False
+        return {
+            "index": index,
+            "result": result,
+            "error": error,
+            "cached": cached,
+            "elapsed": round(time.perf_counter() - started, 3),
+        }
+
+    async def result_stream() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        results: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        pending = iter(enumerate(executions))
+
+        async def worker() -> None:
+            # Workers share one iterator, so each parameter set runs exactly once.
+            for index, (prompt, cache_key) in pending:
+                results.put_nowait(await execute_one(index, prompt, cache_key))
+
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(concurrency, len(executions)))
+        ]
+        failed = 0
+        cached = 0
+        try:
+            for _ in executions:
+                item = await results.get()
+                failed += item["error"] is not None
+                cached += item["cached"]
+                yield json.dumps(item) + "\n"
+        finally:
+            # Also reached when the client disconnects mid-stream.
+            for worker_task in workers:
+                worker_task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "total": len(executions),
+            "succeeded": len(executions) - failed,
+            "failed": failed,
+            "cached": cached,
+            "elapsed": round(elapsed, 3),
+            "per_second": round(len(executions) / elapsed, 3) if elapsed else None,
+        }
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+@app.get(
+    "/api/v1/tasks/list", response_model=TaskPage, response_model_exclude_unset=True
+)
+async def list_tasks(
+    request: Request,
+    response: Response,
+    limit: int = Query(
+        TASK_LIST_DEFAULT_LIMIT, ge=1, le=TASK_LIST_MAX_LIMIT, description="Page size"
+    ),
+    after_id: Optional[int] = Query(
+        None, description="Return tasks with an ID greater than this one"
+    ),
+    name_prefix: Optional[str] = Query(
+        None, description="Return only tasks whose name starts with this prefix"
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated task fields to return, 'id' is implied"
+    ),
+    db: AsyncSession = Depends(get_db),
+) -> TaskPage:
     """
-    List all available tasks.
-
+    List tasks one page at a time, ordered by ID.
+
+    Pages are addressed by keyset: pass the ``next_after_id`` of a page as
+    ``after_id`` to get the next one. Responses carry an ETag derived from the
+    tasks table version, and a matching ``If-None-Match`` gets a 304.
+
+    :param request: The incoming request.
+    :type request: Request
+    :param response: The outgoing response.
+    :type response: Response
+    :param limit: Page size.
+    :type limit: int
+    :param after_id: Return tasks with an ID greater than this one.
+    :type after_id: Optional[int]
+    :param name_prefix: Return only tasks whose name starts with this prefix.
+    :type name_prefix: Optional[str]
+    :param fields: Comma-separated task fields to return.
+    :type fields: Optional[str]
     :param db: Database session.
-    :type db: Session
-    :raises HTTPException: If database error occurs.
-    :return: List of all tasks.
-    :rtype: List[TaskResponse]
+    :type db: AsyncSession
+    :raises HTTPException: If a field is unknown or a database error occurs.
+    :return: A page of tasks.
+    :rtype: TaskPage
     """
     try:
-        tasks = db.query(TaskModel).all()
-        result = []
-
-        for task in tasks:
-            parameters = [
-                TaskParameter(**param) for param in json.loads(task.parameters)
-            ]
-            result.append(
-                TaskResponse(
-                    id=task.id,
-                    name=task.name,
-                    system_prompt=task.system_prompt,
-                    parameters=parameters,
-                )
+        selected_fields = ["id"]
+        if fields:
+            for field in fields.split(","):
+                field = field.strip()
+                if field not in TaskListItem.model_fields:
+                    raise HTTPException(
+                        status_code=400, detail=f"Unknown task field '{field}'"
+                    )
+                if field not in selected_fields:
+                    selected_fields.append(field)
+        else:
+            selected_fields = list(TaskListItem.model_fields)
+
+        version = await get_table_version(db, TaskModel.__tablename__)
+        query_key = f"{limit}:{after_id}:{name_prefix}:{','.join(selected_fields)}"
+        etag = f'W/"{version}-{hashlib.sha1(query_key.encode()).hexdigest()[:16]}"'
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        filters = []
+        if name_prefix:
+            # A range on the name keeps the lookup on the name index, unlike LIKE.
+            filters.append(TaskModel.name >= name_prefix)
+            upper_bound = get_prefix_upper_bound(name_prefix)
+            if upper_bound is not None:
+                filters.append(TaskModel.name < upper_bound)
+
+        total = (
+            await db.execute(select(func.count(TaskModel.id)).where(*filters))
+        ).scalar_one()
+
+        if after_id is not None:
+            filters.append(TaskModel.id > after_id)
+        rows = (
+            await db.execute(
+                select(*[getattr(TaskModel, field) for field in selected_fields])
+                .where(*filters)
+                .order_by(TaskModel.id)
+                .limit(limit + 1)
             )
+        ).all()
+
+        items = []
+        for row in rows[:limit]:
+            values = dict(row._mapping)
+            if "parameters" in values:
+                values["parameters"] = [
+                    TaskParameter(**param) for param in values["parameters"]
+                ]
+            items.append(TaskListItem(**values))
+
+        response.headers["ETag"] = etag
+        return TaskPage(
+            items=items,
+            total=total,
+            next_after_id=items[-1].id if len(rows) > limit else None,
+            version=version,
+        )
 
-        return result
-
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to list tasks: {str(e)}")
 
 
 @app.get("/api/v1/tasks/read/{task_id}", response_model=TaskResponse)
-def get_task(task_id: int, db: Session = Depends(get_db)) -> TaskResponse:
+async def get_task(task_id: int, db: AsyncSession = Depends(get_db)) -> TaskResponse:
     """
     Get a specific task by ID.
 
     :param task_id: ID of the task to retrieve.
     :type task_id: int
     :param db: Database session.
-    :type db: Session
+    :type db: AsyncSession
     :raises HTTPException: If task not found.
     :return: Task information.
     :rtype: TaskResponse
     """
     try:
-        db_task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
+        db_task = await db.get(TaskModel, task_id)
         if not db_task:
             raise HTTPException(
                 status_code=404, detail=f"Task with ID {task_id} not found"
             )
 
-        parameters = [
-            TaskParameter(**param) for param in json.loads(db_task.parameters)
-        ]
+        parameters = [TaskParameter(**param) for param in db_task.parameters]
 
         return TaskResponse(
             id=db_task.id,
             name=db_task.name,
             system_prompt=db_task.system_prompt,
             parameters=parameters,
+            cache_ttl=db_task.cache_ttl,
         )
 
     except Exception as e:
@@ -371,27 +1384,44 @@ def get_task(task_id: int, db: Session = Depends(get_db)) -> TaskResponse:
 
 
 @app.delete("/api/v1/tasks/delete/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_db)) -> Dict[str, bool]:
+async def delete_task(
+    task_id: int, response: Response, db: AsyncSession = Depends(get_db)
+) -> Dict[str, bool]:
     """
     Delete a task by ID.
 
     :param task_id: ID of the task to delete.
     :type task_id: int
+    :param response: The outgoing response, which carries the new tasks version.
+    :type response: Response
     :param db: Database session.
-    :type db: Session
+    :type db: AsyncSession
     :raises HTTPException: If task not found.
     :return: Success confirmation.
     :rtype: Dict[str, bool]
     """
     try:
-        db_task = db.query(TaskModel).filter(TaskModel.id == task_id).first()
+        db_task = await db.get(TaskModel, task_id)
         if not db_task:
             raise HTTPException(
                 status_code=404, detail=f"Task with ID {task_id} not found"
             )
 
-        db.delete(db_task)
-        db.commit()
+        task_response = TaskResponse(
+            id=db_task.id,
+            name=db_task.name,
+            system_prompt=db_task.system_prompt,
+            parameters=[TaskParameter(**param) for param in db_task.parameters],
+            cache_ttl=db_task.cache_ttl,
+        )
+
+        await db.delete(db_task)
+        await invalidate_cached_results(db, task_id)
+        version = await bump_table_version(db, TaskModel.__tablename__)
+        await db.commit()
+        invalidate_compiled_task(db_task.name)
+        response.headers["X-Tasks-Version"] = str(version)
+        publish_task_change(version, "deleted", task_response)
 
         return {"ok": True}
 
@@ -400,5 +1430,300 @@ def delete_task(task_id: int, db: Session = Depends(get_db)) -> Dict[str, bool]:
         raise HTTPException(status_code=500, detail=f"Failed to delete task: {str(e)}")
 
 
+@app.get("/api/v1/tasks/changes")
+async def stream_task_changes(
+    request: Request,
+    since: Optional[int] = Query(
+        None, description="Tasks version already seen, to replay later changes"
+    ),
+) -> StreamingResponse:
+    """
+    Stream task creations, edits and deletions as Server-Sent Events.
+
+    Each 'change' event carries the tasks version as its ID. A reconnecting
+    client passes its last version (or Last-Event-ID) to replay what it missed;
+    when that is no longer in the backlog it gets a 'reset' event and must refetch.
+
+    :param request: The incoming request.
+    :type request: Request
+    :param since: Tasks version already seen, to replay later changes.
+    :type since: Optional[int]
+    :return: The event stream.
+    :rtype: StreamingResponse
+    """
+    if since is None and request.headers.get("Last-Event-ID", "").isdigit():
+        since = int(request.headers["Last-Event-ID"])
+
+    # Subscribe before reading the version so no change between the two is lost.
+    subscriber: "asyncio.Queue[TaskChange]" = asyncio.Queue()
+    task_change_subscribers.append(subscriber)
+    try:
+        # A short-lived session: the stream itself must not hold a connection.
+        async with SessionLocal() as db:
+            version = await get_table_version(db, TaskModel.__tablename__)
+    except Exception:
+        task_change_subscribers.remove(subscriber)
+        raise
+
+    def format_change(change: TaskChange) -> str:
+        return f"id: {change.version}\nevent: change\ndata: {change.json()}\n\n"
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            replayed = set()
+            if since is not None and since < version:
+                missed = sorted(
+                    (c for c in task_changes if c.version > since),
+                    key=lambda c: c.version,
+                )
+                if not missed or missed[0].version > since + 1:
+                    yield f"event: reset\ndata: {version}\n\n"
+                else:
+                    for change in missed:
+                        replayed.add(change.version)
+                        yield format_change(change)
+
+            while True:
+                try:
+                    change = await asyncio.wait_for(
+                        subscriber.get(), TASK_CHANGES_HEARTBEAT
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line that keeps proxies and idle timeouts at bay.
+                    yield ": keepalive\n\n"
+                    continue
+                if change.version not in replayed:
+                    yield format_change(change)
+        finally:
+            task_change_subscribers.remove(subscriber)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.post("/api/v1/jobs/submit", response_model=JobResponse, status_code=202)
+async def submit_job(
+    task_name: str = Query(..., description="Name of the task to execute"),
+    task_params: Dict[str, Any] = None,
+    session_id: Optional[str] = Query(
+        None, description="History scope of the execution, defaults to the task"
+    ),
+    db: AsyncSession = Depends(get_db),
+) -> JobResponse:
+    """
+    Enqueue a task execution and return immediately with the job ID.
+
+    :param task_name: Name of the task to execute.
+    :type task_name: str
+    :param task_params: Parameters for task execution.
+    :type task_params: Dict[str, Any]
+    :param session_id: History scope of the execution, defaults to the task.
+    :type session_id: Optional[str]
+    :param db: Database session.
+    :type db: AsyncSession
+    :raises HTTPException: If task not found, parameters are invalid or the queue is full.
+    :return: The queued job.
+    :rtype: JobResponse
+    """
+    try:
+        task = await get_compiled_task(db, task_name)
+        if not task:
+            raise HTTPException(status_code=404, detail=f"Task '{task_name}' not found")
+
+        if job_queue.full():
+            raise HTTPException(status_code=503, detail="Job queue is full")
+
+        prompt = build_task_prompt(task, task_params)
+        cache_key = get_result_cache_key(task, task_params)
+        cached_result = None
+        if cache_key:
+            cached_result = await read_cached_result(db, cache_key)
+
+        now = datetime.now(timezone.utc)
+        db_job = JobModel(
+            id=uuid.uuid4().hex,
+            task_name=task_name,
+            session_id=get_session_id(task.id, session_id),
+            prompt=prompt,
+            # A cached result finishes the job without queueing it.
+            status=JOB_QUEUED if cached_result is None else JOB_DONE,
+            result=cached_result,
+            cache_key=cache_key,
+            created_at=now,
+            updated_at=now,
+        )
+        db.add(db_job)
+        await db.commit()
+
+        if cached_result is None:
+            try:
+                job_queue.put_nowait(db_job.id)
+            except asyncio.QueueFull:
+                # The queue filled up while the job was stored; no worker will run it.
+                db_job.status = JOB_FAILED
+                db_job.error = "Job queue is full"
+                db_job.updated_at = datetime.now(timezone.utc)
+                await db.commit()
+                raise HTTPException(status_code=503, detail="Job queue is full")
+
+        return build_job_response(db_job)
+
+    except HTTPException:
+        raise
+    except (ValueError, TypeError) as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=f"Invalid parameters: {str(e)}")
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to submit job: {str(e)}")
+
+
+@app.get("/api/v1/jobs/read/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, db: AsyncSession = Depends(get_db)) -> JobResponse:
+    """
+    Get the status and, once finished, the result of a job.
+
+    :param job_id: ID of the job to retrieve.
+    :type job_id: str
+    :param db: Database session.
+    :type db: AsyncSession
+    :raises HTTPException: If job not found.
+    :return: Job information.
+    :rtype: JobResponse
+    """
+    db_job = await db.get(JobModel, job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+
+    return build_job_response(db_job)
+
+
+@app.get("/api/v1/jobs/stream/{job_id}")
+async def stream_job(
+    job_id: str, db: AsyncSession = Depends(get_db)
+) -> StreamingResponse:
+    """
+    Stream the tokens and status changes of a job as Server-Sent Events.
+
+    Tokens produced before the client subscribed are replayed as a single
+    'token' event; the stream ends with a 'status' event carrying a final state.
+
+    :param job_id: ID of the job to stream.
+    :type job_id: str
+    :param db: Database session.
+    :type db: AsyncSession
+    :raises HTTPException: If job not found.
+    :return: The event stream.
+    :rtype: StreamingResponse
+    """
+    # Subscribe before reading the row so no event between the two is lost.
+    subscriber: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue()
+    job_subscribers.setdefault(job_id, []).append(subscriber)
+    buffered = "".join(job_buffers.get(job_id, []))
+
+    def unsubscribe() -> None:
+        subscribers = job_subscribers.get(job_id, [])
+        if subscriber in subscribers:
+            subscribers.remove(subscriber)
+        if not subscribers:
+            job_subscribers.pop(job_id, None)
+
+    db_job = await db.get(JobModel, job_id)
+    if not db_job:
+        unsubscribe()
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+
+    def format_event(event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            if db_job.status in JOB_FINAL_STATES:
+                if db_job.result:
+                    yield format_event("token", db_job.result)
+                yield format_event("status", db_job.status)
+                return
+
+            if buffered:
+                yield format_event("token", buffered)
+            while True:
+                event, data = await subscriber.get()
+                yield format_event(event, data)
+                if event == "status" and data in JOB_FINAL_STATES:
+                    return
+        finally:
+            unsubscribe()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+async def cancel_unfinished_job(
+    db: AsyncSession,
+    job_id: str,
+    statuses: Tuple[str, ...] = (JOB_QUEUED, JOB_RUNNING),
+) -> None:
+    """
+    Cancel a job unless it already moved past the given statuses.
+
+    :param db: Database session.
+    :type db: AsyncSession
+    :param job_id: ID of the job to cancel.
+    :type job_id: str
+    :param statuses: Statuses the job is cancelled from.
+    :type statuses: Tuple[str, ...]
+    """
+    cancelled = await db.execute(
+        update(JobModel)
+        .where(JobModel.id == job_id, JobModel.status.in_(statuses))
+        .values(status=JOB_CANCELLED, updated_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+    if cancelled.rowcount:
+        publish_job_event(job_id, "status", JOB_CANCELLED)
+
+
+@app.post("/api/v1/jobs/cancel/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str, db: AsyncSession = Depends(get_db)) -> JobResponse:
+    """
+    Cancel a queued or running job.
+
+    :param job_id: ID of the job to cancel.
+    :type job_id: str
+    :param db: Database session.
+    :type db: AsyncSession
+    :raises HTTPException: If job not found or already finished.
+    :return: Job information.
+    :rtype: JobResponse
+    """
+    db_job = await db.get(JobModel, job_id)
+    if not db_job:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+    if db_job.status in JOB_FINAL_STATES:
+        raise HTTPException(
+            status_code=409, detail=f"Job {job_id} is already {db_job.status}"
+        )
+
+    running_job = running_jobs.get(job_id)
+    if running_job:
+        cancel_requested.add(job_id)
+        running_job.cancel()
+        await asyncio.wait([running_job])
+        await db.refresh(db_job)
+        if db_job.status not in JOB_FINAL_STATES:
+            # Cancelled before run_job reached its handlers, e.g. while claiming.
+            await cancel_unfinished_job(db, job_id)
+            await db.refresh(db_job)
+        cancel_requested.discard(job_id)
+    else:
+        await cancel_unfinished_job(db, job_id, (JOB_QUEUED,))
+        await db.refresh(db_job)
+
+    return build_job_response(db_job)
+
+
 if __name__ == "__main__":
-    uvicorn.run(app, host=BACKEND_BASE_URL, port=BACKEND_PORT)
+    uvicorn.run(
+        app,
+        host=BACKEND_BASE_URL,
+        port=BACKEND_PORT,
+        timeout_graceful_shutdown=BACKEND_SHUTDOWN_TIMEOUT,
+    )
@@ -0,0 +1,115 @@
+from agno.memory.v2.memory import Memory
+from typing import Callable, Dict, List
+import statistics
+import argparse
+import asyncio
+import time
+import os
+
+from backend_server import AgentPool, create_agent
+from fake_model import run_fake_model
+
+
+async def run_executions(
+    executions: List[tuple],
+    run: Callable,
+    concurrency: int,
+) -> Dict[str, float]:
+    """
+    Runs the executions at a given concurrency and reports their prompt sizes
+    and latencies.
+
+    :param executions: The task ID and prompt of each execution, in order.
+    :type executions: List[tuple]
+    :param run: Runs the prompt of a task and returns the agent response.
+    :type run: Callable
+    :param concurrency: Number of executions running at once.
+    :type concurrency: int
+    :return: Prompt tokens of the first and last executions of each task, latencies and total time.
+    :rtype: Dict[str, float]
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    prompt_tokens: Dict[int, List[int]] = {}
+    latencies: List[float] = []
+
+    async def execute(task_id: int, prompt: str) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await run(task_id, prompt)
+            latencies.append(time.perf_counter() - started)
+            prompt_tokens.setdefault(task_id, []).append(
+                sum(response.metrics["input_tokens"])
+            )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(execute(task_id, prompt) for task_id, prompt in executions))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "first tokens": statistics.fmean(
+            tokens[0] for tokens in prompt_tokens.values()
+        ),
+        "last tokens": statistics.fmean(
+            tokens[-1] for tokens in prompt_tokens.values()
+        ),
+        "mean tokens": statistics.fmean(
+            token for tokens in prompt_tokens.values() for token in tokens
+        ),
+        "p50 ms": latencies[len(latencies) // 2] * 1000,
+        "p95 ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "total s": elapsed,
+    }
+
+
+async def main() -> None:
+    """
+    Compares the prompt token growth and latency of task executions on one
+    agent shared by every request with those on the agent pool, against a
+    local fake model.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--tasks", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=10, help="Executions per task")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    executions = [
+        (task_id, f"Task {task_id} prompt\n\nParameters:\ntopic: run {run} " * 20)
+        for run in range(args.runs)
+        for task_id in range(args.tasks)
+    ]
+
+    # One agent and one history for every request and every task.
+    shared_agent = create_agent(Memory())
+
+    async def run_shared(task_id: int, prompt: str):
+        return await shared_agent.arun(prompt)
+
+    pool = AgentPool(args.concurrency)
+
+    async def run_pooled(task_id: int, prompt: str):
+        session_id = f"task-{task_id}"
+        async with pool.checkout(session_id) as agent:
+            return await agent.arun(prompt, session_id=session_id)
+
+    with run_fake_model() as url:
+        os.environ["OPENAI_BASE_URL"] = url
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+        print(
+            f"{'agents':<8} {'first tokens':>12} {'last tokens':>11} "
+            f"{'mean tokens':>11} {'p50 ms':>8} {'p95 ms':>8} {'total s':>8}"
+        )
+        for name, run in (("shared", run_shared), ("pool", run_pooled)):
+            report = await run_executions(executions, run, args.concurrency)
+            print(
+                f"{name:<8} {report['first tokens']:>12.0f} "
+                f"{report['last tokens']:>11.0f} {report['mean tokens']:>11.0f} "
+                f"{report['p50 ms']:>8.1f} {report['p95 ms']:>8.1f} "
+                f"{report['total s']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
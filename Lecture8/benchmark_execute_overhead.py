@@ -0,0 +1,165 @@
+from sqlalchemy import Column, Integer, String, Text, select
+from sqlalchemy.orm import declarative_base
+from typing import Any, Dict
+import statistics
+import tempfile
+import argparse
+import asyncio
+import random
+import json
+import time
+import os
+
+# The engine is created on import, so the benchmark database must be set first.
+os.environ["DATABASE_URL"] = (
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'tasks.db')}"
+)
+
+from backend_server import (
+    TaskModel,
+    build_task_prompt,
+    get_compiled_task,
+    get_result_cache_key,
+)
+from variables import Base, SessionLocal, engine
+
+LegacyBase = declarative_base()
+
+
+class LegacyTaskModel(LegacyBase):
+    """
+    Task definitions as stored before the compiled task cache, with the
+    parameters as JSON text.
+    """
+
+    __tablename__ = "legacy_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)
+    system_prompt = Column(Text, nullable=False)
+    parameters = Column(Text, nullable=False)
+
+
+async def legacy_prompt(task_name: str, task_params: Dict[str, Any]) -> str:
+    """
+    Build the prompt of an execution the way execute_task did before the
+    compiled task cache: query the task, parse its parameters and concatenate
+    the prompt.
+
+    :param task_name: Name of the task.
+    :type task_name: str
+    :param task_params: Parameters for task execution.
+    :type task_params: Dict[str, Any]
+    :return: The full prompt.
+    :rtype: str
+    """
+    async with SessionLocal() as db:
+        db_task = (
+            await db.execute(
+                select(LegacyTaskModel).where(LegacyTaskModel.name == task_name)
+            )
+        ).scalar_one_or_none()
+    expected_params = json.loads(db_task.parameters)
+
+    missing_params = []
+    filtered_params = {}
+    for param_def in expected_params:
+        param_name = param_def["name"]
+        if param_name in task_params:
+            filtered_params[param_name] = task_params[param_name]
+        if param_name not in task_params or task_params[param_name] is None:
+            missing_params.append(param_name)
+    if missing_params:
+        raise ValueError(f"Missing required parameters: {', '.join(missing_params)}")
+
+    param_text = ""
+    for param_def in expected_params:
+        param_name = param_def["name"]
+        param_text += f"\n{param_name}: {filtered_params[param_name]}"
+    return f"{db_task.system_prompt}\n\nParameters:{param_text}"
+
+
+async def compiled_prompt(task_name: str, task_params: Dict[str, Any]) -> str:
+    """
+    Build the prompt of an execution the way execute_task does now, from the
+    compiled task cache.
+
+    :param task_name: Name of the task.
+    :type task_name: str
+    :param task_params: Parameters for task execution.
+    :type task_params: Dict[str, Any]
+    :return: The full prompt.
+    :rtype: str
+    """
+    async with SessionLocal() as db:
+        task = await get_compiled_task(db, task_name)
+    get_result_cache_key(task, task_params)
+    return build_task_prompt(task, task_params)
+
+
+async def main() -> None:
+    """
+    Measures the overhead of an execution before the agent runs, with the
+    task loaded and compiled on every call as before and with the compiled
+    task cache, on a temporary SQLite database.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--parameters", type=int, default=5)
+    parser.add_argument("--executions", type=int, default=5000)
+    args = parser.parse_args()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(LegacyBase.metadata.create_all)
+
+    parameters = [{"name": f"param_{index}"} for index in range(args.parameters)]
+    async with SessionLocal() as db:
+        for index in range(args.tasks):
+            system_prompt = f"Task {index} instructions. " * 20
+            db.add(
+                TaskModel(
+                    name=f"task-{index}",
+                    system_prompt=system_prompt,
+                    parameters=parameters,
+                )
+            )
+            db.add(
+                LegacyTaskModel(
+                    name=f"task-{index}",
+                    system_prompt=system_prompt,
+                    parameters=json.dumps(parameters),
+                )
+            )
+        await db.commit()
+
+    rng = random.Random(0)
+    executions = [
+        (
+            f"task-{rng.randrange(args.tasks)}",
+            {param["name"]: f"value {rng.random()}" for param in parameters},
+        )
+        for _ in range(args.executions)
+    ]
+
+    print(f"{'path':<10} {'mean us':>9} {'p50 us':>9} {'p95 us':>9}")
+    for name, build in (("before", legacy_prompt), ("after", compiled_prompt)):
+        for task_name, task_params in executions[:100]:
+            await build(task_name, task_params)
+        durations = []
+        for task_name, task_params in executions:
+            started = time.perf_counter()
+            await build(task_name, task_params)
+            durations.append(time.perf_counter() - started)
+        durations.sort()
+        print(
+            f"{name:<10} {statistics.fmean(durations) * 1e6:>9.1f} "
+            f"{durations[len(durations) // 2] * 1e6:>9.1f} "
+            f"{durations[int(0.95 * (len(durations) - 1))] * 1e6:>9.1f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,175 @@
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+from fastapi import Request, Response
+import tempfile
+import argparse
+import asyncio
+import httpx
+import time
+import uuid
+import os
+
+# The engine is created on import, so the benchmark database must be set first.
+os.environ["DATABASE_URL"] = (
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'tasks.db')}"
+)
+
+from backend_server import app as backend_app
+from fake_model import run_fake_model, serve
+from variables import HTTP_EXECUTE_TIMEOUT
+from frontend import TaskManager
+import frontend
+
+# Client (host, port) of every request the backend served: one per TCP connection.
+client_addresses: Set[Tuple[str, int]] = set()
+
+
+@backend_app.middleware("http")
+async def record_client_address(request: Request, call_next) -> Response:
+    client_addresses.add(tuple(request.scope["client"]))
+    return await call_next(request)
+
+
+async def measure(
+    request: Callable[..., Awaitable[httpx.Response]],
+    operations: Dict[str, Callable[[], Tuple[str, str, dict]]],
+    rounds: int,
+    concurrency: int,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Repeats each operation from concurrent users through a request function.
+
+    :param request: Sends a request given its method, URL path and httpx arguments.
+    :type request: Callable[..., Awaitable[httpx.Response]]
+    :param operations: Builds the method, URL path and httpx arguments of each operation.
+    :type operations: Dict[str, Callable[[], Tuple[str, str, dict]]]
+    :param rounds: Number of requests of each user per operation.
+    :type rounds: int
+    :param concurrency: Number of concurrent users.
+    :type concurrency: int
+    :return: The round-trip latencies and the connections opened, per operation.
+    :rtype: Dict[str, Dict[str, float]]
+    """
+    reports = {}
+    for name, operation in operations.items():
+        latencies: List[float] = []
+        connections_before = len(client_addresses)
+
+        async def user() -> None:
+            for _ in range(rounds):
+                method, url, kwargs = operation()
+                started = time.perf_counter()
+                response = await request(method, url, **kwargs)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        latencies.sort()
+        reports[name] = {
+            "p50 ms": latencies[len(latencies) // 2] * 1000,
+            "p95 ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+            "connections": len(client_addresses) - connections_before,
+        }
+    return reports
+
+
+async def main() -> None:
+    """
+    Measures the round-trip latency of the list, create and execute requests of
+    the frontend and the TCP connections they open, with a new connection per
+    request in the default thread executor as before and with the shared
+    keep-alive client of TaskManager. The backend runs on a temporary database
+    with a local fake model.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=5)
+    args = parser.parse_args()
+
+    with run_fake_model() as model_url:
+        os.environ["OPENAI_BASE_URL"] = model_url
+        os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+        with serve(backend_app) as backend_url:
+            async with httpx.AsyncClient(base_url=backend_url) as client:
+                response = await client.post(
+                    "/api/v1/tasks/create",
+                    json={
+                        "name": "benchmark",
+                        "system_prompt": "Write about",
+                        "parameters": [{"name": "topic"}],
+                    },
+                )
+                response.raise_for_status()
+
+            operations = {
+                "list": lambda: (
+                    "get",
+                    "/api/v1/tasks/list",
+                    {"params": {"limit": 10}},
+                ),
+                "create": lambda: (
+                    "post",
+                    "/api/v1/tasks/create",
+                    {
+                        "json": {
+                            "name": f"benchmark-{uuid.uuid4().hex}",
+                            "system_prompt": "Write about",
+                            "parameters": [{"name": "topic"}],
+                        }
+                    },
+                ),
+                "execute": lambda: (
+                    "post",
+                    "/api/v1/tasks/execute",
+                    {
+                        "params": {"task_name": "benchmark"},
+                        "json": {"topic": uuid.uuid4().hex},
+                        "timeout": HTTP_EXECUTE_TIMEOUT,
+                    },
+                ),
+            }
+
+            async def request_per_call(
+                method: str, url: str, **kwargs
+            ) -> httpx.Response:
+                # A new client, hence a new connection, per call, as requests.request did.
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    None, lambda: httpx.request(method, f"{backend_url}{url}", **kwargs)
+                )
+
+            # TaskManager talks to BACKEND_URL; point it at the benchmark backend.
+            frontend.BACKEND_URL = backend_url
+            http_client = frontend.create_http_client()
+            task_manager = TaskManager(http_client)
+            try:
+                results = {
+                    "per call": await measure(
+                        request_per_call, operations, args.rounds, args.concurrency
+                    ),
+                    "shared": await measure(
+                        task_manager._perform_request,
+                        operations,
+                        args.rounds,
+                        args.concurrency,
+                    ),
+                }
+            finally:
+                await http_client.aclose()
+
+    requests_per_operation = args.rounds * args.concurrency
+    print(
+        f"{'client':<10} {'operation':<9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'connections':>11} {'requests':>8}"
+    )
+    for client_name, reports in results.items():
+        for name, report in reports.items():
+            print(
+                f"{client_name:<10} {name:<9} {report['p50 ms']:>8.1f} "
+                f"{report['p95 ms']:>8.1f} {report['connections']:>11} "
+                f"{requests_per_operation:>8}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+from typing import Awaitable, Callable, Dict, List
+import statistics
+import argparse
+import asyncio
+import httpx
+import time
+import uuid
+
+from variables import BACKEND_URL
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Reads a percentile of sorted values.
+
+    :param values: The sorted values.
+    :type values: List[float]
+    :param fraction: The percentile, from 0 to 1.
+    :type fraction: float
+    :return: The percentile, or 0 without values.
+    :rtype: float
+    """
+    return values[int(fraction * (len(values) - 1))] if values else 0.0
+
+
+async def run_load(
+    name: str,
+    request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]],
+    client: httpx.AsyncClient,
+    concurrency: int,
+    duration: float,
+) -> Dict[str, float]:
+    """
+    Sends one kind of request from concurrent users for a fixed duration.
+
+    :param name: Name of the request in the report.
+    :type name: str
+    :param request: Sends one request, given the client and a request number.
+    :type request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+    :param client: The HTTP client shared by the users.
+    :type client: httpx.AsyncClient
+    :param concurrency: Number of concurrent users.
+    :type concurrency: int
+    :param duration: Seconds the load lasts.
+    :type duration: float
+    :return: The requests per second, latency percentiles in milliseconds and errors.
+    :rtype: Dict[str, float]
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(10**9))
+    deadline = time.perf_counter() + duration
+
+    async def user() -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await request(client, next(counter))
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "name": name,
+        "requests/s": len(latencies) / elapsed,
+        "p50 ms": percentile(latencies, 0.5) * 1000,
+        "p95 ms": percentile(latencies, 0.95) * 1000,
+        "mean ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+async def main() -> None:
+    """
+    Measures the requests per second of the list, read and create endpoints of
+    a running backend at increasing concurrency.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--url", default=BACKEND_URL)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--seed-tasks", type=int, default=200)
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=30
+    ) as client:
+        created = []
+        for index in range(args.seed_tasks):
+            response = await client.post(
+                "/api/v1/tasks/create",
+                json={
+                    "name": f"load-{run_id}-seed-{index}",
+                    "system_prompt": "Answer about {topic}.",
+                    "parameters": [{"name": "topic"}],
+                },
+            )
+            response.raise_for_status()
+            created.append(response.json()["id"])
+
+        requests = {
+            "list": lambda client, n: client.get(
+                "/api/v1/tasks/list", params={"limit": 50}
+            ),
+            "read": lambda client, n: client.get(
+                f"/api/v1/tasks/read/{created[n % len(created)]}"
+            ),
+            "create": lambda client, n: client.post(
+                "/api/v1/tasks/create",
+                json={
+                    "name": f"load-{run_id}-{uuid.uuid4().hex}",
+                    "system_prompt": "Answer about {topic}.",
+                    "parameters": [{"name": "topic"}],
+                },
+            ),
+        }
+
+        print(
+            f"{'endpoint':<8} {'users':>5} {'requests/s':>10} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} {'errors':>6}"
+        )
+        for concurrency in args.concurrency:
+            for name, request in requests.items():
+                report = await run_load(
+                    name, request, client, concurrency, args.duration
+                )
+                print(
+                    f"{name:<8} {concurrency:>5} {report['requests/s']:>10.1f} "
+                    f"{report['p50 ms']:>8.1f} {report['p95 ms']:>8.1f} "
+                    f"{report['mean ms']:>8.1f} {report['errors']:>6}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
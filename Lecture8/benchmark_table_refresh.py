@@ -0,0 +1,146 @@
+from nicegui import Client, json, ui
+from typing import Callable, Dict
+from nicegui.page import page
+import argparse
+import asyncio
+import time
+
+from frontend import Task, TaskManager, TaskParameter
+
+
+def make_task(task_id: int) -> Task:
+    """
+    Make a task like the ones of the task table.
+
+    :param task_id: ID of the task.
+    :type task_id: int
+    :return: The task.
+    :rtype: Task
+    """
+    return Task(
+        id=task_id,
+        name=f"task-{task_id}",
+        system_prompt=f"Instructions of task {task_id}. " * 10,
+        parameters=[TaskParameter("topic"), TaskParameter("audience")],
+    )
+
+
+def measure(rows: int, mutate: Callable[[TaskManager], None]) -> Dict[str, float]:
+    """
+    Shows a page of tasks, applies one change to it and measures the websocket
+    update the change produces.
+
+    :param rows: Number of tasks on the page.
+    :type rows: int
+    :param mutate: Applies the change to the task manager.
+    :type mutate: Callable[[TaskManager], None]
+    :return: The elements sent, the payload bytes, the elements on the page and the milliseconds spent.
+    :rtype: Dict[str, float]
+    """
+    client = Client(page("/benchmark"))
+    task_manager = TaskManager()
+    task_manager.items_per_page = rows + 1
+    task_manager.tasks = [make_task(task_id) for task_id in range(rows)]
+    task_manager.total_tasks = rows
+    with client:
+        task_manager.task_table = ui.column()
+        task_manager.update_task_table()
+    client.outbox.updates.clear()
+
+    started = time.perf_counter()
+    with client:
+        mutate(task_manager)
+    elapsed = time.perf_counter() - started
+
+    # The 'update' message the outbox sends for the pending element updates.
+    data = {
+        element_id: element._to_dict() if isinstance(element, ui.element) else None
+        for element_id, element in client.outbox.updates.items()
+    }
+    report = {
+        "elements sent": len(data),
+        "payload bytes": len(json.dumps(data)),
+        "page elements": len(client.elements),
+        "ms": elapsed * 1000,
+    }
+    client.delete()
+    return report
+
+
+def full_refresh(
+    change: Callable[[TaskManager], None],
+) -> Callable[[TaskManager], None]:
+    """
+    Applies a change the way the table did before, re-rendering every row.
+
+    :param change: Changes the list of tasks.
+    :type change: Callable[[TaskManager], None]
+    :return: Applies the change and re-renders the table.
+    :rtype: Callable[[TaskManager], None]
+    """
+
+    def mutate(task_manager: TaskManager) -> None:
+        change(task_manager)
+        task_manager.update_task_table()
+
+    return mutate
+
+
+def edited_task(task_manager: TaskManager) -> Task:
+    """
+    Make an edited version of the task in the middle of the page.
+
+    :param task_manager: The task manager showing the page.
+    :type task_manager: TaskManager
+    :return: The edited task.
+    :rtype: Task
+    """
+    task = make_task(len(task_manager.tasks) // 2)
+    task.system_prompt = "Edited instructions. " * 10
+    return task
+
+
+async def main() -> None:
+    """
+    Measures the element count and websocket payload of a task table update
+    after a create, an edit and a delete, re-rendering the whole table as
+    before and patching only the changed row.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+
+    changes = {
+        "create": (
+            full_refresh(lambda tm: tm.tasks.append(make_task(len(tm.tasks)))),
+            lambda tm: tm.add_task_row(make_task(len(tm.tasks))),
+        ),
+        "edit": (
+            full_refresh(
+                lambda tm: tm.tasks.__setitem__(len(tm.tasks) // 2, edited_task(tm))
+            ),
+            lambda tm: tm.update_task_row(edited_task(tm)),
+        ),
+        "delete": (
+            full_refresh(lambda tm: tm.tasks.pop(len(tm.tasks) // 2)),
+            lambda tm: tm.remove_task_row(len(tm.tasks) // 2),
+        ),
+    }
+
+    print(
+        f"{'rows':>5} {'change':<7} {'update':<8} {'elements sent':>13} "
+        f"{'payload bytes':>13} {'page elements':>13} {'ms':>7}"
+    )
+    for rows in args.rows:
+        for name, (full, patch) in changes.items():
+            for update, mutate in (("full", full), ("patch", patch)):
+                report = measure(rows, mutate)
+                print(
+                    f"{rows:>5} {name:<7} {update:<8} "
+                    f"{report['elements sent']:>13} {report['payload bytes']:>13} "
+                    f"{report['page elements']:>13} {report['ms']:>7.2f}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
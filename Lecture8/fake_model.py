@@ -0,0 +1,134 @@
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import contextmanager
+from fastapi import FastAPI, Request
+from typing import Iterator, List
+import threading
+import asyncio
+import uvicorn
+import socket
+import json
+import time
+import uuid
+
+# Latency of a fake completion: a fixed part plus a part per prompt token.
+FAKE_BASE_LATENCY = 0.05
+FAKE_TOKEN_LATENCY = 0.00002
+
+app = FastAPI(title="Fake OpenAI chat completions")
+prompt_tokens_log: List[int] = []
+
+
+def count_tokens(messages: List[dict]) -> int:
+    """
+    Estimate the prompt tokens of chat messages, at about four characters per token.
+
+    :param messages: The chat messages.
+    :type messages: List[dict]
+    :return: The estimated number of tokens.
+    :rtype: int
+    """
+    return sum(len(str(message.get("content") or "")) for message in messages) // 4
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> JSONResponse:
+    """
+    Answer a chat completion request with the start of its last message, after
+    a delay growing with the prompt size, without calling any model.
+
+    :param request: The chat completion request.
+    :type request: Request
+    :return: The completion, streamed when requested.
+    :rtype: JSONResponse
+    """
+    body = await request.json()
+    prompt_tokens = count_tokens(body["messages"])
+    prompt_tokens_log.append(prompt_tokens)
+    await asyncio.sleep(FAKE_BASE_LATENCY + prompt_tokens * FAKE_TOKEN_LATENCY)
+
+    content = f"Answer to: {body['messages'][-1]['content'][:80]}"
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(content) // 4,
+        "total_tokens": prompt_tokens + len(content) // 4,
+    }
+    if not body.get("stream"):
+        return JSONResponse(
+            {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+        )
+
+    def chunk(delta: dict, finish_reason: str = None) -> str:
+        data = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(data)}\n\n"
+
+    def chunks() -> Iterator[str]:
+        yield chunk({"role": "assistant", "content": ""})
+        for word in content.split(" "):
+            yield chunk({"content": f"{word} "})
+        yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+@contextmanager
+def serve(asgi_app: FastAPI) -> Iterator[str]:
+    """
+    Serve an app on a free local port in a background thread.
+
+    :param asgi_app: The app to serve.
+    :type asgi_app: FastAPI
+    :return: The base URL of the app.
+    :rtype: Iterator[str]
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(asgi_app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+@contextmanager
+def run_fake_model() -> Iterator[str]:
+    """
+    Serve the fake model on a free local port in a background thread.
+
+    :return: The base URL of the fake OpenAI API.
+    :rtype: Iterator[str]
+    """
+    with serve(app) as url:
+        yield f"{url}/v1"
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=8002)
@@ -1,11 +1,21 @@
-from typing import Dict, List, Any
-from nicegui import ui
+from typing import Dict, List, Any, Optional
+from nicegui import app, ui
+import importlib.util
 import traceback
-import requests
 import asyncio
+import httpx
+import json
 
 from variables import (
     BACKEND_URL,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_EXECUTE_TIMEOUT,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_READ_TIMEOUT,
+    HTTP_WRITE_TIMEOUT,
+    TASK_CHANGES_HEARTBEAT,
+    TASK_CHANGES_RETRY_DELAY,
     PRIMARY_COLOR,
     SECONDARY_COLOR,
     NEGATIVE_COLOR,
@@ -51,77 +61,144 @@ class Task:
         self.system_prompt = system_prompt
         self.parameters = parameters
 
+    @classmethod
+    def from_dict(cls, task_data: Dict[str, Any]) -> "Task":
+        """
+        Build a task from its backend JSON representation.
+        :param task_data: Task data returned by the backend.
+        :return: The task.
+        """
+        return cls(
+            id=task_data["id"],
+            name=task_data["name"],
+            system_prompt=task_data["system_prompt"],
+            parameters=[TaskParameter(p["name"]) for p in task_data["parameters"]],
+        )
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create a keep-alive HTTP client for the backend.
+    :return: The HTTP client.
+    """
+    return httpx.AsyncClient(
+        base_url=BACKEND_URL,
+        # HTTP/2 needs the optional 'h2' package (httpx[http2]).
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    )
+
 
 class TaskManager:
     """
-    Task management interface using NiceGUI.
+    Task management interface using NiceGUI, one per browser client.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, client: Optional[httpx.AsyncClient] = None) -> None:
         """
         Initialize the task manager.
+        :param client: HTTP client shared with the other task managers, if any.
         """
         self.tasks: List[Task] = []
         self.current_page = 0
         self.items_per_page = 10
         self.total_tasks = 0
+        self.name_prefix = ""
+
+        # Keyset cursor of each visited page: page N lists tasks after page_cursors[N].
+        self.page_cursors: List[Optional[int]] = [None]
+        self.next_after_id: Optional[int] = None
+        self.tasks_etag: Optional[str] = None
+        self.tasks_query: Optional[Dict[str, Any]] = None
+        self.tasks_version: Optional[int] = None
 
         self.task_table = None
+        self.task_rows: Dict[int, ui.element] = {}
         self.pagination_info = None
         self.loading_spinner = None
         self.prev_button = None
         self.next_button = None
 
+        self.client = client
+        self.changes_task: Optional[asyncio.Task] = None
+
+    def stop_watching(self) -> None:
+        """
+        Stop following the backend change feed.
+        """
+        if self.changes_task:
+            self.changes_task.cancel()
+            self.changes_task = None
+
     async def _perform_request(
-        self, method: str, url: str, **kwargs
-    ) -> requests.Response:
+        self, method: str, url: str, timeout: float = HTTP_READ_TIMEOUT, **kwargs
+    ) -> httpx.Response:
         """
-        A wrapper for requests to handle async execution in NiceGUI.
+        Send a request through the shared keep-alive HTTP client.
         :param method: HTTP method ('get', 'post', 'patch', 'delete').
-        :param url: The URL for the request.
-        :param kwargs: Additional arguments for the requests call.
+        :param url: The URL path of the request, relative to the backend.
+        :param timeout: Timeout of the operation, in seconds.
+        :param kwargs: Additional arguments for the httpx request.
         :return: The response object.
         """
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, lambda: requests.request(method, url, **kwargs)
+        return await self.client.request(
+            method,
+            url,
+            timeout=httpx.Timeout(timeout, connect=HTTP_CONNECT_TIMEOUT),
+            **kwargs,
         )
 
-    async def fetch_tasks(self) -> None:
+    async def fetch_tasks(self) -> bool:
         """
-        Fetch tasks from the backend.
+        Fetch the current page of tasks from the backend.
+        :return: Whether the page changed since the last fetch.
         """
         try:
             if self.loading_spinner:
                 self.loading_spinner.set_visibility(True)
 
+            params = {"limit": self.items_per_page}
+            if self.page_cursors[self.current_page] is not None:
+                params["after_id"] = self.page_cursors[self.current_page]
+            if self.name_prefix:
+                params["name_prefix"] = self.name_prefix
+
+            headers = {}
+            if self.tasks_etag and params == self.tasks_query:
+                headers["If-None-Match"] = self.tasks_etag
+
             response = await self._perform_request(
-                "get", f"{BACKEND_URL}/api/v1/tasks/list"
+                "get", "/api/v1/tasks/list", params=params, headers=headers
             )
+            if response.status_code == 304:
+                return False
             response.raise_for_status()
 
-            tasks_data = response.json()
-            self.tasks = [
-                Task(
-                    id=task_data["id"],
-                    name=task_data["name"],
-                    system_prompt=task_data["system_prompt"],
-                    parameters=[
-                        TaskParameter(p["name"]) for p in task_data["parameters"]
-                    ],
-                )
-                for task_data in tasks_data
-            ]
-            self.total_tasks = len(self.tasks)
-
-            if self.current_page * self.items_per_page >= self.total_tasks:
-                self.current_page = 0
-
-        except requests.RequestException as e:
+            page = response.json()
+            self.tasks = [Task.from_dict(task_data) for task_data in page["items"]]
+            self.total_tasks = page["total"]
+            self.next_after_id = page["next_after_id"]
+            self.tasks_version = page["version"]
+            self.tasks_etag = response.headers.get("ETag")
+            self.tasks_query = params
+
+            # The page emptied (e.g. its last task was deleted); step back one page.
+            if not self.tasks and self.current_page > 0:
+                self.current_page -= 1
+                self.page_cursors = self.page_cursors[: self.current_page + 1]
+                await self.fetch_tasks()
+            return True
+
+        except httpx.HTTPError as e:
             traceback.print_exc()
             ui.notify(
                 f"Failed to fetch tasks: {e}", type="negative", color=NEGATIVE_COLOR
             )
+            return False
         finally:
             if self.loading_spinner:
                 self.loading_spinner.set_visibility(False)
@@ -130,9 +207,165 @@ class TaskManager:
         """
         Get tasks for the current page.
         """
-        start_idx = self.current_page * self.items_per_page
-        end_idx = start_idx + self.items_per_page
-        return self.tasks[start_idx:end_idx]
+        return self.tasks
+
+    def is_next_tasks_version(self, response: httpx.Response) -> bool:
+        """
+        Check whether a write response is the only change since the shown page was
+        fetched, in which case it can be applied locally instead of refetching.
+        :param response: Response of a create, edit or delete request.
+        :return: Whether the write moved the tasks version exactly one step.
+        """
+        version = response.headers.get("X-Tasks-Version")
+        if self.tasks_version is None or version is None:
+            return False
+        if int(version) != self.tasks_version + 1:
+            return False
+        self.tasks_version = int(version)
+        return True
+
+    def is_applied_tasks_version(self, response: httpx.Response) -> bool:
+        """
+        Check whether the change of a write response is already shown, which
+        happens when the change feed delivered it before the response arrived.
+        :param response: Response of a create, edit or delete request.
+        :return: Whether the shown page is at or past the write's tasks version.
+        """
+        version = response.headers.get("X-Tasks-Version")
+        if self.tasks_version is None or version is None:
+            return False
+        return int(version) <= self.tasks_version
+
+    def matches_search(self, task: Task) -> bool:
+        """
+        Check whether a task belongs in the list under the current name search.
+        :param task: The task.
+        :return: Whether the task name starts with the searched prefix.
+        """
+        return task.name.startswith(self.name_prefix)
+
+    def add_task_row(self, task: Task) -> None:
+        """
+        Apply a task creation to the shown page.
+        New tasks have the highest ID, so they only appear on the last page.
+        :param task: The created task.
+        """
+        if not self.matches_search(task):
+            return
+        self.total_tasks += 1
+        if self.next_after_id is None:
+            if len(self.tasks) < self.items_per_page:
+                self.tasks.append(task)
+                if len(self.tasks) == 1:
+                    self.update_task_table()
+                else:
+                    with self.task_table:
+                        self.create_task_row(task)
+            else:
+                self.next_after_id = self.tasks[-1].id
+        self.update_pagination()
+
+    def update_task_row(self, task: Task) -> None:
+        """
+        Apply a task edit to the shown page, redrawing only that task's row.
+        :param task: The edited task.
+        """
+        if task.id not in self.task_rows:
+            return
+        if not self.matches_search(task):
+            self.remove_task_row(task.id)
+            return
+        self.tasks = [task if t.id == task.id else t for t in self.tasks]
+        row = self.task_rows[task.id]
+        row.clear()
+        with row:
+            self.create_task_row_content(task)
+
+    def remove_task_row(self, task_id: int) -> None:
+        """
+        Apply a task deletion to the shown page, removing only that task's row.
+        :param task_id: ID of the deleted task.
+        """
+        if task_id not in self.task_rows:
+            return
+        self.tasks = [t for t in self.tasks if t.id != task_id]
+        self.task_rows.pop(task_id).delete()
+        self.total_tasks -= 1
+        if not self.tasks:
+            self.update_task_table()
+        self.update_pagination()
+
+    async def apply_task_change(self, event: str, data: Any) -> None:
+        """
+        Apply an event of the backend change feed to the shown page.
+        :param event: Event name ('change' or 'reset').
+        :param data: Event payload, the change or the current tasks version.
+        """
+        if self.task_table is None:
+            return
+        # Runs in a background task, so UI calls need an explicit slot.
+        with self.task_table:
+            if event == "reset" or self.tasks_version is None:
+                await self.refresh_tasks()
+                return
+            if event != "change" or data["version"] <= self.tasks_version:
+                return
+            # A rename can move a task into or out of the search results on any page.
+            if data["version"] != self.tasks_version + 1 or (
+                self.name_prefix and data["op"] == "edited"
+            ):
+                await self.refresh_tasks()
+                return
+
+            self.tasks_version = data["version"]
+            task = Task.from_dict(data["task"])
+            if data["op"] == "created":
+                self.add_task_row(task)
+            elif data["op"] == "edited":
+                self.update_task_row(task)
+            elif data["op"] == "deleted":
+                if task.id in self.task_rows:
+                    self.remove_task_row(task.id)
+                    if not self.tasks and self.current_page > 0:
+                        await self.prev_page()
+                elif self.matches_search(task):
+                    self.total_tasks -= 1
+                    self.update_pagination()
+
+    async def watch_task_changes(self) -> None:
+        """
+        Load the task page and keep it current from the backend change feed,
+        reconnecting and replaying missed changes whenever the stream drops.
+        """
+        while True:
+            try:
+                params = {}
+                if self.tasks_version is not None:
+                    params["since"] = self.tasks_version
+                async with self.client.stream(
+                    "GET",
+                    "/api/v1/tasks/changes",
+                    params=params,
+                    # Heartbeats keep a live stream from ever going this long silent.
+                    timeout=httpx.Timeout(
+                        2 * TASK_CHANGES_HEARTBEAT, connect=HTTP_CONNECT_TIMEOUT
+                    ),
+                ) as stream:
+                    stream.raise_for_status()
+                    # Fetch only once subscribed, so no change can slip in between.
+                    if self.tasks_version is None:
+                        await self.apply_task_change("reset", None)
+                    event = None
+                    async for line in stream.aiter_lines():
+                        if line.startswith("event: "):
+                            event = line[len("event: ") :]
+                        elif line.startswith("data: "):
+                            data = json.loads(line[len("data: ") :])
+                            await self.apply_task_change(event, data)
+            except Exception:
+                # Whatever broke the stream, the page must keep following it.
+                traceback.print_exc()
+            await asyncio.sleep(TASK_CHANGES_RETRY_DELAY)
 
     async def create_task(
         self,
@@ -157,17 +390,23 @@ class TaskManager:
             }
 
             response = await self._perform_request(
-                "post", f"{BACKEND_URL}/api/v1/tasks/create", json=task_data
+                "post",
+                "/api/v1/tasks/create",
+                timeout=HTTP_WRITE_TIMEOUT,
+                json=task_data,
             )
             response.raise_for_status()
 
             ui.notify(
                 "Task created successfully!", type="positive", color=POSITIVE_COLOR
             )
-            await self.refresh_tasks()
+            if self.is_next_tasks_version(response):
+                self.add_task_row(Task.from_dict(response.json()))
+            elif not self.is_applied_tasks_version(response):
+                await self.refresh_tasks()
             dialog.close()
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             traceback.print_exc()
             ui.notify(
                 f"Failed to create task: {e}", type="negative", color=NEGATIVE_COLOR
@@ -199,17 +438,23 @@ class TaskManager:
             }
 
             response = await self._perform_request(
-                "patch", f"{BACKEND_URL}/api/v1/tasks/edit/{task_id}", json=task_data
+                "patch",
+                f"/api/v1/tasks/edit/{task_id}",
+                timeout=HTTP_WRITE_TIMEOUT,
+                json=task_data,
             )
             response.raise_for_status()
 
             ui.notify(
                 "Task updated successfully!", type="positive", color=POSITIVE_COLOR
             )
-            await self.refresh_tasks()
+            if self.is_next_tasks_version(response):
+                self.update_task_row(Task.from_dict(response.json()))
+            elif not self.is_applied_tasks_version(response):
+                await self.refresh_tasks()
             dialog.close()
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             traceback.print_exc()
             ui.notify(
                 f"Failed to update task: {e}", type="negative", color=NEGATIVE_COLOR
@@ -225,17 +470,22 @@ class TaskManager:
         try:
             loading_spinner.set_visibility(True)
             response = await self._perform_request(
-                "delete", f"{BACKEND_URL}/api/v1/tasks/delete/{task_id}"
+                "delete", f"/api/v1/tasks/delete/{task_id}", timeout=HTTP_WRITE_TIMEOUT
             )
             response.raise_for_status()
 
             ui.notify(
                 "Task deleted successfully!", type="positive", color=POSITIVE_COLOR
             )
-            await self.refresh_tasks()
+            if self.is_next_tasks_version(response):
+                self.remove_task_row(task_id)
+                if not self.tasks and self.current_page > 0:
+                    await self.prev_page()
+            elif not self.is_applied_tasks_version(response):
+                await self.refresh_tasks()
             dialog.close()
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             traceback.print_exc()
             ui.notify(
                 f"Failed to delete task: {e}", type="negative", color=NEGATIVE_COLOR
@@ -251,31 +501,79 @@ class TaskManager:
         result_container: ui.element,
     ) -> None:
         """
-        Execute a task with given parameters.
+        Execute a task as a backend job, streaming its output as it is generated.
+        Cancelling the calling asyncio task also cancels the job on the backend.
         """
+        job_id = None
         try:
             loading_spinner.set_visibility(True)
             result_container.clear()
 
             response = await self._perform_request(
                 "post",
-                f"{BACKEND_URL}/api/v1/tasks/execute",
+                "/api/v1/jobs/submit",
+                timeout=HTTP_WRITE_TIMEOUT,
                 params={"task_name": task_name},
                 json=parameters,
             )
             response.raise_for_status()
-            result = response.json()
+            job_id = response.json()["id"]
 
             with result_container:
                 with ui.card().classes("w-full").style(
                     f"background-color: {BACKGROUND_COLOR}; border: 1px solid {BORDER_COLOR}"
                 ):
-                    ui.markdown(result["result"]).style(
+                    result_markdown = ui.markdown("").style(
                         f"color: {TEXT_SECONDARY_COLOR}"
                     )
 
-        except requests.RequestException as e:
+            result = ""
+            status = None
+            event = None
+            async with self.client.stream(
+                "GET",
+                f"/api/v1/jobs/stream/{job_id}",
+                timeout=httpx.Timeout(
+                    HTTP_EXECUTE_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT
+                ),
+            ) as stream:
+                stream.raise_for_status()
+                async for line in stream.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: ") :]
+                    elif line.startswith("data: "):
+                        data = json.loads(line[len("data: ") :])
+                        if event == "token":
+                            result += data
+                            result_markdown.set_content(result)
+                        elif event == "status":
+                            status = data
+
+            if status != "done":
+                response = await self._perform_request(
+                    "get", f"/api/v1/jobs/read/{job_id}"
+                )
+                response.raise_for_status()
+                raise httpx.HTTPError(
+                    response.json()["error"] or f"Job finished as {status}"
+                )
+
+        except asyncio.CancelledError:
+            if job_id:
+                try:
+                    await self._perform_request(
+                        "post",
+                        f"/api/v1/jobs/cancel/{job_id}",
+                        timeout=HTTP_WRITE_TIMEOUT,
+                    )
+                except httpx.HTTPError:
+                    traceback.print_exc()
+            with result_container:
+                ui.notify("Execution cancelled.", color=SECONDARY_COLOR)
+            raise
+        except httpx.HTTPError as e:
             traceback.print_exc()
+            result_container.clear()
             with result_container:
                 with ui.card().classes("w-full").style(
                     f"background-color: #fff0f0; border: 1px solid {NEGATIVE_COLOR}"
@@ -292,10 +590,11 @@ class TaskManager:
 
     async def refresh_tasks(self) -> None:
         """
-        Refresh the task list and update UI.
+        Refresh the task list and update UI; the table is only rebuilt when the
+        page changed on the backend.
         """
-        await self.fetch_tasks()
-        self.update_task_table()
+        if await self.fetch_tasks():
+            self.update_task_table()
         self.update_pagination()
 
     def update_task_table(self) -> None:
@@ -304,6 +603,7 @@ class TaskManager:
         """
         if self.task_table:
             self.task_table.clear()
+            self.task_rows = {}
             with self.task_table:
                 self.create_task_table_content()
 
@@ -320,28 +620,35 @@ class TaskManager:
 
             if self.prev_button and self.next_button:
                 self.prev_button.set_enabled(self.current_page > 0)
-                self.next_button.set_enabled(self.current_page < total_pages - 1)
+                self.next_button.set_enabled(self.next_after_id is not None)
 
-    def next_page(self) -> None:
+    async def next_page(self) -> None:
         """
         Navigate to the next page.
         """
-        total_pages = (
-            self.total_tasks + self.items_per_page - 1
-        ) // self.items_per_page
-        if self.current_page < total_pages - 1:
+        if self.next_after_id is not None:
             self.current_page += 1
-            self.update_task_table()
-            self.update_pagination()
+            self.page_cursors = self.page_cursors[: self.current_page]
+            self.page_cursors.append(self.next_after_id)
+            await self.refresh_tasks()
 
-    def prev_page(self) -> None:
+    async def prev_page(self) -> None:
         """
         Navigate to the previous page.
         """
         if self.current_page > 0:
             self.current_page -= 1
-            self.update_task_table()
-            self.update_pagination()
+            await self.refresh_tasks()
+
+    async def search_tasks(self, name_prefix: str) -> None:
+        """
+        Show only the tasks whose name starts with the given prefix.
+        :param name_prefix: Task name prefix, empty to show all tasks.
+        """
+        self.name_prefix = name_prefix.strip()
+        self.current_page = 0
+        self.page_cursors = [None]
+        await self.refresh_tasks()
 
     def _create_dialog_card(self, title: str) -> ui.card:
         """Helper to create a styled dialog card."""
@@ -601,9 +908,18 @@ class TaskManager:
                         loading_spinner.set_visibility(False)
                         result_container = ui.column().classes("w-full")
 
+            execution: Dict[str, Optional[asyncio.Task]] = {"task": None}
+
+            def cancel_execution() -> None:
+                if execution["task"] and not execution["task"].done():
+                    execution["task"].cancel()
+
             ui.separator()
             with ui.row().classes("w-full justify-end p-4 bg-white"):
                 ui.button("Close", on_click=dialog.close).props("flat")
+                ui.button("Cancel", icon="stop", on_click=cancel_execution).props(
+                    "flat"
+                ).style(f"color: {NEGATIVE_COLOR}")
                 ui.button(
                     "Execute",
                     icon="play_arrow",
@@ -612,25 +928,31 @@ class TaskManager:
                         {name: inp.value for name, inp in param_inputs.items()},
                         loading_spinner,
                         result_container,
+                        execution,
                     ),
                     color=PRIMARY_COLOR,
                 ).style("color: #FFFFFF")
+        dialog.on("hide", cancel_execution)
         dialog.open()
 
-    async def handle_execute_task(
+    def handle_execute_task(
         self,
         task_name: str,
         parameters: Dict[str, str],
         loading_spinner: ui.spinner,
         result_container: ui.element,
+        execution: Dict[str, Optional[asyncio.Task]],
     ):
         if any(not value.strip() for value in parameters.values()):
             ui.notify(
                 "All parameters are required.", type="negative", color=NEGATIVE_COLOR
             )
             return
-        await self.execute_task(
-            task_name, parameters, loading_spinner, result_container
+        if execution["task"] and not execution["task"].done():
+            ui.notify("The task is already running.", color=SECONDARY_COLOR)
+            return
+        execution["task"] = asyncio.create_task(
+            self.execute_task(task_name, parameters, loading_spinner, result_container)
         )
 
     def create_task_table_content(self) -> None:
@@ -659,46 +981,58 @@ class TaskManager:
             ui.label("Actions").classes("font-bold text-center").style("flex: 2")
 
         for task in paginated_tasks:
-            with ui.row().classes("w-full items-center p-2 hover:bg-gray-100"):
-                ui.label(task.name).classes("font-medium").style("flex: 2")
+            self.create_task_row(task)
 
-                prompt_text = (
-                    (task.system_prompt[:50] + "...")
-                    if len(task.system_prompt) > 50
-                    else task.system_prompt
-                )
-                ui.label(prompt_text).classes("text-sm").style(
-                    f"color: {TEXT_SECONDARY_COLOR}; flex: 3"
-                )
+    def create_task_row(self, task: Task) -> None:
+        """
+        Create the row of a task, registered by task ID so it can be patched alone.
+        """
+        with ui.column().classes("w-full gap-0") as row:
+            self.create_task_row_content(task)
+        self.task_rows[task.id] = row
 
-                if task.parameters:
-                    param_names = ", ".join([p.name for p in task.parameters])
-                    ui.label(param_names).classes("text-sm").style("flex: 2")
-                else:
-                    ui.label("None").classes("text-sm").style(
-                        f"color: {TEXT_SECONDARY_COLOR}; flex: 2"
-                    )
+    def create_task_row_content(self, task: Task) -> None:
+        """
+        Create the content of a task row.
+        """
+        with ui.row().classes("w-full items-center p-2 hover:bg-gray-100"):
+            ui.label(task.name).classes("font-medium").style("flex: 2")
 
-                with ui.row().classes("justify-center").style("flex: 2"):
-                    ui.button(
-                        icon="play_arrow",
-                        on_click=lambda t=task: self.show_execute_task_dialog(t),
-                    ).props("flat round").style(f"color: {POSITIVE_COLOR}").tooltip(
-                        "Execute"
-                    )
-                    ui.button(
-                        icon="edit",
-                        on_click=lambda t=task: self.show_edit_task_dialog(t),
-                    ).props("flat round").style(f"color: {SECONDARY_COLOR}").tooltip(
-                        "Edit"
-                    )
-                    ui.button(
-                        icon="delete",
-                        on_click=lambda t=task: self.show_delete_confirmation(t),
-                    ).props("flat round").style(f"color: {NEGATIVE_COLOR}").tooltip(
-                        "Delete"
-                    )
-            ui.separator()
+            prompt_text = (
+                (task.system_prompt[:50] + "...")
+                if len(task.system_prompt) > 50
+                else task.system_prompt
+            )
+            ui.label(prompt_text).classes("text-sm").style(
+                f"color: {TEXT_SECONDARY_COLOR}; flex: 3"
+            )
+
+            if task.parameters:
+                param_names = ", ".join([p.name for p in task.parameters])
+                ui.label(param_names).classes("text-sm").style("flex: 2")
+            else:
+                ui.label("None").classes("text-sm").style(
+                    f"color: {TEXT_SECONDARY_COLOR}; flex: 2"
+                )
+
+            with ui.row().classes("justify-center").style("flex: 2"):
+                ui.button(
+                    icon="play_arrow",
+                    on_click=lambda t=task: self.show_execute_task_dialog(t),
+                ).props("flat round").style(f"color: {POSITIVE_COLOR}").tooltip(
+                    "Execute"
+                )
+                ui.button(
+                    icon="edit",
+                    on_click=lambda t=task: self.show_edit_task_dialog(t),
+                ).props("flat round").style(f"color: {SECONDARY_COLOR}").tooltip("Edit")
+                ui.button(
+                    icon="delete",
+                    on_click=lambda t=task: self.show_delete_confirmation(t),
+                ).props("flat round").style(f"color: {NEGATIVE_COLOR}").tooltip(
+                    "Delete"
+                )
+        ui.separator()
 
     def create_main_page(self) -> None:
         """
@@ -711,6 +1045,10 @@ class TaskManager:
         ):
             ui.label("Task Manager").classes("text-2xl font-bold")
             with ui.row().classes("items-center"):
+                ui.input(
+                    placeholder="Search by name...",
+                    on_change=lambda e: self.search_tasks(e.value or ""),
+                ).props("dense outlined clearable debounce=300").classes("w-64")
                 ui.button(
                     "Create Task",
                     icon="add",
@@ -735,18 +1073,42 @@ class TaskManager:
                     "Next", icon="chevron_right", on_click=self.next_page
                 ).props("flat")
 
-        asyncio.create_task(self.refresh_tasks())
+        self.stop_watching()
+        self.changes_task = asyncio.create_task(self.watch_task_changes())
+
+
+http_client: Optional[httpx.AsyncClient] = None
+
+
+async def open_http_client() -> None:
+    """
+    Open the HTTP client shared by the task managers of every page.
+    """
+    global http_client
+    http_client = create_http_client()
+
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP client and its pooled connections.
+    """
+    if http_client:
+        await http_client.aclose()
 
 
-task_manager = TaskManager()
+app.on_startup(open_http_client)
+app.on_shutdown(close_http_client)
 
 
 @ui.page("/")
 def main_page_route():
     """
-    Main page route.
+    Main page route, with a task manager and change feed watcher per client.
     """
+    task_manager = TaskManager(http_client)
     task_manager.create_main_page()
+    # Unlike on_disconnect, which also fires on reconnects, on_delete means the client is gone.
+    ui.context.client.on_delete(task_manager.stop_watching)
 
 
 if __name__ in {"__main__", "__mp_main__"}:
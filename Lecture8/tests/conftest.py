@@ -0,0 +1,108 @@
+from contextlib import asynccontextmanager
+from fastapi.testclient import TestClient
+from agno.run.response import RunEvent
+from types import SimpleNamespace
+from typing import AsyncIterator
+import tempfile
+import asyncio
+import pytest
+import sys
+import os
+
+# The engine is created on import, so the test database must be set first.
+os.environ["DATABASE_URL"] = (
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'tasks.db')}"
+)
+os.environ.setdefault("OPENAI_API_KEY", "test")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend_server
+
+
+class StubAgent:
+    """
+    Local fake of the task executor agent: it answers every prompt with its
+    own words, one token per word, and never calls a model. A prompt
+    containing 'slow' blocks until the run is cancelled.
+    """
+
+    async def arun(self, prompt: str, stream: bool = False, session_id: str = None):
+        """
+        Run the fake agent.
+
+        :param prompt: The prompt.
+        :type prompt: str
+        :param stream: Whether to return the response events one token at a time.
+        :type stream: bool
+        :param session_id: The history scope of the run, unused.
+        :type session_id: str
+        :return: The response, or an async iterator of its events when streaming.
+        """
+        if stream:
+            return self.stream(prompt)
+        return SimpleNamespace(content=prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[SimpleNamespace]:
+        """
+        Stream the words of the prompt as response content events.
+
+        :param prompt: The prompt.
+        :type prompt: str
+        :return: The response events.
+        :rtype: AsyncIterator[SimpleNamespace]
+        """
+        if "slow" in prompt:
+            await asyncio.sleep(3600)
+        for index, word in enumerate(prompt.split(" ")):
+            await asyncio.sleep(0.01)
+            yield SimpleNamespace(
+                event=RunEvent.run_response_content,
+                content=word if index == 0 else f" {word}",
+            )
+
+
+class StubAgentPool:
+    """
+    Agent pool handing out stub agents without limit.
+    """
+
+    @asynccontextmanager
+    async def checkout(
+        self, session_id: str, keep_history: bool = True
+    ) -> AsyncIterator[StubAgent]:
+        yield StubAgent()
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    """
+    Client of the backend, running its job workers with stub agents.
+
+    :return: The test client.
+    :rtype: TestClient
+    """
+    backend_server.agent_pool = StubAgentPool()
+    with TestClient(backend_server.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def task_name(client: TestClient) -> str:
+    """
+    Name of a task with a single 'topic' parameter and no result cache.
+
+    :param client: The test client.
+    :type client: TestClient
+    :return: The task name.
+    :rtype: str
+    """
+    response = client.post(
+        "/api/v1/tasks/create",
+        json={
+            "name": "jobs-test",
+            "system_prompt": "Write about",
+            "parameters": [{"name": "topic"}],
+        },
+    )
+    response.raise_for_status()
+    return "jobs-test"
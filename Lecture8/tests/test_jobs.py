@@ -0,0 +1,145 @@
+from fastapi.testclient import TestClient
+from typing import List, Tuple
+import sqlite3
+import asyncio
+import pytest
+import json
+import time
+import os
+
+import backend_server
+
+PROMPT = "Write about\n\nParameters:\ntopic: {topic}"
+
+
+def submit(client: TestClient, task_name: str, topic: str) -> dict:
+    response = client.post(
+        "/api/v1/jobs/submit", params={"task_name": task_name}, json={"topic": topic}
+    )
+    assert response.status_code == 202, response.text
+    return response.json()
+
+
+def wait_for(client: TestClient, job_id: str, statuses: set) -> dict:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/v1/jobs/read/{job_id}").json()
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} never reached {statuses}")
+
+
+def read_events(client: TestClient, job_id: str) -> List[Tuple[str, object]]:
+    events = []
+    with client.stream("GET", f"/api/v1/jobs/stream/{job_id}") as response:
+        assert response.status_code == 200
+        for block in response.read().decode().split("\n\n"):
+            if block:
+                event, data = block.split("\n")
+                events.append(
+                    (event[len("event: ") :], json.loads(data[len("data: ") :]))
+                )
+    return events
+
+
+def test_submit_and_poll(client: TestClient, task_name: str) -> None:
+    job = submit(client, task_name, "polling")
+    assert job["status"] == "queued"
+
+    job = wait_for(client, job["id"], {"done"})
+    assert job["result"] == PROMPT.format(topic="polling")
+    assert job["error"] is None
+
+
+def test_submit_unknown_task(client: TestClient) -> None:
+    response = client.post("/api/v1/jobs/submit", params={"task_name": "missing"})
+    assert response.status_code == 404
+
+
+def test_stream(client: TestClient, task_name: str) -> None:
+    job = submit(client, task_name, "streaming")
+
+    events = read_events(client, job["id"])
+    tokens = "".join(data for event, data in events if event == "token")
+    assert tokens == PROMPT.format(topic="streaming")
+    assert events[-1] == ("status", "done")
+
+    # A finished job replays its result.
+    assert read_events(client, job["id"]) == [
+        ("token", PROMPT.format(topic="streaming")),
+        ("status", "done"),
+    ]
+
+
+def test_cancel(client: TestClient, task_name: str) -> None:
+    job = submit(client, task_name, "slow")
+    wait_for(client, job["id"], {"running"})
+
+    response = client.post(f"/api/v1/jobs/cancel/{job['id']}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert read_events(client, job["id"])[-1] == ("status", "cancelled")
+
+    response = client.post(f"/api/v1/jobs/cancel/{job['id']}")
+    assert response.status_code == 409
+
+
+def test_cancel_before_job_starts(
+    client: TestClient, task_name: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    run_job = backend_server.run_job
+
+    async def delayed_run_job(job_id: str) -> None:
+        # The worker is busy elsewhere until the job is cancelled.
+        await asyncio.sleep(3600)
+        await run_job(job_id)
+
+    monkeypatch.setattr(backend_server, "run_job", delayed_run_job)
+    job = submit(client, task_name, "delayed")
+    deadline = time.monotonic() + 10
+    while job["id"] not in backend_server.running_jobs:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    # The job task exists but never reached the handlers of run_job.
+    response = client.post(f"/api/v1/jobs/cancel/{job['id']}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert job["id"] not in backend_server.cancel_requested
+    assert read_events(client, job["id"])[-1] == ("status", "cancelled")
+
+
+class FilledQueue(asyncio.Queue):
+    """
+    Queue that fills up between the check of submit_job and its enqueue.
+    """
+
+    def full(self) -> bool:
+        return False
+
+    def put_nowait(self, item: str) -> None:
+        raise asyncio.QueueFull
+
+
+def test_queue_filled_after_check(client: TestClient, task_name: str) -> None:
+    job_queue = backend_server.job_queue
+    backend_server.job_queue = FilledQueue()
+    try:
+        response = client.post(
+            "/api/v1/jobs/submit",
+            params={"task_name": task_name},
+            json={"topic": "overflow"},
+        )
+    finally:
+        backend_server.job_queue = job_queue
+    assert response.status_code == 503
+
+    # The stored job is failed rather than left queued with no worker to run it.
+    database = os.environ["DATABASE_URL"].split("///", 1)[1]
+    with sqlite3.connect(database) as conn:
+        statuses = conn.execute(
+            "SELECT status, error FROM jobs WHERE prompt = ?",
+            (PROMPT.format(topic="overflow"),),
+        ).fetchall()
+    assert statuses == [("failed", "Job queue is full")]
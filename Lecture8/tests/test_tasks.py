@@ -0,0 +1,39 @@
+from fastapi.testclient import TestClient
+import sys
+
+
+def create_task(client: TestClient, name: str) -> None:
+    response = client.post(
+        "/api/v1/tasks/create",
+        json={"name": name, "system_prompt": "Write", "parameters": []},
+    )
+    response.raise_for_status()
+
+
+def test_list_name_prefix_ending_in_last_code_point(client: TestClient) -> None:
+    last = chr(sys.maxunicode)
+    create_task(client, f"prefix{last}")
+    create_task(client, f"prefix{last}{last}")
+    create_task(client, "prefixa")
+
+    response = client.get("/api/v1/tasks/list", params={"name_prefix": f"prefix{last}"})
+    assert response.status_code == 200
+    names = [task["name"] for task in response.json()["items"]]
+    assert names == [f"prefix{last}", f"prefix{last}{last}"]
+
+    response = client.get("/api/v1/tasks/list", params={"name_prefix": last})
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+
+def test_list_if_none_match_lists(client: TestClient) -> None:
+    etag = client.get("/api/v1/tasks/list").headers["etag"]
+
+    for if_none_match in [etag, f'"other", {etag}', etag.removeprefix("W/"), "*"]:
+        response = client.get(
+            "/api/v1/tasks/list", headers={"If-None-Match": if_none_match}
+        )
+        assert response.status_code == 304, if_none_match
+
+    response = client.get("/api/v1/tasks/list", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
@@ -0,0 +1,143 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import statistics
+import argparse
+import random
+import time
+import os
+
+from main import init_conversion_worker, process_link
+
+
+def build_corpus(pages: int, sections: int, seed: int = 0) -> dict[str, bytes]:
+    """
+    Generates documentation-like HTML pages, with headings, paragraphs, code
+    blocks and tables for docling to convert.
+
+    :param pages: Number of pages.
+    :type pages: int
+    :param sections: Number of sections per page.
+    :type sections: int
+    :param seed: Seed of the generated text.
+    :type seed: int
+    :return: The content of each page, keyed by a local URL.
+    :rtype: dict[str, bytes]
+    """
+    rng = random.Random(seed)
+    words = "client request response token audio model file stream error retry".split()
+    corpus = {}
+    for page in range(pages):
+        body = []
+        for section in range(sections):
+            text = " ".join(rng.choice(words) for _ in range(120))
+            rows = "".join(
+                f"<tr><td>param_{row}</td><td>{rng.choice(words)}</td></tr>"
+                for row in range(5)
+            )
+            body.append(
+                f"<h2>Section {section}</h2><p>{text}.</p>"
+                f"<pre><code>client.{rng.choice(words)}.create(model='m')</code></pre>"
+                f"<table><tr><th>Name</th><th>Type</th></tr>{rows}</table>"
+            )
+        corpus[f"http://docs.local/page-{page}.html"] = (
+            f"<html><head><title>Page {page}</title></head>"
+            f"<body><h1>Page {page}</h1>{''.join(body)}</body></html>"
+        ).encode()
+    return corpus
+
+
+def load_corpus(directory: str) -> dict[str, bytes]:
+    """
+    Reads saved HTML pages to convert instead of generated ones.
+
+    :param directory: Directory of the .html files.
+    :type directory: str
+    :return: The content of each page, keyed by a local URL.
+    :rtype: dict[str, bytes]
+    """
+    corpus = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), "rb") as file:
+                corpus[f"http://docs.local/{name}"] = file.read()
+    return corpus
+
+
+def convert_corpus(pool: Executor, corpus: dict[str, bytes]) -> int:
+    """
+    Converts and chunks every page of the corpus on a pool.
+
+    :param pool: The thread or process pool, with initialized conversion workers.
+    :type pool: Executor
+    :param corpus: The content of each page, keyed by URL.
+    :type corpus: dict[str, bytes]
+    :return: The number of chunks produced.
+    :rtype: int
+    """
+    futures = [
+        pool.submit(process_link, link, content, "text/html")
+        for link, content in corpus.items()
+    ]
+    return sum(len(future.result()[1] or []) for future in futures)
+
+
+def main() -> None:
+    """
+    Measures the pages per second of the document conversion and chunking on
+    a local HTML corpus with a thread pool, as the pipeline did before, and
+    with the process pool it uses now, at several worker counts.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--corpus", help="Directory of saved .html pages")
+    parser.add_argument("--pages", type=int, default=64)
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = build_corpus(args.pages, args.sections)
+    initargs = (args.chunk_size, args.chunk_overlap)
+    pools = {
+        # Threads share the module converter, as the joblib threading backend did.
+        "threads": lambda workers: ThreadPoolExecutor(
+            max_workers=workers,
+            initializer=init_conversion_worker,
+            initargs=initargs,
+        ),
+        "processes": lambda workers: ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_conversion_worker,
+            initargs=initargs,
+        ),
+    }
+
+    print(
+        f"{len(corpus)} pages, {sum(map(len, corpus.values())) / 1024:.0f} KiB "
+        f"on {os.cpu_count()} CPUs"
+    )
+    print(f"{'pool':<10} {'workers':>7} {'chunks':>7} {'seconds':>8} {'pages/s':>8}")
+    for workers in args.workers:
+        for name, make_pool in pools.items():
+            with make_pool(workers) as pool:
+                # Starts the workers and loads the converter models untimed.
+                convert_corpus(pool, dict(list(corpus.items())[:workers]))
+                durations = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    chunks = convert_corpus(pool, corpus)
+                    durations.append(time.perf_counter() - started)
+            elapsed = statistics.median(durations)
+            print(
+                f"{name:<10} {workers:>7} {chunks:>7} {elapsed:>8.2f} "
+                f"{len(corpus) / elapsed:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager
+from functools import partial
+from typing import Iterator
+import statistics
+import threading
+import argparse
+import tempfile
+import asyncio
+import random
+import httpx
+import time
+import os
+
+from crawler import Crawler
+
+
+class SlowHandler(SimpleHTTPRequestHandler):
+    """
+    Serves static files over keep-alive HTTP/1.1 after a fixed delay, standing
+    in for the network latency of a documentation site.
+    """
+
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def do_GET(self) -> None:
+        time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def build_site(directory: str, pages: int, links: int, seed: int = 0) -> None:
+    """
+    Writes a static site where every page links to the next `links` pages of a
+    tree and to a few random pages, as documentation navigation does.
+
+    :param directory: Directory to write the pages to.
+    :type directory: str
+    :param pages: Number of pages.
+    :type pages: int
+    :param links: Number of child pages linked from each page.
+    :type links: int
+    :param seed: Seed of the random links.
+    :type seed: int
+    """
+    rng = random.Random(seed)
+    for page in range(pages):
+        children = range(page * links + 1, min(page * links + links + 1, pages))
+        targets = list(children) + rng.sample(range(pages), min(3, pages))
+        anchors = "".join(
+            f'<li><a href="page-{target}.html">Page {target}</a></li>'
+            for target in targets
+        )
+        paragraph = f"<p>Documentation of page {page}. </p>" * 20
+        with open(os.path.join(directory, f"page-{page}.html"), "w") as file:
+            file.write(
+                f"<html><head><title>Page {page}</title></head><body>"
+                f"<nav><ul>{anchors}</ul></nav>{paragraph}</body></html>"
+            )
+
+
+@contextmanager
+def serve_site(directory: str, latency: float) -> Iterator[str]:
+    """
+    Serves a directory on a free local port in a background thread.
+
+    :param directory: The directory to serve.
+    :type directory: str
+    :param latency: Seconds to wait before answering each request.
+    :type latency: float
+    :return: The base URL of the site.
+    :rtype: Iterator[str]
+    """
+    handler = partial(
+        type("Handler", (SlowHandler,), {"latency": latency}), directory=directory
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def legacy_crawl(seed: str, depth: int) -> tuple[list[str], int]:
+    """
+    Crawls the way the pipeline did before the async crawler: every page of a
+    level is downloaded one after the other, each on a new connection, and a
+    page linked from several levels is downloaded again at each of them.
+
+    :param seed: The URL to start from.
+    :type seed: str
+    :param depth: Number of link levels to follow.
+    :type depth: int
+    :return: The pages found and the number of downloads.
+    :rtype: tuple[list[str], int]
+    """
+    parser = Crawler()
+    links = [seed]
+    downloads = 0
+    for _ in range(depth):
+        extracted_links = []
+        for link in links:
+            response = httpx.get(link, timeout=30)
+            response.raise_for_status()
+            downloads += 1
+            extracted_links.extend(dict.fromkeys(parser.parse_links(response)))
+        links = list(set(extracted_links))
+    return links, downloads
+
+
+async def main() -> None:
+    """
+    Measures the pages per second of the documentation crawl against a local
+    static HTTP server with a simulated latency, crawling sequentially as
+    before and with the async frontier crawler at several concurrencies.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--links", type=int, default=5, help="Child pages per page")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 16, 32])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        build_site(directory, args.pages, args.links)
+        with serve_site(directory, args.latency) as url:
+            seed = f"{url}/page-0.html"
+            runs = [("sequential", None)] + [
+                (f"async x{concurrency}", concurrency)
+                for concurrency in args.concurrency
+            ]
+
+            print(
+                f"{'crawler':<12} {'found':>6} {'downloads':>9} "
+                f"{'seconds':>8} {'pages/s':>8}"
+            )
+            for name, concurrency in runs:
+                durations = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    if concurrency is None:
+                        found, downloads = await asyncio.to_thread(
+                            legacy_crawl, seed, args.depth
+                        )
+                    else:
+                        crawler = Crawler(
+                            max_depth=args.depth,
+                            max_pages=args.pages,
+                            concurrency=concurrency,
+                            per_host_concurrency=concurrency,
+                            respect_robots=False,
+                        )
+                        found = await crawler.crawl([seed])
+                        downloads = crawler.pages_fetched
+                    durations.append(time.perf_counter() - started)
+                elapsed = statistics.median(durations)
+                print(
+                    f"{name:<12} {len(found):>6} {downloads:>9} "
+                    f"{elapsed:>8.2f} {downloads / elapsed:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
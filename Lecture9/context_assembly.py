@@ -0,0 +1,171 @@
+from agno.document import Document
+import math
+import re
+
+
+CONTEXT_SEPARATOR = "\n----------------------------------------------\n"
+# Dotted names (e.g. 'openai.OpenAI'), snake_case names and URLs: what
+# generated code copies from the documentation.
+API_REFERENCE_PATTERN = re.compile(
+    r"https?://[^\s)\"'`>]+|[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+|[A-Za-z]\w*_\w+"
+)
+# 'import a.b as c, d' and 'from a import (b as c, d)' statements.
+IMPORT_PATTERN = re.compile(
+    r"^[ \t]*(?:from[ \t]+[\w.]+[ \t]+import[ \t]+(\([^)]*\)|[^\n#]+)|import[ \t]+([^\n#]+))",
+    re.MULTILINE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of tokens of a text, at about four characters per token.
+
+    :param text: The text.
+    :type text: str
+    :return: The estimated number of tokens.
+    :rtype: int
+    """
+    return (len(text) + 3) // 4
+
+
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    """
+    Computes the cosine similarity of two vectors.
+
+    :param a: The first vector.
+    :type a: list[float]
+    :param b: The second vector.
+    :type b: list[float]
+    :return: The similarity, between -1 and 1, or 0 if a vector is null.
+    :rtype: float
+    """
+    norm = math.sqrt(sum(x * x for x in a) * sum(y * y for y in b))
+    return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+
+def assemble_context(
+    documents: list[Document],
+    query_embedding: list[float],
+    token_budget: int,
+    duplicate_threshold: float = 0.95,
+    relevance_weight: float = 0.7,
+) -> list[str]:
+    """
+    Selects the retrieved chunks to send as context: near-duplicates are
+    removed, then chunks are picked by maximal marginal relevance, balancing
+    their similarity to the query against their similarity to the chunks
+    already picked, until the token budget is spent.
+
+    :param documents: The retrieved chunks, with their embeddings.
+    :type documents: list[Document]
+    :param query_embedding: The embedding of the query.
+    :type query_embedding: list[float]
+    :param token_budget: Maximum number of tokens of the selected chunks.
+    :type token_budget: int
+    :param duplicate_threshold: Similarity above which two chunks are duplicates.
+    :type duplicate_threshold: float
+    :param relevance_weight: Weight of the relevance against the diversity, from 0 to 1.
+    :type relevance_weight: float
+    :return: The content of the selected chunks, most relevant first.
+    :rtype: list[str]
+    """
+    unique: list[Document] = []
+    seen_texts = set()
+    for document in documents:
+        text = " ".join(document.content.casefold().split())
+        if text in seen_texts or any(
+            cosine_similarity(document.embedding, kept.embedding) >= duplicate_threshold
+            for kept in unique
+        ):
+            continue
+        seen_texts.add(text)
+        unique.append(document)
+
+    relevance = [cosine_similarity(query_embedding, doc.embedding) for doc in unique]
+    redundancy = [0.0] * len(unique)
+    remaining = list(range(len(unique)))
+    selected = []
+    tokens = 0
+    while remaining:
+        best = max(
+            remaining,
+            key=lambda i: relevance_weight * relevance[i]
+            - (1 - relevance_weight) * redundancy[i],
+        )
+        remaining.remove(best)
+        chunk_tokens = estimate_tokens(unique[best].content)
+        if tokens + chunk_tokens > token_budget:
+            continue
+        tokens += chunk_tokens
+        selected.append(unique[best].content)
+        for i in remaining:
+            redundancy[i] = max(
+                redundancy[i],
+                cosine_similarity(unique[i].embedding, unique[best].embedding),
+            )
+    return selected
+
+
+def format_context(chunks: list[str]) -> str:
+    """
+    Formats the context chunks into the block prepended to the agent prompts.
+
+    :param chunks: The content of the context chunks.
+    :type chunks: list[str]
+    :return: The context block, empty if there are no chunks.
+    :rtype: str
+    """
+    if not chunks:
+        return ""
+    return f"Context:\n{CONTEXT_SEPARATOR.join(chunks)}{CONTEXT_SEPARATOR}"
+
+
+def imported_names(code: str) -> set[str]:
+    """
+    Finds the names a code binds with its import statements.
+
+    :param code: The code.
+    :type code: str
+    :return: The imported names, aliases included.
+    :rtype: set[str]
+    """
+    names = set()
+    for from_names, import_names in IMPORT_PATTERN.findall(code):
+        for alias in (from_names or import_names).strip("()\\ \t\n").split(","):
+            parts = alias.split()
+            if parts:
+                # 'import a.b' binds 'a', 'import a.b as c' binds 'c'.
+                names.add(parts[-1] if len(parts) == 3 else parts[0].split(".")[0])
+    return names
+
+
+def select_merge_context(chunks: list[str], candidates: dict[str, str]) -> list[str]:
+    """
+    Selects the context chunks the code merger still needs: those documenting
+    an API, name or URL that a generated code uses, so the merger can check
+    it. The other chunks were already used by the generators and are dropped.
+    Dotted names only count when they start with a name the code imports, so
+    attributes of local objects such as 'self.client' do not match.
+
+    :param chunks: The content of the context chunks given to the generators.
+    :type chunks: list[str]
+    :param candidates: The generated code of each code type.
+    :type candidates: dict[str, str]
+    :return: The content of the chunks to keep, in their original order.
+    :rtype: list[str]
+    """
+    used = set()
+    for code in candidates.values():
+        imported = imported_names(code)
+        used.update(
+            reference
+            for reference in API_REFERENCE_PATTERN.findall(code)
+            if "." not in reference
+            or reference.startswith("http")
+            or reference.split(".")[0] in imported
+        )
+    return [
+        chunk
+        for chunk in chunks
+        if any(reference in used for reference in API_REFERENCE_PATTERN.findall(chunk))
+    ]
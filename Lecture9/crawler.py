@@ -0,0 +1,314 @@
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+from lxml import etree, html
+import importlib.util
+import traceback
+import asyncio
+import httpx
+import time
+
+
+USER_AGENT = "Lecture9Crawler/1.0"
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so that equivalent spellings deduplicate to the same string.
+
+    The scheme and host are lowercased, default ports, fragments and empty
+    query values are dropped, query parameters are sorted and an empty path
+    becomes '/'.
+
+    :param url: The absolute URL to normalize.
+    :type url: str
+    :return: The normalized URL.
+    :rtype: str
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+class Crawler:
+    """
+    Breadth-first asynchronous crawler that collects the documentation pages
+    reachable from a set of seed URLs.
+
+    Pages are fetched through one pooled HTTP client, at most
+    `per_host_concurrency` at a time per host, only on the seed hosts (and
+    their subdomains) and only where robots.txt allows it. Links are
+    deduplicated after normalization. `link_cache` maps a page URL to its
+    validators and links: pages that answer a conditional GET with 304 reuse
+    the cached links instead of being downloaded and parsed again. The pages
+    downloaded are kept in `responses` for the later stages to reuse.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = 1,
+        max_pages: int = 500,
+        concurrency: int = 16,
+        per_host_concurrency: int = 4,
+        timeout: float = 30,
+        same_domain: bool = True,
+        respect_robots: bool = True,
+        link_cache: dict[str, dict] | None = None,
+    ) -> None:
+        """
+        Initializes the crawler.
+
+        :param max_depth: Link depth to follow, seeds are at depth 0.
+        :type max_depth: int
+        :param max_pages: Maximum number of pages to download.
+        :type max_pages: int
+        :param concurrency: Maximum number of pages fetched at once.
+        :type concurrency: int
+        :param per_host_concurrency: Maximum number of pages fetched at once per host.
+        :type per_host_concurrency: int
+        :param timeout: Timeout of each request, in seconds.
+        :type timeout: float
+        :param same_domain: Whether to stay on the seed hosts and their subdomains.
+        :type same_domain: bool
+        :param respect_robots: Whether to skip the pages robots.txt disallows.
+        :type respect_robots: bool
+        :param link_cache: Validators and links of previously crawled pages, updated in place.
+        :type link_cache: dict[str, dict] | None
+        """
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.timeout = timeout
+        self.same_domain = same_domain
+        self.respect_robots = respect_robots
+        self.link_cache = {} if link_cache is None else link_cache
+
+        self.client: httpx.AsyncClient | None = None
+        self.seed_hosts: set[str] = set()
+        self.seen: set[str] = set()
+        self.found: list[str] = []
+        self.responses: dict[str, httpx.Response] = {}
+        self.host_limits: dict[str, asyncio.Semaphore] = {}
+        self.robots: dict[str, asyncio.Task] = {}
+
+        self.pages_fetched = 0
+        self.pages_not_modified = 0
+        self.elapsed = 0.0
+
+    def in_scope(self, url: str) -> bool:
+        """
+        Checks whether a URL may be crawled, ignoring robots.txt.
+
+        :param url: The normalized URL.
+        :type url: str
+        :return: True if the URL is HTTP(S) and, when scoped, on a seed host.
+        :rtype: bool
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return False
+        if not self.same_domain:
+            return True
+        host = parts.hostname or ""
+        return any(
+            host == seed or host.endswith(f".{seed}") for seed in self.seed_hosts
+        )
+
+    def enqueue(self, frontier: asyncio.Queue, url: str, depth: int) -> None:
+        """
+        Adds a URL to the frontier unless it was already seen or is out of scope.
+
+        :param frontier: The queue of (url, depth) pairs to visit.
+        :type frontier: asyncio.Queue
+        :param url: The absolute URL.
+        :type url: str
+        :param depth: Link depth of the URL.
+        :type depth: int
+        """
+        url = normalize_url(url)
+        if url in self.seen or not self.in_scope(url):
+            return
+        self.seen.add(url)
+        frontier.put_nowait((url, depth))
+
+    async def load_robots(self, origin: str) -> RobotFileParser:
+        """
+        Downloads and parses the robots.txt of an origin.
+
+        :param origin: Scheme and host of the site, e.g. 'https://docs.python.org'.
+        :type origin: str
+        :return: The parsed rules; a missing robots.txt allows everything.
+        :rtype: RobotFileParser
+        """
+        robots = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            response = await self.client.get(robots.url)
+            if response.status_code in (401, 403):
+                robots.disallow_all = True
+            elif response.status_code < 400:
+                robots.parse(response.text.splitlines())
+            else:
+                robots.allow_all = True
+        except httpx.HTTPError as e:
+            print(f"Failed to read '{robots.url}': {str(e)}")
+            robots.allow_all = True
+        return robots
+
+    async def is_allowed(self, url: str) -> bool:
+        """
+        Checks a URL against the robots.txt of its site, fetched once per site.
+
+        :param url: The normalized URL.
+        :type url: str
+        :return: True if the crawler may fetch the URL.
+        :rtype: bool
+        """
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self.robots:
+            self.robots[origin] = asyncio.create_task(self.load_robots(origin))
+        robots = await self.robots[origin]
+        return robots.can_fetch(USER_AGENT, url)
+
+    def parse_links(self, response: httpx.Response) -> list[str]:
+        """
+        Extracts the absolute URLs of every link in an HTML page.
+
+        :param response: The page response.
+        :type response: httpx.Response
+        :return: The links, in document order.
+        :rtype: list[str]
+        """
+        try:
+            document = html.fromstring(response.content)
+        except (etree.ParserError, ValueError):
+            return []
+
+        base_url = str(response.url)
+        base_href = document.xpath("string(//base/@href)")
+        if base_href:
+            base_url = urljoin(base_url, base_href)
+
+        links = []
+        for href in document.xpath("//a/@href"):
+            try:
+                links.append(urljoin(base_url, href.strip()))
+            except ValueError:
+                continue
+        return links
+
+    async def fetch_links(self, url: str) -> list[str]:
+        """
+        Fetches a page, with a conditional GET when it was crawled before, and
+        returns its links.
+
+        :param url: The normalized URL of the page.
+        :type url: str
+        :return: The links found in the page, empty if it is not HTML or failed.
+        :rtype: list[str]
+        """
+        cached = self.link_cache.get(url, {})
+        headers = {}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        host = urlsplit(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+
+        try:
+            async with self.host_limits[host]:
+                response = await self.client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            print(f"Request failed for URL '{url}': {str(e)}")
+            return []
+
+        if response.status_code == 304 and "links" in cached:
+            self.pages_not_modified += 1
+            return cached["links"]
+        if response.is_error:
+            print(f"HTTP error {response.status_code} occurred for URL '{url}'")
+            return []
+
+        self.pages_fetched += 1
+        self.responses[url] = response
+        links = []
+        if "html" in response.headers.get("content-type", ""):
+            links = self.parse_links(response)
+
+        self.link_cache[url] = {
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "links": links,
+        }
+        return links
+
+    async def worker(self, frontier: asyncio.Queue) -> None:
+        """
+        Visits the URLs of the frontier until the crawl is cancelled.
+
+        :param frontier: The queue of (url, depth) pairs to visit.
+        :type frontier: asyncio.Queue
+        """
+        while True:
+            url, depth = await frontier.get()
+            try:
+                if not await self.is_allowed(url):
+                    continue
+                self.found.append(url)
+                if depth < self.max_depth and self.pages_fetched < self.max_pages:
+                    for link in await self.fetch_links(url):
+                        self.enqueue(frontier, link, depth + 1)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                frontier.task_done()
+
+    async def crawl(self, seeds: list[str]) -> list[str]:
+        """
+        Crawls from the seed URLs and returns every page found within the depth limit.
+
+        :param seeds: The URLs to start from.
+        :type seeds: list[str]
+        :return: The normalized URLs of the pages found, seeds included.
+        :rtype: list[str]
+        """
+        started = time.perf_counter()
+        self.seed_hosts = {urlsplit(normalize_url(seed)).hostname for seed in seeds}
+
+        frontier: asyncio.Queue = asyncio.Queue()
+        async with httpx.AsyncClient(
+            # HTTP/2 needs the optional 'h2' package (httpx[http2]).
+            http2=importlib.util.find_spec("h2") is not None,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=self.concurrency),
+            timeout=self.timeout,
+        ) as client:
+            self.client = client
+            for seed in seeds:
+                self.enqueue(frontier, seed, 0)
+
+            workers = [
+                asyncio.create_task(self.worker(frontier))
+                for _ in range(self.concurrency)
+            ]
+            try:
+                await frontier.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                self.client = None
+
+        self.elapsed = time.perf_counter() - started
+        return self.found
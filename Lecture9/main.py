@@ -1,17 +1,30 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from docling.document_converter import DocumentConverter
+from docling.datamodel.base_models import DocumentStream
 from agno.tools.bravesearch import BraveSearchTools
 from semantic_text_splitter import TextSplitter
 from agno.embedder.openai import OpenAIEmbedder
 from agno.models.openai import OpenAIChat
 from agno.vectordb.qdrant import Qdrant
+from agno.run.response import RunEvent
 from qdrant_client.http import models
+from pydantic import BaseModel, Field
 from joblib import Parallel, delayed
 from agno.document import Document
+from urllib.parse import urlsplit
+from collections import Counter
 from dotenv import load_dotenv
 from agno.agent import Agent
+from io import BytesIO
+import multiprocessing
 import traceback
-import requests
+import mimetypes
+import asyncio
+import hashlib
 import pprint
+import httpx
+import time
+import json
 import os
 
 
@@ -22,67 +35,20 @@ from prompts import (
     CODE_GENERATOR_ROBUSTNESS_PROMPT,
     CODE_MERGER_PROMPT,
 )
-
-
-def extract_urls_from_webpage(url: str) -> list[str]:
-    """
-    Extracts all URLs from a given webpage.
-
-    :param url: The URL of the webpage to extract URLs from.
-    :type url: str
-    :raises ValueError: If the URL is empty or invalid.
-    :raises ConnectionError: If unable to connect to the URL.
-    :raises TimeoutError: If the request times out.
-    :return: A list of URLs found in the webpage.
-    :rtype: list[str]
-    """
-    if not url or not isinstance(url, str):
-        raise ValueError("URL must be a non-empty string")
-
-    try:
-        import requests
-        from urllib.parse import urljoin, urlparse
-        from bs4 import BeautifulSoup
-
-        # Send GET request to the URL
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        # Parse the HTML content
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # Find all anchor tags with href attributes
-        links = soup.find_all("a", href=True)
-
-        # Extract and normalize URLs
-        extracted_urls = []
-        for link in links:
-            href = link["href"]
-            # Convert relative URLs to absolute URLs
-            absolute_url = urljoin(url, href)
-
-            # Validate the URL format
-            parsed_url = urlparse(absolute_url)
-            if parsed_url.scheme in ("http", "https"):
-                extracted_urls.append(absolute_url)
-
-        # Remove duplicates while preserving order
-        unique_urls = list(dict.fromkeys(extracted_urls))
-
-        return unique_urls
-
-    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
-        traceback.print_exc()
-        raise ConnectionError(f"Failed to connect to URL '{url}': {str(e)}")
-    except requests.exceptions.HTTPError as e:
-        traceback.print_exc()
-        raise ConnectionError(f"HTTP error occurred for URL '{url}': {str(e)}")
-    except requests.exceptions.RequestException as e:
-        traceback.print_exc()
-        raise ConnectionError(f"Request failed for URL '{url}': {str(e)}")
-    except ImportError as e:
-        traceback.print_exc()
-        raise ImportError(f"Required packages not installed: {str(e)}")
+from validation import (
+    extract_code,
+    validate_candidates,
+    validate_code,
+)
+from context_assembly import (
+    assemble_context,
+    estimate_tokens,
+    format_context,
+    select_merge_context,
+)
+from manifest import PAGE_CHANGED, PAGE_GONE, CrawlManifest
+from tech_cache import TechURLCache
+from crawler import Crawler
 
 
 def create_qdrant_table(
@@ -110,25 +76,508 @@ def create_qdrant_table(
         )
 
 
-def process_link(vector_db: Qdrant, link: str) -> list[Document]:
+class TechnologyURL(BaseModel):
+    """
+    Documentation URL found for a technology.
+    """
+
+    technology: str = Field(..., description="Name of the technology, library or tool")
+    url: str = Field(..., description="URL of the technology's documentation")
+
+
+class TechnologyURLs(BaseModel):
+    """
+    Structured output of the tech extractor agent.
+    """
+
+    technologies: list[TechnologyURL]
+
+
+def resolve_technology_urls(agent: Agent, cache: TechURLCache, query: str) -> list[str]:
+    """
+    Finds the documentation URL of every technology in a query, running the
+    extractor agent and its searches only for what the cache cannot answer.
+
+    :param agent: The tech extractor agent, with TechnologyURLs as response model.
+    :type agent: Agent
+    :param cache: The technology URL cache.
+    :type cache: TechURLCache
+    :param query: The user query.
+    :type query: str
+    :return: The documentation URLs.
+    :rtype: list[str]
+    """
+    technologies = cache.get_query_technologies(query)
+    run_agent = technologies is None
+    if technologies is None:
+        technologies = cache.find_mentioned(query)
+
+    urls = {}
+    for technology in technologies:
+        url = cache.get_url(technology)
+        if url:
+            urls[technology] = url
+        else:
+            run_agent = True
+    cached = len(urls)
+
+    if run_agent:
+        message = (
+            f"Extract technologies from this query and find relevant URLs: {query}"
+        )
+        if urls:
+            message += (
+                f"\nAlready resolved, do not search for or return: {', '.join(urls)}"
+            )
+        response = agent.run(message)
+        if isinstance(response.content, TechnologyURLs):
+            for item in response.content.technologies:
+                urls[item.technology] = item.url
+                cache.put_url(item.technology, item.url)
+            cache.put_query_technologies(query, list(urls))
+        else:
+            print(f"Unexpected tech extractor output: {response.content}")
+        cache.save()
+
+    print(
+        f"Tech URL cache: {cached}/{len(urls)} technologies cached "
+        f"({cached / max(len(urls), 1):.0%}), saved {cached} searches and "
+        f"{0 if run_agent else 1} extractor runs"
+    )
+    return list(urls.values())
+
+
+converter: DocumentConverter | None = None
+splitter: TextSplitter | None = None
+
+
+def init_conversion_worker(chunk_size: int, chunk_overlap: int) -> None:
+    """
+    Creates the document converter and text splitter of a conversion worker
+    process, once for every link it converts.
+
+    :param chunk_size: Maximum number of characters per chunk.
+    :type chunk_size: int
+    :param chunk_overlap: Number of characters shared by consecutive chunks.
+    :type chunk_overlap: int
+    """
+    global converter, splitter
+    converter = DocumentConverter()
+    splitter = TextSplitter(chunk_size, chunk_overlap)
+
+
+def document_name(link: str, content_type: str | None) -> str:
+    """
+    Names a downloaded page after its URL, with the extension of its content
+    type when the URL has none, so docling recognizes its format.
+
+    :param link: The URL of the page.
+    :type link: str
+    :param content_type: The Content-Type of the page, if any.
+    :type content_type: str | None
+    :return: The file name of the page.
+    :rtype: str
+    """
+    name = os.path.basename(urlsplit(link).path) or "index"
+    if "." not in name:
+        mime_type = (content_type or "text/html").split(";")[0].strip()
+        name += mimetypes.guess_extension(mime_type) or ".html"
+    return name
+
+
+def process_link(
+    link: str, content: bytes, content_type: str | None
+) -> tuple[str, list[str] | None]:
     """
-    Processes a single link by converting it to documents and chunking the content.
+    Processes a single downloaded page in a conversion worker by converting it to markdown and chunking the content.
 
-    :param link: The URL to process.
+    :param link: The URL of the page.
     :type link: str
-    :return: A list of Document objects created from the chunked content.
-    :rtype: list[Document]
+    :param content: The body of the page, as already downloaded.
+    :type content: bytes
+    :param content_type: The Content-Type of the page, if any.
+    :type content_type: str | None
+    :return: The link and its chunks, or None as chunks if the conversion failed.
+    :rtype: tuple[str, list[str] | None]
     """
     try:
-        result = converter.convert(link)
-        chunks = splitter.chunks(result.document.export_to_markdown())
-        docs = [Document(content=chunk) for chunk in chunks]
-        vector_db.insert(docs)
-        print(f"Processed {link} and inserted {len(docs)} documents")
-    except requests.exceptions.HTTPError as e:
-        print(f"HTTP error occurred for URL '{link}': {str(e)}")
-        return False
-    return True
+        result = converter.convert(
+            DocumentStream(
+                name=document_name(link, content_type), stream=BytesIO(content)
+            )
+        )
+        return link, splitter.chunks(result.document.export_to_markdown())
+    except Exception as e:
+        print(f"Failed to convert URL '{link}': {str(e)}")
+        return link, None
+
+
+def chunk_id(chunk: str) -> str:
+    """
+    Computes the ID of the Qdrant point a chunk is stored as, the MD5 of its
+    content as agno computes it, so identical chunks map to the same point.
+
+    :param chunk: The chunk content.
+    :type chunk: str
+    :return: The point ID.
+    :rtype: str
+    """
+    return hashlib.md5(chunk.replace("\x00", "\ufffd").encode()).hexdigest()
+
+
+def delete_chunks(vector_db: Qdrant, chunk_ids: set[str]) -> None:
+    """
+    Deletes chunks from the Qdrant collection.
+
+    :param vector_db: The Qdrant vector database instance.
+    :type vector_db: Qdrant
+    :param chunk_ids: The point IDs of the chunks.
+    :type chunk_ids: set[str]
+    """
+    if chunk_ids:
+        vector_db.client.delete(
+            collection_name=vector_db.collection,
+            points_selector=models.PointIdsList(points=list(chunk_ids)),
+        )
+
+
+def insert_links(
+    vector_db: Qdrant,
+    manifest: CrawlManifest,
+    links: list[str],
+    responses: dict[str, httpx.Response],
+    workers: int,
+    batch_size: int,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> int:
+    """
+    Brings the collection up to date with the links: pages the manifest shows
+    unchanged are skipped, pages that are gone have their chunks deleted and
+    changed or new pages are converted on a pool of worker processes. Each
+    page is downloaded at most once, by the crawler or by the manifest check,
+    and converted from that download. Only chunks not already stored are
+    embedded, with this process as the single writer batching the Qdrant
+    upserts.
+
+    :param vector_db: The Qdrant vector database instance.
+    :type vector_db: Qdrant
+    :param manifest: The crawl manifest, updated as pages are ingested.
+    :type manifest: CrawlManifest
+    :param links: The URLs to convert and insert.
+    :type links: list[str]
+    :param responses: The responses of the pages the crawler downloaded, keyed by normalized URL.
+    :type responses: dict[str, httpx.Response]
+    :param workers: Number of conversion worker processes.
+    :type workers: int
+    :param batch_size: Number of documents per Qdrant upsert.
+    :type batch_size: int
+    :param chunk_size: Maximum number of characters per chunk.
+    :type chunk_size: int
+    :param chunk_overlap: Number of characters shared by consecutive chunks.
+    :type chunk_overlap: int
+    :return: The number of documents inserted.
+    :rtype: int
+    """
+    checks = asyncio.run(manifest.check_pages(links, responses))
+    counts = Counter(check["status"] for check in checks.values())
+    print(
+        "Manifest check: "
+        + ", ".join(f"{count} {status}" for status, count in counts.items())
+    )
+
+    for url, check in checks.items():
+        if check["status"] == PAGE_GONE:
+            old_ids = manifest.get_chunk_ids(url)
+            shared = manifest.get_shared_chunk_ids(url, old_ids)
+            delete_chunks(vector_db, old_ids - shared)
+            manifest.delete_page(url)
+
+    changed = [url for url, check in checks.items() if check["status"] == PAGE_CHANGED]
+    if not changed:
+        return 0
+
+    inserted = 0
+    batch: list[Document] = []
+    batch_ids: set[str] = set()
+    # Chunks of the pages converted so far, which no later page may delete, and
+    # chunks deleted so far, which a later page must insert again if it has them.
+    claimed_ids: set[str] = set()
+    deleted_ids: set[str] = set()
+    # Pages are recorded only once their chunks are stored, so an interrupted
+    # run ingests them again.
+    pending: list[tuple[str, dict, set[str]]] = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        # Forking a process that already runs threads can deadlock the child.
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_conversion_worker,
+        initargs=(chunk_size, chunk_overlap),
+    ) as pool:
+        futures = [
+            pool.submit(
+                process_link,
+                link,
+                checks[link].pop("content"),
+                checks[link].pop("content_type"),
+            )
+            for link in changed
+        ]
+        for future in as_completed(futures):
+            link, chunks = future.result()
+            if chunks is None:
+                continue
+            new_ids = {chunk_id(chunk) for chunk in chunks}
+            old_ids = manifest.get_chunk_ids(link)
+            shared = manifest.get_shared_chunk_ids(link, old_ids | new_ids)
+            shared |= claimed_ids
+            for chunk in chunks:
+                id_ = chunk_id(chunk)
+                stored = id_ in old_ids or id_ in shared
+                if (not stored or id_ in deleted_ids) and id_ not in batch_ids:
+                    batch.append(Document(content=chunk))
+                    batch_ids.add(id_)
+                    deleted_ids.discard(id_)
+            stale_ids = old_ids - new_ids - shared
+            delete_chunks(vector_db, stale_ids)
+            deleted_ids |= stale_ids
+            claimed_ids |= new_ids
+            pending.append((link, checks[link], new_ids))
+            print(
+                f"Processed {link} into {len(chunks)} chunks "
+                f"({len(new_ids - old_ids)} new, {len(stale_ids)} removed)"
+            )
+
+            if len(batch) >= batch_size:
+                vector_db.insert(batch)
+                inserted += len(batch)
+                for url, check, ids in pending:
+                    manifest.save_page(
+                        url,
+                        check["content_hash"],
+                        check["etag"],
+                        check["last_modified"],
+                        ids,
+                    )
+                batch, batch_ids, pending = [], set(), []
+
+    if batch:
+        vector_db.insert(batch)
+        inserted += len(batch)
+    for url, check, ids in pending:
+        manifest.save_page(
+            url, check["content_hash"], check["etag"], check["last_modified"], ids
+        )
+    return inserted
+
+
+def build_merge_prompt(
+    merger: Agent, context_chunks: list[str], candidates: dict[str, str]
+) -> str:
+    """
+    Builds the prompt of the code merger agent, with only the context chunks
+    the generated codes rely on, and reports its size.
+
+    :param merger: The code merger agent.
+    :type merger: Agent
+    :param context_chunks: The content of the context chunks given to the generators.
+    :type context_chunks: list[str]
+    :param candidates: The generated code of each code type.
+    :type candidates: dict[str, str]
+    :return: The merger prompt.
+    :rtype: str
+    """
+    sections = "\n\n".join(
+        f"{code_type} code:\n{content}" for code_type, content in candidates.items()
+    )
+    merge_chunks = select_merge_context(context_chunks, candidates)
+    prompt = f"{format_context(merge_chunks)}\n\n{sections}\n"
+
+    system_tokens = estimate_tokens(merger.model.system_prompt or "")
+    full_tokens = estimate_tokens(f"{format_context(context_chunks)}\n\n{sections}\n")
+    print(
+        f"Merge prompt: ~{system_tokens + estimate_tokens(prompt)} tokens "
+        f"(~{system_tokens + full_tokens} with the full context), "
+        f"{len(merge_chunks)}/{len(context_chunks)} context chunks kept"
+    )
+    return prompt
+
+
+async def stream_code(
+    agent: Agent, prompt: str, code_type: str, started: float
+) -> tuple[str, str]:
+    """
+    Streams the response of a generator agent, logging when its first token
+    and its last one arrived.
+
+    :param agent: The generator agent.
+    :type agent: Agent
+    :param prompt: The prompt to send.
+    :type prompt: str
+    :param code_type: The type of code being generated.
+    :type code_type: str
+    :param started: perf_counter() value at which the generation started.
+    :type started: float
+    :return: Tuple containing the code type and the generated code content.
+    :rtype: tuple[str, str]
+    """
+    chunks = []
+    first_token = None
+    async for event in await agent.arun(prompt, stream=True):
+        if event.event == RunEvent.run_response_content and event.content:
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            chunks.append(event.content)
+    print(
+        f"{code_type} code generated: first token at {first_token or 0:.1f}s, "
+        f"done at {time.perf_counter() - started:.1f}s"
+    )
+    return code_type, "".join(chunks)
+
+
+async def generate_candidate(
+    agent: Agent, query: str, code_type: str, started: float, report: dict
+) -> tuple[str, str, bool]:
+    """
+    Generates a candidate code and validates it in the sandbox, recording the
+    validation result and timings in the report.
+
+    :param agent: The generator agent.
+    :type agent: Agent
+    :param query: The query to process.
+    :type query: str
+    :param code_type: The type of code being generated.
+    :type code_type: str
+    :param started: perf_counter() value at which the generation started.
+    :type started: float
+    :param report: The pipeline report, updated in place.
+    :type report: dict
+    :return: Tuple containing the code type, the generated code content and whether it compiles.
+    :rtype: tuple[str, str, bool]
+    """
+    code_type, content = await stream_code(agent, query, code_type, started)
+    generated_at = time.perf_counter() - started
+    validation = await validate_code(extract_code(content))
+    report["candidates"][code_type] = {
+        **validation,
+        "generated_at": generated_at,
+        "validated_at": time.perf_counter() - started,
+    }
+    print_validation(code_type, validation)
+    return code_type, content, validation["valid"]
+
+
+def print_validation(code_type: str, validation: dict) -> None:
+    """
+    Prints the result of a code validation.
+
+    :param code_type: The type of code validated.
+    :type code_type: str
+    :param validation: The validation result.
+    :type validation: dict
+    """
+    status = "compiles" if validation["valid"] else "does not compile"
+    print(f"{code_type} code {status} (validated in {validation['elapsed']:.1f}s)")
+    for message in validation["errors"] + validation["warnings"]:
+        print(f"  {message}")
+
+
+async def generate_and_merge(
+    generators: list[tuple[Agent, str]],
+    merger: Agent,
+    context_chunks: list[str],
+    query: str,
+    quorum: int,
+    timeout: float,
+    report: dict,
+) -> str:
+    """
+    Runs the generator agents concurrently, validating each code as soon as it
+    is generated, and merges the codes that compile as soon as every generator
+    finished or once `timeout` seconds have passed, whichever comes first.
+    Generators still running at the deadline are cancelled.
+
+    :param generators: The generator agents and the type of code each one generates.
+    :type generators: list[tuple[Agent, str]]
+    :param merger: The code merger agent.
+    :type merger: Agent
+    :param context_chunks: The content of the context chunks, already in the generator prompts.
+    :type context_chunks: list[str]
+    :param query: The query to process.
+    :type query: str
+    :param quorum: Minimum number of valid codes to merge after the timeout.
+    :type quorum: int
+    :param timeout: Seconds to wait for the generators, counted once for the whole generation.
+    :type timeout: float
+    :param report: The pipeline report, filled with the candidate validations and stage timings.
+    :type report: dict
+    :return: The merged code content.
+    :rtype: str
+    :raises RuntimeError: If every generator failed, or if fewer than `quorum` codes compile at the deadline.
+    """
+    started = time.perf_counter()
+    deadline = started + timeout
+    report.setdefault("candidates", {})
+    report.setdefault("stages", {})
+    tasks = {
+        asyncio.create_task(
+            generate_candidate(agent, query, code_type, started, report)
+        ): code_type
+        for agent, code_type in generators
+    }
+    results = {}
+    invalid = {}
+    pending = set(tasks)
+    while pending:
+        wait_timeout = deadline - time.perf_counter()
+        if wait_timeout <= 0:
+            break
+        done, pending = await asyncio.wait(
+            pending, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            try:
+                code_type, content, valid = task.result()
+                if valid:
+                    results[code_type] = content
+                else:
+                    invalid[code_type] = content
+            except Exception:
+                print(f"{tasks[task]} code generation failed")
+                traceback.print_exc()
+
+    for task in pending:
+        task.cancel()
+        print(f"{tasks[task]} code dropped, not ready after {timeout}s")
+    await asyncio.gather(*pending, return_exceptions=True)
+    if pending and len(results) < quorum:
+        raise RuntimeError(
+            f"Only {len(results)} of the {quorum} codes needed compile "
+            f"after {timeout}s"
+        )
+    if not results:
+        if not invalid:
+            raise RuntimeError("Every code generator failed")
+        print("No generated code compiles, merging them anyway")
+        results = invalid
+
+    candidates = {
+        code_type: results[code_type]
+        for _, code_type in generators
+        if code_type in results
+    }
+    merge_started = time.perf_counter()
+    print(f"Merging {len(candidates)} codes at {merge_started - started:.1f}s...")
+    merge_prompt = build_merge_prompt(merger, context_chunks, candidates)
+    merged = await stream_code(merger, merge_prompt, "Merged", merge_started)
+    report["stages"]["generation"] = merge_started - started
+    report["stages"]["merge"] = time.perf_counter() - merge_started
+    print(
+        f"Critical path: generation {merge_started - started:.1f}s + "
+        f"merge {time.perf_counter() - merge_started:.1f}s = "
+        f"{time.perf_counter() - started:.1f}s"
+    )
+    return merged[1]
 
 
 if __name__ == "__main__":
@@ -136,6 +585,20 @@ if __name__ == "__main__":
     INSERT_CHUNKS = False
     WITH_CONTEXT = False
     QUERY = "Create a python script that use LemonFox.ai to transcript an audio and save it to a file"
+    CRAWL_DEPTH = 1
+    CRAWL_CACHE_FILE = "crawl_cache.json"
+    MANIFEST_FILE = "crawl_manifest.db"
+    TECH_CACHE_FILE = "tech_url_cache.json"
+    TECH_CACHE_TTL = 7 * 24 * 60 * 60
+    CONVERT_WORKERS = os.cpu_count()
+    INSERT_BATCH_SIZE = 256
+    CHUNK_SIZE = 1000
+    CHUNK_OVERLAP = 100
+    ASYNC_MERGE = True
+    MERGE_QUORUM = 2
+    MERGE_TIMEOUT = 60
+    CONTEXT_CANDIDATES = 30
+    CONTEXT_TOKEN_BUDGET = 4000
 
     embedder = OpenAIEmbedder(api_key=os.getenv("OPENAI_API_KEY"))
     vector_db = Qdrant(
@@ -147,30 +610,84 @@ if __name__ == "__main__":
     tech_extractor_agent = Agent(
         show_tool_calls=True,
         tools=[BraveSearchTools(fixed_max_results=1)],
+        response_model=TechnologyURLs,
         model=OpenAIChat(
             id="gpt-4o-mini",
             system_prompt=TECH_EXTRACTOR_PROMPT,
         ),
     )
 
+    if INSERT_CHUNKS:
+        print("🔍 Extracting technologies and collecting URLs...")
+        tech_cache = TechURLCache(TECH_CACHE_FILE, TECH_CACHE_TTL)
+        links = resolve_technology_urls(tech_extractor_agent, tech_cache, QUERY)
+        print("Tech URLs:", links)
+
+        link_cache = {}
+        if os.path.exists(CRAWL_CACHE_FILE):
+            with open(CRAWL_CACHE_FILE) as f:
+                link_cache = json.load(f)
+
+        crawler = Crawler(max_depth=CRAWL_DEPTH, link_cache=link_cache)
+        links = asyncio.run(crawler.crawl(links))
+        pprint.pprint(links)
+        pages = crawler.pages_fetched + crawler.pages_not_modified
+        print(
+            f"Crawled {pages} pages ({crawler.pages_not_modified} not modified) "
+            f"in {crawler.elapsed:.1f}s, {pages / max(crawler.elapsed, 1e-9):.1f} pages/s"
+        )
+
+        with open(CRAWL_CACHE_FILE, "w") as f:
+            json.dump(link_cache, f)
+
+        manifest = CrawlManifest(MANIFEST_FILE)
+        try:
+            inserted = insert_links(
+                vector_db,
+                manifest,
+                links,
+                crawler.responses,
+                CONVERT_WORKERS,
+                INSERT_BATCH_SIZE,
+                CHUNK_SIZE,
+                CHUNK_OVERLAP,
+            )
+        finally:
+            manifest.close()
+        print(f"Inserted {inserted} documents from {len(links)} links")
+
+    if WITH_CONTEXT:
+        documents = vector_db.search(QUERY, CONTEXT_CANDIDATES)
+        raw_context = format_context([doc.content for doc in documents[:10]])
+        context_chunks = assemble_context(
+            documents, embedder.get_embedding(QUERY), CONTEXT_TOKEN_BUDGET
+        )
+    else:
+        raw_context = ""
+        context_chunks = []
+    context = format_context(context_chunks)
+
+    # The shared context comes first in every generator prompt, before the
+    # instructions of each persona, so the provider can cache it once and
+    # reuse it for the other generators and for the next runs.
     code_generator_architect_agent = Agent(
         model=OpenAIChat(
             id="gpt-4o-mini",
-            system_prompt=CODE_GENERATOR_ARCHITECT_PROMPT,
+            system_prompt=context + CODE_GENERATOR_ARCHITECT_PROMPT,
         ),
     )
 
     code_generator_performance_agent = Agent(
         model=OpenAIChat(
             id="gpt-4o-mini",
-            system_prompt=CODE_GENERATOR_PERFORMANCE_PROMPT,
+            system_prompt=context + CODE_GENERATOR_PERFORMANCE_PROMPT,
         ),
     )
 
     code_generator_robustness_agent = Agent(
         model=OpenAIChat(
             id="gpt-4o-mini",
-            system_prompt=CODE_GENERATOR_ROBUSTNESS_PROMPT,
+            system_prompt=context + CODE_GENERATOR_ROBUSTNESS_PROMPT,
         ),
     )
 
@@ -181,101 +698,90 @@ if __name__ == "__main__":
         ),
     )
 
-    if INSERT_CHUNKS:
-        converter = DocumentConverter()
-        splitter = TextSplitter(1000, 100)
-
-        print("🔍 Extracting technologies and collecting URLs...")
-        tech_urls_response = tech_extractor_agent.run(
-            f"Extract technologies from this query and find relevant URLs: {QUERY}"
-        )
-        print("Tech URLs Response:", tech_urls_response.content)
-        links = [
-            link.split(": ")[1].strip()
-            for link in tech_urls_response.content.split("\n")
-            if link.strip()
-        ]
-
-        extracted_links = []
-
-        for link in links:
-            extracted_links.extend(extract_urls_from_webpage(link))
-
-        links = list(set(extracted_links))
-        pprint.pprint(links)
+    generators = [
+        (code_generator_architect_agent, "Architectural"),
+        (code_generator_performance_agent, "Performance"),
+        (code_generator_robustness_agent, "Robustness"),
+    ]
+
+    generator_tokens = estimate_tokens(CODE_GENERATOR_ARCHITECT_PROMPT + QUERY)
+    print(
+        f"Generator prompts: ~{generator_tokens + estimate_tokens(context)} tokens "
+        f"each (~{generator_tokens + estimate_tokens(raw_context)} before context "
+        f"assembly), {len(context_chunks)} context chunks in the shared prefix"
+    )
 
-        all_docs = Parallel(n_jobs=-1, backend="threading")(
-            delayed(process_link)(vector_db, link) for link in links
+    print("Generating code...")
+    started = time.perf_counter()
+    report = {"candidates": {}, "stages": {}}
+
+    if ASYNC_MERGE:
+        merged_code_content = asyncio.run(
+            generate_and_merge(
+                generators,
+                code_merger_agent,
+                context_chunks,
+                QUERY,
+                MERGE_QUORUM,
+                MERGE_TIMEOUT,
+                report,
+            )
         )
-
-    if WITH_CONTEXT:
-        context = [frag.content for frag in vector_db.search(QUERY, 10)]
-        context = "\n----------------------------------------------\n".join(context)
-        context = f"Context:\n{context}"
-        context += "\n----------------------------------------------\n"
     else:
-        context = ""
 
-    print("Generating code...")
-
-    def generate_code(
-        agent, context: str, query: str, code_type: str
-    ) -> tuple[str, str]:
-        """
-        Generates code using the specified agent.
-
-        :param agent: The agent to use for code generation.
-        :param context: The context to provide to the agent.
-        :type context: str
-        :param query: The query to process.
-        :type query: str
-        :param code_type: The type of code being generated.
-        :type code_type: str
-        :return: Tuple containing the generated code content and type.
-        :rtype: tuple[str, str]
-        """
-        result = agent.run(f"{context}\n\n\n{query}")
-        print(f"{code_type} code generated")
-        return result.content, code_type
-
-    code_results = Parallel(n_jobs=3, backend="threading")(
-        delayed(generate_code)(agent, context, QUERY, code_type)
-        for agent, code_type in [
-            (code_generator_architect_agent, "Architectural"),
-            (code_generator_performance_agent, "Performance"),
-            (code_generator_robustness_agent, "Robustness"),
-        ]
-    )
-
-    architectural_code_content = next(
-        result[0] for result in code_results if result[1] == "Architectural"
-    )
-    performance_code_content = next(
-        result[0] for result in code_results if result[1] == "Performance"
-    )
-    robustness_code_content = next(
-        result[0] for result in code_results if result[1] == "Robustness"
-    )
-
-    code_context = f"""
-    {context}
-
-    Architectural code:
-    {architectural_code_content}
-
-    Performance code:
-    {performance_code_content}
-
-    Robustness code:
-    {robustness_code_content}
-    """
+        def generate_code(agent, query: str, code_type: str) -> tuple[str, str]:
+            """
+            Generates code using the specified agent.
+
+            :param agent: The agent to use for code generation.
+            :param query: The query to process.
+            :type query: str
+            :param code_type: The type of code being generated.
+            :type code_type: str
+            :return: Tuple containing the generated code content and type.
+            :rtype: tuple[str, str]
+            """
+            result = agent.run(query)
+            print(f"{code_type} code generated")
+            return result.content, code_type
+
+        code_results = Parallel(n_jobs=3, backend="threading")(
+            delayed(generate_code)(agent, QUERY, code_type)
+            for agent, code_type in generators
+        )
+        candidates = {code_type: content for content, code_type in code_results}
+        report["stages"]["generation"] = time.perf_counter() - started
+
+        validation_started = time.perf_counter()
+        report["candidates"] = asyncio.run(validate_candidates(candidates))
+        report["stages"]["validation"] = time.perf_counter() - validation_started
+        for code_type, validation in report["candidates"].items():
+            print_validation(code_type, validation)
+        valid_candidates = {
+            code_type: content
+            for code_type, content in candidates.items()
+            if report["candidates"][code_type]["valid"]
+        }
+        if not valid_candidates:
+            print("No generated code compiles, merging them anyway")
+
+        print("Merging code...")
+        merge_started = time.perf_counter()
+        code_context = build_merge_prompt(
+            code_merger_agent, context_chunks, valid_candidates or candidates
+        )
+        merged_code = code_merger_agent.run(code_context, markdown=True)
+        print("Code merged")
+        merged_code_content = merged_code.content
+        report["stages"]["merge"] = time.perf_counter() - merge_started
 
-    print("Merging code...")
-    merged_code = code_merger_agent.run(code_context, markdown=True)
-    print("Code merged")
+    merged_code_content = extract_code(merged_code_content)
 
-    merged_code_content = merged_code.content
-    merged_code_content = merged_code_content.replace("```python", "").replace("```", "").strip()
+    validation_started = time.perf_counter()
+    report["merged"] = asyncio.run(validate_code(merged_code_content))
+    report["stages"]["merged_validation"] = time.perf_counter() - validation_started
+    report["stages"]["total"] = time.perf_counter() - started
+    print_validation("Merged", report["merged"])
 
     output_name = "merged_code.py"
     if INSERT_CHUNKS:
@@ -286,4 +792,8 @@ if __name__ == "__main__":
     with open(output_name, "w") as f:
         f.write(merged_code_content)
 
-    print(f"Code saved to {output_name}")
+    report_name = output_name.replace(".py", "_report.json")
+    with open(report_name, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Code saved to {output_name}, validation report saved to {report_name}")
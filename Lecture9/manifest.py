@@ -0,0 +1,275 @@
+from crawler import USER_AGENT, normalize_url
+import importlib.util
+import hashlib
+import asyncio
+import sqlite3
+import httpx
+import time
+
+
+PAGE_UNCHANGED = "unchanged"
+PAGE_CHANGED = "changed"
+PAGE_GONE = "gone"
+PAGE_FAILED = "failed"
+
+
+class CrawlManifest:
+    """
+    Persistent record of the ingested documentation pages, keyed by normalized
+    URL: validators and content hash of each page, the IDs of the chunks it was
+    split into and when it was ingested.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens the manifest, creating it if needed.
+
+        :param path: Path of the SQLite file backing the manifest.
+        :type path: str
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                ingested_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                url TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                PRIMARY KEY (url, chunk_id)
+            );
+            CREATE INDEX IF NOT EXISTS chunks_chunk_id ON chunks (chunk_id);
+            """
+        )
+
+    def get_page(self, url: str) -> dict | None:
+        """
+        Gets the manifest entry of a page.
+
+        :param url: The normalized page URL.
+        :type url: str
+        :return: The content hash and validators of the page, or None if it was never ingested.
+        :rtype: dict | None
+        """
+        row = self.connection.execute(
+            "SELECT content_hash, etag, last_modified FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"content_hash": row[0], "etag": row[1], "last_modified": row[2]}
+
+    def get_chunk_ids(self, url: str) -> set[str]:
+        """
+        Gets the IDs of the chunks a page was split into.
+
+        :param url: The normalized page URL.
+        :type url: str
+        :return: The chunk IDs.
+        :rtype: set[str]
+        """
+        rows = self.connection.execute(
+            "SELECT chunk_id FROM chunks WHERE url = ?", (url,)
+        )
+        return {row[0] for row in rows}
+
+    def get_shared_chunk_ids(self, url: str, chunk_ids: set[str]) -> set[str]:
+        """
+        Gets which of the given chunks also belong to other pages, e.g. a footer
+        repeated on every page, since identical chunks share one point.
+
+        :param url: The normalized URL of the page the chunks come from.
+        :type url: str
+        :param chunk_ids: The chunk IDs to look up.
+        :type chunk_ids: set[str]
+        :return: The chunk IDs stored for any other page.
+        :rtype: set[str]
+        """
+        shared = set()
+        chunk_ids = list(chunk_ids)
+        # Stay below SQLite's limit on the number of query parameters.
+        for start in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[start : start + 500]
+            rows = self.connection.execute(
+                f"SELECT chunk_id FROM chunks WHERE url != ? "
+                f"AND chunk_id IN ({', '.join('?' * len(batch))})",
+                (url, *batch),
+            )
+            shared.update(row[0] for row in rows)
+        return shared
+
+    def save_page(
+        self,
+        url: str,
+        content_hash: str,
+        etag: str | None,
+        last_modified: str | None,
+        chunk_ids: set[str],
+    ) -> None:
+        """
+        Records a page as ingested, replacing its previous chunks.
+
+        :param url: The normalized page URL.
+        :type url: str
+        :param content_hash: SHA-256 of the page body.
+        :type content_hash: str
+        :param etag: ETag of the page, if any.
+        :type etag: str | None
+        :param last_modified: Last-Modified of the page, if any.
+        :type last_modified: str | None
+        :param chunk_ids: IDs of the chunks the page was split into.
+        :type chunk_ids: set[str]
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (url, content_hash, etag, last_modified, time.time()),
+            )
+            self.connection.execute("DELETE FROM chunks WHERE url = ?", (url,))
+            self.connection.executemany(
+                "INSERT INTO chunks VALUES (?, ?)",
+                [(url, chunk_id) for chunk_id in chunk_ids],
+            )
+
+    def update_validators(
+        self, url: str, etag: str | None, last_modified: str | None
+    ) -> None:
+        """
+        Updates the validators of a page whose content did not change.
+
+        :param url: The normalized page URL.
+        :type url: str
+        :param etag: ETag of the page, if any.
+        :type etag: str | None
+        :param last_modified: Last-Modified of the page, if any.
+        :type last_modified: str | None
+        """
+        with self.connection:
+            self.connection.execute(
+                "UPDATE pages SET etag = ?, last_modified = ? WHERE url = ?",
+                (etag, last_modified, url),
+            )
+
+    def delete_page(self, url: str) -> None:
+        """
+        Removes a page and its chunks from the manifest.
+
+        :param url: The normalized page URL.
+        :type url: str
+        """
+        with self.connection:
+            self.connection.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self.connection.execute("DELETE FROM chunks WHERE url = ?", (url,))
+
+    def check_response(self, url: str, response: httpx.Response) -> dict:
+        """
+        Checks whether a page changed since it was ingested, from its response.
+
+        :param url: The normalized page URL.
+        :type url: str
+        :param response: The response to a GET of the page, conditional or not.
+        :type response: httpx.Response
+        :return: The page status and, when changed, its validators, content hash, content and content type.
+        :rtype: dict
+        """
+        page = self.get_page(url)
+        if response.status_code == 304 and page:
+            return {"status": PAGE_UNCHANGED}
+        if response.status_code in (404, 410):
+            return {"status": PAGE_GONE}
+        if response.is_error:
+            print(f"HTTP error {response.status_code} occurred for URL '{url}'")
+            return {"status": PAGE_FAILED}
+
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        if page and page["content_hash"] == content_hash:
+            self.update_validators(url, etag, last_modified)
+            return {"status": PAGE_UNCHANGED}
+        return {
+            "status": PAGE_CHANGED,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "content": response.content,
+            "content_type": response.headers.get("content-type"),
+        }
+
+    async def check_page(self, client: httpx.AsyncClient, url: str) -> dict:
+        """
+        Checks whether a page changed since it was ingested, with a conditional GET.
+
+        :param client: The HTTP client.
+        :type client: httpx.AsyncClient
+        :param url: The normalized page URL.
+        :type url: str
+        :return: The page status and, when changed, its validators, content hash, content and content type.
+        :rtype: dict
+        """
+        page = self.get_page(url)
+        headers = {}
+        if page and page["etag"]:
+            headers["If-None-Match"] = page["etag"]
+        if page and page["last_modified"]:
+            headers["If-Modified-Since"] = page["last_modified"]
+
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            print(f"Request failed for URL '{url}': {str(e)}")
+            return {"status": PAGE_FAILED}
+        return self.check_response(url, response)
+
+    async def check_pages(
+        self,
+        urls: list[str],
+        responses: dict[str, httpx.Response] | None = None,
+        concurrency: int = 16,
+        timeout: float = 30,
+    ) -> dict[str, dict]:
+        """
+        Checks a set of pages against the manifest, concurrently. Pages already
+        downloaded, e.g. by the crawler, are checked without a new request.
+
+        :param urls: The page URLs.
+        :type urls: list[str]
+        :param responses: The responses of the pages already downloaded, keyed by normalized URL.
+        :type responses: dict[str, httpx.Response] | None
+        :param concurrency: Maximum number of requests at once.
+        :type concurrency: int
+        :param timeout: Timeout of each request, in seconds.
+        :type timeout: float
+        :return: The check result of each page, keyed by normalized URL.
+        :rtype: dict[str, dict]
+        """
+        urls = list(dict.fromkeys(normalize_url(url) for url in urls))
+        limit = asyncio.Semaphore(concurrency)
+
+        responses = responses or {}
+
+        async def check(client: httpx.AsyncClient, url: str) -> dict:
+            if url in responses:
+                return self.check_response(url, responses[url])
+            async with limit:
+                return await self.check_page(client, url)
+
+        async with httpx.AsyncClient(
+            # HTTP/2 needs the optional 'h2' package (httpx[http2]).
+            http2=importlib.util.find_spec("h2") is not None,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=concurrency),
+            timeout=timeout,
+        ) as client:
+            results = await asyncio.gather(*(check(client, url) for url in urls))
+        return dict(zip(urls, results))
+
+    def close(self) -> None:
+        """
+        Closes the manifest database.
+        """
+        self.connection.close()
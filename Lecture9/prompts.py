@@ -18,28 +18,26 @@ TECH_EXTRACTOR_PROMPT = dedent(
     4. Focus on official documentation, GitHub repositories, and high-quality tutorials
     5. Python must not be considered a technology.
     6. A single URL documentation for each technology is enough.
-    7. The output must not contain square brackets.
+    7. Technologies the request lists as already resolved must not be searched for nor returned.
     </Guidelines>
 
     <Output>
-    Technology name 1: URL 1
-    Technology name 2: URL 2
-    ...
+    One entry per technology, with the technology name and its documentation URL.
     </Output>
 
     <Examples>
     Input: Create a python script that use Pandas to read a csv file and save it to a new csv file.
     Output:
-    Pandas: https://pandas.pydata.org/
+    {"technologies": [{"technology": "Pandas", "url": "https://pandas.pydata.org/"}]}
 
     Input: Generate a python program that use Agno and Pytorch to create a new agent that can answer questions about the user's query.
     Output:
-    Agno: https://docs.agno.ai/
-    Pytorch: https://pytorch.org/
+    {"technologies": [{"technology": "Agno", "url": "https://docs.agno.ai/"}, {"technology": "Pytorch", "url": "https://pytorch.org/"}]}
 
     Input: Use python with docling to convert a pdf file to a markdown file.
+    Already resolved, do not search for or return: Docling
     Output:
-    Docling: https://docling-project.github.io/docling/
+    {"technologies": []}
     </Examples>
     """
 )
@@ -135,7 +133,7 @@ CODE_MERGER_PROMPT = dedent(
     </Persona>
 
     <Task>
-    Your task is to analyze three different Python code implementations and merge them into a single, improved solution that incorporates the best aspects of each approach.
+    Your task is to analyze the different Python code implementations (usually three, fewer when a generator did not finish in time) and merge them into a single, improved solution that incorporates the best aspects of each approach.
     </Task>
 
     <Guidelines>
@@ -0,0 +1,133 @@
+import json
+import time
+import os
+import re
+
+
+class TechURLCache:
+    """
+    Persistent cache of the documentation URL of each technology and of the
+    technologies each query mentions, so repeated queries skip the extractor
+    agent and its searches. Entries expire after `ttl` seconds.
+    """
+
+    def __init__(self, path: str, ttl: float) -> None:
+        """
+        Loads the cache from disk, if it exists.
+
+        :param path: Path of the JSON file backing the cache.
+        :type path: str
+        :param ttl: Lifetime of an entry, in seconds.
+        :type ttl: float
+        """
+        self.path = path
+        self.ttl = ttl
+        self.technologies: dict[str, dict] = {}
+        self.queries: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.technologies = data.get("technologies", {})
+            self.queries = data.get("queries", {})
+
+    def is_fresh(self, entry: dict | None) -> bool:
+        """
+        Checks whether a cache entry exists and has not expired.
+
+        :param entry: The cache entry.
+        :type entry: dict | None
+        :return: True if the entry can be used.
+        :rtype: bool
+        """
+        return entry is not None and time.time() - entry["cached_at"] < self.ttl
+
+    def get_url(self, technology: str) -> str | None:
+        """
+        Gets the cached documentation URL of a technology.
+
+        :param technology: The technology name, in any case.
+        :type technology: str
+        :return: The URL, or None if it is not cached or has expired.
+        :rtype: str | None
+        """
+        entry = self.technologies.get(technology.casefold())
+        return entry["url"] if self.is_fresh(entry) else None
+
+    def put_url(self, technology: str, url: str) -> None:
+        """
+        Caches the documentation URL of a technology.
+
+        :param technology: The technology name.
+        :type technology: str
+        :param url: The documentation URL.
+        :type url: str
+        """
+        self.technologies[technology.casefold()] = {
+            "name": technology,
+            "url": url,
+            "cached_at": time.time(),
+        }
+
+    def get_query_technologies(self, query: str) -> list[str] | None:
+        """
+        Gets the technologies a query was found to mention.
+
+        :param query: The user query.
+        :type query: str
+        :return: The technology names, or None if the query is not cached.
+        :rtype: list[str] | None
+        """
+        entry = self.queries.get(" ".join(query.casefold().split()))
+        return entry["technologies"] if self.is_fresh(entry) else None
+
+    def put_query_technologies(self, query: str, technologies: list[str]) -> None:
+        """
+        Caches the technologies a query mentions.
+
+        :param query: The user query.
+        :type query: str
+        :param technologies: The technology names.
+        :type technologies: list[str]
+        """
+        self.queries[" ".join(query.casefold().split())] = {
+            "technologies": technologies,
+            "cached_at": time.time(),
+        }
+
+    def find_mentioned(self, query: str) -> list[str]:
+        """
+        Finds the cached technologies whose name appears in a query.
+
+        :param query: The user query.
+        :type query: str
+        :return: The names of the cached technologies mentioned.
+        :rtype: list[str]
+        """
+        return [
+            entry["name"]
+            for key, entry in self.technologies.items()
+            if self.is_fresh(entry)
+            and re.search(rf"(?<!\w){re.escape(key)}(?!\w)", query.casefold())
+        ]
+
+    def save(self) -> None:
+        """
+        Writes the unexpired entries of the cache to disk.
+        """
+        with open(self.path, "w") as f:
+            json.dump(
+                {
+                    "technologies": {
+                        key: entry
+                        for key, entry in self.technologies.items()
+                        if self.is_fresh(entry)
+                    },
+                    "queries": {
+                        key: entry
+                        for key, entry in self.queries.items()
+                        if self.is_fresh(entry)
+                    },
+                },
+                f,
+                indent=2,
+            )
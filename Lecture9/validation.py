@@ -0,0 +1,135 @@
+from textwrap import dedent
+import asyncio
+import json
+import time
+import sys
+import re
+
+
+CODE_BLOCK_PATTERN = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)```", re.DOTALL)
+# Runs in the sandbox: limits its own CPU time and memory, then compiles the
+# code read from stdin and checks that its imports are installed in the module
+# search path it is given, without executing it.
+VALIDATOR_SCRIPT = dedent(
+    """
+    import importlib.util
+    import json
+    import sys
+    import ast
+
+    cpu_seconds, memory_bytes = int(sys.argv[1]), int(sys.argv[2])
+    sys.path[:] = json.loads(sys.argv[3])
+    try:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    except (ImportError, ValueError, OSError):
+        pass
+
+    source = sys.stdin.read()
+    errors, warnings = [], []
+    try:
+        tree = ast.parse(source, "candidate.py")
+        compile(tree, "candidate.py", "exec")
+    except SyntaxError as e:
+        errors.append(f"line {e.lineno}: {e.msg}")
+    else:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                modules = [node.module]
+            else:
+                continue
+            for module in modules:
+                if importlib.util.find_spec(module.split(".")[0]) is None:
+                    warnings.append(f"line {node.lineno}: module '{module}' not found")
+    print(json.dumps({"errors": errors, "warnings": warnings}))
+    """
+)
+
+
+def extract_code(content: str) -> str:
+    """
+    Extracts the Python code of an agent response, from its fenced code blocks
+    if it has any.
+
+    :param content: The agent response.
+    :type content: str
+    :return: The code.
+    :rtype: str
+    """
+    blocks = CODE_BLOCK_PATTERN.findall(content)
+    if blocks:
+        return "\n\n".join(block.strip() for block in blocks)
+    return content.replace("```python", "").replace("```", "").strip()
+
+
+async def validate_code(
+    code: str, timeout: float = 10, cpu_seconds: int = 5, memory_mb: int = 512
+) -> dict:
+    """
+    Compiles a generated script and checks its imports in a separate Python
+    process, limited in CPU time and memory and killed after a timeout.
+
+    :param code: The code to validate.
+    :type code: str
+    :param timeout: Seconds after which the validation is aborted.
+    :type timeout: float
+    :param cpu_seconds: CPU time limit of the validation process.
+    :type cpu_seconds: int
+    :param memory_mb: Memory limit of the validation process, in megabytes.
+    :type memory_mb: int
+    :return: Whether the code is valid, its errors and warnings and the validation time.
+    :rtype: dict
+    """
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        # Isolated mode: no environment variables, user site or current directory.
+        "-I",
+        "-c",
+        VALIDATOR_SCRIPT,
+        str(cpu_seconds),
+        str(memory_mb * 1024 * 1024),
+        # Imports are checked against the packages this project can import,
+        # user site included, which isolated mode would otherwise leave out.
+        json.dumps([path for path in sys.path if path]),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(code.encode()), timeout
+        )
+        result = json.loads(stdout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        result = {"errors": [f"validation timed out after {timeout}s"], "warnings": []}
+    except json.JSONDecodeError:
+        # The process was killed by a limit or crashed before reporting.
+        message = stderr.decode(errors="replace").strip().splitlines()
+        reason = message[-1] if message else f"exit code {process.returncode}"
+        result = {"errors": [f"validation failed: {reason}"], "warnings": []}
+
+    result["valid"] = not result["errors"]
+    result["elapsed"] = time.perf_counter() - started
+    return result
+
+
+async def validate_candidates(candidates: dict[str, str]) -> dict[str, dict]:
+    """
+    Validates several generated codes in parallel, each in its own sandbox.
+
+    :param candidates: The agent response of each code type.
+    :type candidates: dict[str, str]
+    :return: The validation result of each code type.
+    :rtype: dict[str, dict]
+    """
+    results = await asyncio.gather(
+        *(validate_code(extract_code(content)) for content in candidates.values())
+    )
+    return dict(zip(candidates, results))